@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
+from app.services.reference_cache import reference_cache
 from app.api.deps_auth import get_admin_user
 from app.models.aircraft import Aircraft
 from app.schemas.aircraft import AircraftCreate, AircraftUpdate, AircraftOut
@@ -16,12 +17,17 @@ def create_aircraft(
     aircraft = Aircraft(**data.model_dump())
     db.add(aircraft)
     db.commit()
+    reference_cache.invalidate("aircraft")
     db.refresh(aircraft)
     return aircraft
 
 @router.get("/", response_model=list[AircraftOut])
-def list_aircraft(db: Session = Depends(get_db)):
-    return db.query(Aircraft).all()
+def list_aircraft(
+    request: Request,
+    after_id: int | None = Query(None, ge=0, description="Return rows after this id (keyset cursor)"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size; omit for the full list"),
+):
+    return reference_cache.list_response(request, "aircraft", after_id, limit)
 
 @router.get("/{aircraft_id}", response_model=AircraftOut)
 def get_aircraft(aircraft_id: int, db: Session = Depends(get_db)):
@@ -43,6 +49,7 @@ def update_aircraft(
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(aircraft, key, value)
     db.commit()
+    reference_cache.invalidate("aircraft")
     db.refresh(aircraft)
     return aircraft
 
@@ -57,4 +64,5 @@ def delete_aircraft(
         raise HTTPException(status_code=404, detail="Aircraft not found")
     db.delete(aircraft)
     db.commit()
+    reference_cache.invalidate("aircraft")
     return {"message": "Aircraft deleted"}
\ No newline at end of file
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
+from app.services.reference_cache import reference_cache
 from app.api.deps_auth import get_current_user
 from app.models.airline import Airline
 from app.schemas.airline import AirlineCreate, AirlineUpdate, AirlineOut
@@ -26,14 +27,17 @@ def create_airline(
 
     db.add(airline)
     db.commit()
+    reference_cache.invalidate("airlines")
     db.refresh(airline)
     return airline
 
 @router.get("/", response_model=list[AirlineOut])
 def list_airlines(
-    db: Session = Depends(get_db),
+    request: Request,
+    after_id: int | None = Query(None, ge=0, description="Return rows after this id (keyset cursor)"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size; omit for the full list"),
 ):
-    return db.query(Airline).all()
+    return reference_cache.list_response(request, "airlines", after_id, limit)
 
 @router.get("/{airline_id}", response_model=AirlineOut)
 def get_airline(
@@ -63,6 +67,7 @@ def update_airline(
         setattr(airline, key, value)
 
     db.commit()
+    reference_cache.invalidate("airlines")
     db.refresh(airline)
     return airline
 
@@ -79,5 +84,6 @@ def delete_airline(
 
     db.delete(airline)
     db.commit()
+    reference_cache.invalidate("airlines")
     return {"message": "Airline deleted"}
 
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
+from app.services.reference_cache import reference_cache
+from app.services.airport_suggest import airport_suggest
 from app.api.deps_auth import get_admin_user
 from app.models.airport import Airport
-from app.schemas.airport import AirportCreate, AirportUpdate, AirportOut
+from app.schemas.airport import AirportCreate, AirportUpdate, AirportOut, AirportSuggestion
 
 router = APIRouter(prefix="/airports", tags=["Airports"])
 
@@ -21,12 +23,25 @@ def create_airport(
     airport = Airport(**data.model_dump())
     db.add(airport)
     db.commit()
+    reference_cache.invalidate("airports")
     db.refresh(airport)
     return airport
 
 @router.get("/", response_model=list[AirportOut])
-def list_airports(db: Session = Depends(get_db)):
-    return db.query(Airport).all()
+def list_airports(
+    request: Request,
+    after_id: int | None = Query(None, ge=0, description="Return rows after this id (keyset cursor)"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size; omit for the full list"),
+):
+    return reference_cache.list_response(request, "airports", after_id, limit)
+
+@router.get("/suggest", response_model=list[AirportSuggestion])
+def suggest_airports(
+    q: str = Query(..., min_length=1, max_length=100, description="IATA code, city, name or country prefix"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Typeahead: exact IATA match first, then prefix matches, airports with routes first"""
+    return airport_suggest.suggest(q, limit)
 
 @router.get("/{airport_id}", response_model=AirportOut)
 def get_airport(airport_id: int, db: Session = Depends(get_db)):
@@ -50,6 +65,7 @@ def update_airport(
         setattr(airport, key, value)
 
     db.commit()
+    reference_cache.invalidate("airports")
     db.refresh(airport)
     return airport
 
@@ -65,4 +81,5 @@ def delete_airport(
 
     db.delete(airport)
     db.commit()
+    reference_cache.invalidate("airports")
     return {"message": "Airport deleted"}
\ No newline at end of file
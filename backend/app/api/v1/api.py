@@ -5,8 +5,12 @@ from app.api.v1.airport import router as airport_router
 from app.api.v1.aircraft import router as aircraft_router
 from app.api.v1.route import router as route_router
 from app.api.v1.flight import router as flight_router
+from app.api.v1.schedule import router as schedule_router
+from app.api.v1.imports import router as imports_router
 from app.api.v1.booking import router as booking_router
 from app.api.v1.payment import router as payment_router
+from app.api.v1.jobs import router as jobs_router
+from app.api.v1.profiling import router as profiling_router
 
 api_router = APIRouter()
 
@@ -16,8 +20,12 @@ api_router.include_router(airport_router)
 api_router.include_router(aircraft_router)
 api_router.include_router(route_router)
 api_router.include_router(flight_router)
+api_router.include_router(schedule_router)
+api_router.include_router(imports_router)
 api_router.include_router(booking_router)
 api_router.include_router(payment_router)
+api_router.include_router(jobs_router)
+api_router.include_router(profiling_router)
 
 
 @api_router.get("/health")
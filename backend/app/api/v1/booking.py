@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 import random
 import string
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
+from decimal import Decimal
 
 from app.api.deps import get_db
-from app.api.deps_auth import get_current_user
-from app.models.booking import Booking, BookingStatus
+from app.api.deps_auth import get_current_user, get_admin_user
+from app.models.booking import Booking, BookingStatus, SEAT_HOLDING_STATUSES
 from app.models.flight import Flight
 from app.schemas.booking import BookingCreate, BookingOut
 
@@ -19,23 +24,131 @@ from app.utils.payment_validator import (
     parse_expiry,
     CardValidationError
 )
-from app.utils.payment_gateway import get_payment_gateway
+from app.utils.payment_gateway import get_payment_gateway, full_refund_key
+from app.utils.gateway_resilience import GatewayUnavailable
 from app.models.payment import Payment, PaymentStatus
 from app.utils.websocket_manager import manager
+from app.utils.admission_control import admission_controller, AdmissionRejected
 from app.services.logging_service import log_booking_event
 from app.services.email_service import send_booking_confirmation
+from app.services.booking_expiry import payment_deadline_from
+from app.services.pending_payments import settle_late_charge, EXPIRED_BEFORE_PAYMENT
+from app.services.seat_map_cache import seat_map_cache
+from app.services.reference_cache import reference_cache
+from app.services.pricing import fare_engine, verify_fare_quote, FARE_QUOTE_CHECKS
+from app.services.currency import currency_rates, UnsupportedCurrency
+from app.core.config import BASE_CURRENCY
+from app.utils.streaming import export_response, next_page_headers
+from app.utils.query_stats import query_budget
+from app.utils.fast_json import trusted_response
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
 
+def _release_seat(db: Session, booking_id: int, payment_id: int, flight_id: int):
+    """Drop a seat hold whose charge was declined or never sent"""
+    db.query(Payment).filter(Payment.id == payment_id).delete(synchronize_session=False)
+    db.query(Booking).filter(Booking.id == booking_id).delete(synchronize_session=False)
+    db.commit()
+    # Bulk deletes skip the session events
+    seat_map_cache.invalidate([flight_id])
+
+
 def generate_booking_reference():
     """Generate random 6-character alphanumeric reference"""
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
 
+def check_seat_fare(
+        db: Session,
+        flight: Flight,
+        seat_number: str,
+        total_amount: float,
+        fare_quote: str | None = None,
+        currency: str = BASE_CURRENCY,
+) -> Decimal:
+    """
+    The seat must exist and total_amount (in `currency`) must match its
+    cabin's fare; returns the fare in BASE_CURRENCY
+
+    With a fare quote that is the quoted fare at the quote's exchange rates,
+    read from the verified token without re-pricing (no query); without one,
+    the current fare at current rates.
+    """
+    cabin = reference_cache.seat_cabin(flight.aircraft_id, seat_number)
+    if cabin is None:
+        raise HTTPException(status_code=400, detail=f"Invalid seat number: {seat_number}")
+    quote = None
+    if fare_quote is not None:
+        quote = verify_fare_quote(fare_quote)
+        if quote is None or quote.flight_id != flight.id:
+            FARE_QUOTE_CHECKS.inc("invalid")
+            raise HTTPException(status_code=400, detail="Invalid fare quote")
+        rates = currency_rates.snapshot(quote.rates_version)
+        if quote.expires_at < time.time() or rates is None:
+            FARE_QUOTE_CHECKS.inc("expired")
+            raise HTTPException(status_code=409, detail="Fare quote expired; search again for a current fare")
+        FARE_QUOTE_CHECKS.inc("honoured")
+        fare = quote.fares[cabin]
+    else:
+        rates = currency_rates.snapshot()
+        fare = Decimal(str(fare_engine.fare(db, flight, cabin)))
+
+    try:
+        amount = rates.convert(fare, currency)
+    except UnsupportedCurrency as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if Decimal(str(total_amount)) != amount:
+        if quote is not None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Amount {total_amount} {currency} does not match the quoted {cabin} fare {amount} {currency}",
+            )
+        raise HTTPException(
+            status_code=409,
+            detail=f"Fare changed: {cabin} fare for seat {seat_number} is now {amount} {currency} (got {total_amount})",
+        )
+    return fare
+
+
+@asynccontextmanager
+async def _admission_slot(flight_id: int, queue_token: str | None):
+    """Hold a per-flight booking slot, or shed the request with 503 + Retry-After"""
+    try:
+        async with admission_controller.admit(flight_id, queue_token):
+            yield
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+# Declared before get_current_user on the endpoints so that waiting in the
+# queue does not hold a DB connection. Clients may send X-Queue-Token to find
+# their position in the "queue_update" WebSocket messages.
+async def admit_booking(
+    data: BookingCreate,
+    x_queue_token: str | None = Header(default=None),
+):
+    async with _admission_slot(data.flight_id, x_queue_token):
+        yield
+
+
+async def admit_booking_with_payment(
+    data: BookingWithPaymentCreate,
+    x_queue_token: str | None = Header(default=None),
+):
+    async with _admission_slot(data.flight_id, x_queue_token):
+        yield
+
+
 @router.post("/", response_model=BookingOut)
+@query_budget(7)
 async def create_booking(  # ← CHANGED to async
     data: BookingCreate,
+    _slot = Depends(admit_booking),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
@@ -43,34 +156,29 @@ async def create_booking(  # ← CHANGED to async
     flight = db.query(Flight).filter(Flight.id == data.flight_id).first()
     if not flight:
         raise HTTPException(status_code=404, detail="Flight not found")
+    if flight.cancelled_at:
+        raise HTTPException(status_code=400, detail="Flight has been cancelled")
     
     # Check if seat is already booked (CRITICAL: prevents race condition)
     existing_booking = db.query(Booking).filter(
         Booking.flight_id == data.flight_id,
         Booking.seat_number == data.seat_number,
+        Booking.status.in_(SEAT_HOLDING_STATUSES),
     ).first()
     
     if existing_booking:
         raise HTTPException(status_code=409, detail=f"Seat {data.seat_number} already booked")
     
-    # Check if seat number is valid (exists in aircraft seat map)
-    seat_map = flight.aircraft.seat_map
-    valid_seat_numbers = []
-    if "rows" in seat_map:
-        for row in seat_map["rows"]:
-            if "seats" in row:
-                for seat in row["seats"]:
-                    valid_seat_numbers.append(seat["number"])
-    
-    if data.seat_number not in valid_seat_numbers:
-        raise HTTPException(status_code=400, detail=f"Invalid seat number: {data.seat_number}")
+    # Check the seat exists in the aircraft seat map and the amount is its fare
+    fare = check_seat_fare(db, flight, data.seat_number, data.total_amount, data.fare_quote)
     
     # Generate unique booking reference
     booking_ref = generate_booking_reference()
     while db.query(Booking).filter(Booking.booking_reference == booking_ref).first():
         booking_ref = generate_booking_reference()
     
-    # Create booking
+    # Create booking - it holds the seat until paid or past its payment deadline
+    booking_time = datetime.utcnow()
     booking = Booking(
         booking_reference=booking_ref,
         user_id=current_user.id,
@@ -81,13 +189,19 @@ async def create_booking(  # ← CHANGED to async
         passenger_phone=data.passenger_phone,
         passenger_id_number=data.passenger_id_number,
         passenger_id_type=data.passenger_id_type,
-        total_amount=data.total_amount,
-        status=BookingStatus.CONFIRMED,  # Will change to PENDING once payment is added
-        issued_time=datetime.utcnow(),
+        total_amount=fare,
+        status=BookingStatus.PENDING,  # Confirmed by process_payment
+        booking_time=booking_time,
+        payment_deadline=payment_deadline_from(booking_time),
     )
     
     db.add(booking)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request booked the seat since the check above
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Seat {data.seat_number} already booked")
     db.refresh(booking)
     
     # Broadcast seat unavailable ← NEW
@@ -105,15 +219,35 @@ async def create_booking(  # ← CHANGED to async
 
 
 @router.get("/", response_model=list[BookingOut])
+@query_budget(2)
 def list_my_bookings(
+        response: Response,
+        after_id: int | None = Query(None, ge=0, description="Return bookings after this id (keyset cursor)"),
+        limit: int | None = Query(None, ge=1, le=500, description="Page size; omit for all bookings"),
         db: Session = Depends(get_db),
         current_user=Depends(get_current_user),
 ):
-    """Get all bookings for current user"""
-    bookings = db.query(Booking).filter(Booking.user_id == current_user.id).all()
+    """
+    Get bookings for current user
+
+    With `limit`, results are paged in id order; a full page carries
+    X-Next-After-Id to pass as `after_id` for the next one.
+    """
+    # Flights are joined in, not lazy-loaded per booking
+    query = db.query(Booking).options(joinedload(Booking.flight)).filter(Booking.user_id == current_user.id)
+    headers = {}
+    if limit is None:
+        bookings = query.all()
+    else:
+        if after_id is not None:
+            query = query.filter(Booking.id > after_id)
+        bookings = query.order_by(Booking.id).limit(limit).all()
+        headers = next_page_headers(bookings, limit)
+        response.headers.update(headers)
     results = []
     for b in bookings:
         flight = b.flight
+        route = reference_cache.get("routes", flight.route_id) if flight else None
         results.append({
             "id": b.id,
             "booking_reference": b.booking_reference,
@@ -126,15 +260,51 @@ def list_my_bookings(
             "status": b.status,
             "booking_time": b.booking_time,
             "issued_time": b.issued_time,
-            "origin_iata": flight.route.source_airport.iata_code if flight else None,
-            "destination_iata": flight.route.destination_airport.iata_code if flight else None,
+            "payment_deadline": b.payment_deadline,
+            "origin_iata": reference_cache.get("airports", route["source_airport_id"])["iata_code"] if flight else None,
+            "destination_iata": reference_cache.get("airports", route["destination_airport_id"])["iata_code"] if flight else None,
             "flight_number": flight.flight_number if flight else None,
-            "airline_name": flight.airline.name if flight else None,
+            "airline_name": reference_cache.get("airlines", flight.airline_id)["name"] if flight else None,
         })
-    return results
+    return trusted_response(results, headers)
+
+
+@router.get("/export")
+def export_bookings(
+        format: str = Query("ndjson", description="ndjson or json"),
+        after_id: int | None = Query(None, ge=0, description="Resume an interrupted export after this id"),
+        flight_id: int | None = Query(None),
+        status: BookingStatus | None = Query(None),
+        user=Depends(get_admin_user),
+):
+    """Admin export of all bookings, streamed in id order in constant memory"""
+    statement = select(
+        Booking.id,
+        Booking.booking_reference,
+        Booking.ticket_number,
+        Booking.user_id,
+        Booking.flight_id,
+        Booking.seat_number,
+        Booking.passenger_name,
+        Booking.passenger_email,
+        Booking.passenger_phone,
+        Booking.total_amount,
+        Booking.status,
+        Booking.booking_time,
+        Booking.issued_time,
+        Booking.payment_deadline,
+    )
+    if after_id is not None:
+        statement = statement.where(Booking.id > after_id)
+    if flight_id is not None:
+        statement = statement.where(Booking.flight_id == flight_id)
+    if status is not None:
+        statement = statement.where(Booking.status == status)
+    return export_response(statement.order_by(Booking.id), format, "bookings")
 
 
 @router.get("/{booking_id}", response_model=BookingOut)
+@query_budget(2)
 def get_booking(
         booking_id: int,
         db: Session = Depends(get_db),
@@ -152,41 +322,45 @@ def get_booking(
 
 
 @router.post("/with-payment", response_model=BookingWithPaymentOut)
+@query_budget(12)
 async def create_booking_with_payment(  # ← CHANGED to async
     data: BookingWithPaymentCreate,
+    response: Response,
+    _slot = Depends(admit_booking_with_payment),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
     """
-    Create booking and process payment in a single transaction
+    Create booking and process payment in a single request
     
     This is the recommended endpoint for frontend to use.
-    Ensures atomicity: if payment fails, booking is not created.
+    The seat is held (PENDING booking) while the card is charged; if
+    payment fails, the hold is dropped and no booking remains.
+    With the fare_quote from search or the seat map, the quoted fare is
+    charged until the quote expires.
+
+    If the gateway times out the charge may still go through: the booking
+    is created PENDING (holding the seat until its payment deadline) with a
+    pending payment (202), both settled when the gateway answers.
     """
     
     # 1. Validate flight and seat (same as create_booking)
     flight = db.query(Flight).filter(Flight.id == data.flight_id).first()
     if not flight:
         raise HTTPException(status_code=404, detail="Flight not found")
+    if flight.cancelled_at:
+        raise HTTPException(status_code=400, detail="Flight has been cancelled")
     
     existing_booking = db.query(Booking).filter(
         Booking.flight_id == data.flight_id,
         Booking.seat_number == data.seat_number,
+        Booking.status.in_(SEAT_HOLDING_STATUSES),
     ).first()
     
     if existing_booking:
         raise HTTPException(status_code=409, detail=f"Seat {data.seat_number} already booked")
     
-    seat_map = flight.aircraft.seat_map
-    valid_seat_numbers = []
-    if "rows" in seat_map:
-        for row in seat_map["rows"]:
-            if "seats" in row:
-                for seat in row["seats"]:
-                    valid_seat_numbers.append(seat["number"])
-    
-    if data.seat_number not in valid_seat_numbers:
-        raise HTTPException(status_code=400, detail=f"Invalid seat number: {data.seat_number}")
+    fare = check_seat_fare(db, flight, data.seat_number, data.total_amount, data.fare_quote, data.currency)
     
     # 2. Validate card details
     try:
@@ -197,36 +371,14 @@ async def create_booking_with_payment(  # ← CHANGED to async
     except CardValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-    # 3. Process payment BEFORE creating booking
-    gateway = get_payment_gateway()
-    
+    # 3. Hold the seat BEFORE charging: the PENDING booking and payment are
+    # committed first, so a concurrent request for the seat fails on the
+    # seat-holder unique index (409) instead of charging a second card
     booking_ref = generate_booking_reference()
     while db.query(Booking).filter(Booking.booking_reference == booking_ref).first():
         booking_ref = generate_booking_reference()
     
-    payment_result = gateway.charge(
-        amount=float(data.total_amount),
-        currency=data.currency,
-        card_number=data.card_number,
-        card_expiry=data.card_expiry,
-        card_cvv=data.card_cvv,
-        cardholder_name=data.passenger_name,
-        description=f"Flight booking {booking_ref}",
-        metadata={
-            "user_id": current_user.id,
-            "flight_id": data.flight_id,
-            "seat": data.seat_number
-        }
-    )
-    
-    # 4. If payment failed, don't create booking
-    if not payment_result.success:
-        raise HTTPException(
-            status_code=402,
-            detail=f"Payment failed: {payment_result.error_message}"
-        )
-    
-    # 5. Payment succeeded, create booking
+    now = datetime.utcnow()
     booking = Booking(
         booking_reference=booking_ref,
         user_id=current_user.id,
@@ -237,31 +389,116 @@ async def create_booking_with_payment(  # ← CHANGED to async
         passenger_phone=data.passenger_phone,
         passenger_id_number=data.passenger_id_number,
         passenger_id_type=data.passenger_id_type,
-        total_amount=data.total_amount,
-        status=BookingStatus.CONFIRMED,
-        issued_time=datetime.utcnow(),
-        ticket_number=f"{flight.airline.code}-{booking_ref}"
+        total_amount=fare,  # BASE_CURRENCY; the payment holds what was charged
+        status=BookingStatus.PENDING,
+        booking_time=now,
+        payment_deadline=payment_deadline_from(now),
     )
-    
-    db.add(booking)
-    db.flush()  # Get booking.id without committing
-    
-    # 6. Create payment record
     payment = Payment(
-        booking_id=booking.id,
+        booking=booking,
         amount=data.total_amount,
         currency=data.currency,
         payment_method=data.payment_method,
         card_last4=last_4,
         card_brand=card_brand,
-        transaction_id=payment_result.transaction_id,
-        status=PaymentStatus.SUCCESS
+        status=PaymentStatus.PENDING,
     )
+    db.add_all([booking, payment])
+    # Read what the ticket and email need now; the commit expires the
+    # flight, and touching it afterwards would reload it
+    route = reference_cache.get("routes", flight.route_id)
+    airline_code = reference_cache.get("airlines", flight.airline_id)["code"]
+    flight_number = flight.flight_number
+    departure_time = flight.departure_time
+    try:
+        db.flush()
+        booking_id, payment_id = booking.id, payment.id
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Seat {data.seat_number} already booked")
     
-    db.add(payment)
-    db.commit()
+    # 4. Process payment
+    gateway = get_payment_gateway()
+    try:
+        payment_result = await gateway.charge(
+            amount=float(data.total_amount),
+            currency=data.currency,
+            card_number=data.card_number,
+            card_expiry=data.card_expiry,
+            card_cvv=data.card_cvv,
+            cardholder_name=data.passenger_name,
+            description=f"Flight booking {booking_ref}",
+            metadata={
+                "user_id": current_user.id,
+                "flight_id": data.flight_id,
+                "seat": data.seat_number
+            }
+        )
+    except GatewayUnavailable as e:
+        _release_seat(db, booking_id, payment_id, data.flight_id)
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    
+    # 5. If payment failed, the booking is dropped as if never created
+    if not (payment_result.success or payment_result.pending):
+        _release_seat(db, booking_id, payment_id, data.flight_id)
+        raise HTTPException(
+            status_code=402,
+            detail=f"Payment failed: {payment_result.error_message}"
+        )
+    
+    # 6. Payment succeeded: confirm the booking. Conditional, like
+    # process_payment: a booking released meanwhile (flight cancelled) is
+    # not resurrected, and its charge is refunded. A pending payment leaves
+    # the booking PENDING until the charge settles.
+    seat_lost = refunded = False
+    if payment_result.success:
+        confirmed = db.query(Booking).filter(
+            Booking.id == booking_id,
+            Booking.status.in_(SEAT_HOLDING_STATUSES),
+        ).update(
+            {
+                Booking.status: BookingStatus.CONFIRMED,
+                Booking.issued_time: datetime.utcnow(),
+                Booking.ticket_number: f"{airline_code}-{booking_ref}",
+            },
+            synchronize_session=False,
+        )
+        payment_update = {
+            Payment.status: PaymentStatus.SUCCESS,
+            Payment.transaction_id: payment_result.transaction_id,
+        }
+        if not confirmed:
+            seat_lost = True
+            try:
+                refund_result = await gateway.refund(
+                    transaction_id=payment_result.transaction_id,
+                    amount=float(data.total_amount),
+                    idempotency_key=full_refund_key(payment_result.transaction_id),
+                )
+                refunded = refund_result.success
+            except GatewayUnavailable:
+                refunded = False
+            if refunded:
+                payment_update[Payment.status] = PaymentStatus.REFUNDED
+                payment_update[Payment.refund_transaction_id] = refund_result.transaction_id
+                payment_update[Payment.failure_reason] = EXPIRED_BEFORE_PAYMENT
+            else:
+                payment_update[Payment.failure_reason] = f"{EXPIRED_BEFORE_PAYMENT}; automatic refund failed"
+        db.query(Payment).filter(Payment.id == payment_id).update(payment_update, synchronize_session=False)
+        db.commit()
     db.refresh(booking)
-    db.refresh(payment)
+
+    if seat_lost:
+        raise HTTPException(
+            status_code=410,
+            detail="Seat was released before payment completed; "
+                   + ("payment refunded" if refunded else "refund pending, please contact support")
+        )
 
     # Log booking creation
     await log_booking_event(
@@ -270,25 +507,36 @@ async def create_booking_with_payment(  # ← CHANGED to async
         flight_id=data.flight_id,
         seat_id=data.seat_number,
         event_type="created",
-        status="confirmed",
+        status=booking.status.value,
         metadata={
             "booking_reference": booking.booking_reference,
             "total_amount": float(data.total_amount)
         }
     )
 
+    if payment_result.pending:
+        settle_late_charge(payment_id, payment_result.outcome)
+        response.status_code = 202
+        return {
+            "booking": booking,
+            "payment_status": PaymentStatus.PENDING,
+            "payment_id": payment_id,
+            "transaction_id": None
+        }
 
     # Send confirmation email
-    flight = booking.flight
-    route_str = f"{flight.route.source_airport.city} → {flight.route.destination_airport.city}"
+    route_str = (
+        f"{reference_cache.get('airports', route['source_airport_id'])['city']} → "
+        f"{reference_cache.get('airports', route['destination_airport_id'])['city']}"
+    )
     await send_booking_confirmation(
         to_email=data.passenger_email,
         booking_reference=booking.booking_reference,
         ticket_number=booking.ticket_number,
         passenger_name=data.passenger_name,
-        flight_number=flight.flight_number,
+        flight_number=flight_number,
         route=route_str,
-        departure_time=flight.departure_time.strftime("%B %d, %Y at %H:%M"),
+        departure_time=departure_time.strftime("%B %d, %Y at %H:%M"),
         seat_number=data.seat_number,
         total_amount=float(data.total_amount),
         currency=data.currency
@@ -296,7 +544,7 @@ async def create_booking_with_payment(  # ← CHANGED to async
     
     return {
         "booking": booking,
-        "payment_status": payment.status,
-        "payment_id": payment.id,
-        "transaction_id": payment.transaction_id
+        "payment_status": PaymentStatus.SUCCESS,
+        "payment_id": payment_id,
+        "transaction_id": payment_result.transaction_id
     }
\ No newline at end of file
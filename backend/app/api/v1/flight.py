@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+import numpy as np
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
 from app.api.deps import get_db
 from app.api.deps_auth import get_admin_user
 from app.models.flight import Flight
-from app.models.route import Route
-from app.models.airport import Airport
-from app.models.airline import Airline
-from app.models.aircraft import Aircraft
-from app.models.booking import Booking
 from app.schemas.flight import FlightCreate, FlightUpdate, FlightOut, FlightSearchResult
+from app.services.jobs import job_registry
+from app.services.reference_cache import reference_cache
+from app.services.seat_map_cache import seat_map_cache
+from app.services.pricing import fare_engine, CABINS
+from app.services.currency import currency_rates, UnsupportedCurrency
+from app.core.config import BASE_CURRENCY
+from app.utils.streaming import export_response, next_page_headers
+from app.utils.query_stats import query_budget
+from app.utils.fast_json import trusted_response
+from app.services.flight_cancellation import cancel_flight_refunds
 
 router = APIRouter(prefix="/flights", tags=["Flights"])
 
@@ -45,6 +52,8 @@ def update_flight(
 
     db.commit()
     db.refresh(flight)
+    # Base prices or aircraft may have changed
+    seat_map_cache.invalidate([flight_id])
     return flight
 
 
@@ -60,48 +69,131 @@ def delete_flight(
 
     db.delete(flight)
     db.commit()
+    seat_map_cache.invalidate([flight_id])
     return {"message": "Flight deleted"}
 
 
+@router.post("/{flight_id}/cancel", status_code=status.HTTP_202_ACCEPTED)
+async def cancel_flight(
+        flight_id: int,
+        db: Session = Depends(get_db),
+        user=Depends(get_admin_user),
+):
+    """
+    Cancel a flight and refund every booking on it
+
+    The flight is closed for booking immediately; refunds run as a background
+    job whose progress is available at GET /jobs/{job_id}. Calling this again
+    for an already-cancelled flight retries any refunds that failed.
+    """
+    flight = db.query(Flight).filter(Flight.id == flight_id).first()
+    if not flight:
+        raise HTTPException(status_code=404, detail="Flight not found")
+
+    active = job_registry.find_active("flight_cancellation", flight_id=flight_id)
+    if active:
+        return active.to_dict()
+
+    if flight.cancelled_at is None:
+        flight.cancelled_at = datetime.utcnow()
+        db.commit()
+
+    job = job_registry.create("flight_cancellation", flight_id=flight_id)
+    job_registry.start(job, lambda job: cancel_flight_refunds(job, flight_id))
+    return job.to_dict()
+
+
+@router.get("/", response_model=list[FlightOut])
+def list_flights(
+        response: Response,
+        after_id: int | None = Query(None, ge=0, description="Return flights after this id (keyset cursor)"),
+        limit: int = Query(100, ge=1, le=1000),
+        db: Session = Depends(get_db),
+        user=Depends(get_admin_user),
+):
+    """Page through all flights in id order; follow X-Next-After-Id for the next page"""
+    query = db.query(Flight)
+    if after_id is not None:
+        query = query.filter(Flight.id > after_id)
+    flights = query.order_by(Flight.id).limit(limit).all()
+    response.headers.update(next_page_headers(flights, limit))
+    return flights
+
+
+@router.get("/export")
+def export_flights(
+        format: str = Query("ndjson", description="ndjson or json"),
+        after_id: int | None = Query(None, ge=0, description="Resume an interrupted export after this id"),
+        departure_from: datetime | None = Query(None),
+        departure_to: datetime | None = Query(None),
+        user=Depends(get_admin_user),
+):
+    """Admin export of all flights, streamed in id order in constant memory"""
+    statement = select(
+        Flight.id,
+        Flight.flight_number,
+        Flight.route_id,
+        Flight.airline_id,
+        Flight.aircraft_id,
+        Flight.departure_time,
+        Flight.arrival_time,
+        Flight.base_price_economy,
+        Flight.base_price_business,
+        Flight.base_price_first,
+        Flight.cancelled_at,
+    )
+    if after_id is not None:
+        statement = statement.where(Flight.id > after_id)
+    if departure_from is not None:
+        statement = statement.where(Flight.departure_time >= departure_from)
+    if departure_to is not None:
+        statement = statement.where(Flight.departure_time < departure_to)
+    return export_response(statement.order_by(Flight.id), format, "flights")
+
+
 # PUBLIC ENDPOINTS (Search)
 @router.get("/search", response_model=list[FlightSearchResult])
+@query_budget(2)
 def search_flights(
         origin_iata: str = Query(..., description="Origin airport IATA code (e.g., JFK)"),
         destination_iata: str = Query(..., description="Destination airport IATA code (e.g., LAX)"),
         date: str = Query(..., description="Departure date (YYYY-MM-DD)"),
         time_window: str | None = Query(None, description="morning/afternoon/evening/night"),
-        max_price: float | None = Query(None, description="Maximum price filter"),
+        max_price: float | None = Query(None, description="Maximum economy fare, in `currency`"),
+        currency: str = Query(BASE_CURRENCY, pattern="^[A-Z]{3}$", description="Currency to price fares in"),
         db: Session = Depends(get_db),
 ):
+    rates = currency_rates.snapshot()
+    try:
+        rates.rate(currency)
+    except UnsupportedCurrency as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Parse date
     try:
         search_date = datetime.strptime(date, "%Y-%m-%d")
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
-    # Get airports
-    origin = db.query(Airport).filter(Airport.iata_code == origin_iata.upper()).first()
-    destination = db.query(Airport).filter(Airport.iata_code == destination_iata.upper()).first()
+    # Get airports (reference data, served from cache)
+    origin = reference_cache.airport_by_iata(origin_iata)
+    destination = reference_cache.airport_by_iata(destination_iata)
 
     if not origin or not destination:
         raise HTTPException(status_code=404, detail="Airport not found")
 
     # Get routes matching origin/destination
-    routes = db.query(Route).filter(
-        Route.source_airport_id == origin.id,
-        Route.destination_airport_id == destination.id
-    ).all()
+    route_ids = reference_cache.route_ids_between(origin["id"], destination["id"])
 
-    if not routes:
+    if not route_ids:
         return []  # No routes available
 
-    route_ids = [r.id for r in routes]
-
     # Build flight query
     query = db.query(Flight).filter(
         Flight.route_id.in_(route_ids),
         Flight.departure_time >= search_date,
         Flight.departure_time < search_date + timedelta(days=1),
+        Flight.cancelled_at.is_(None),
     )
 
     # Apply time window filter
@@ -126,18 +218,30 @@ def search_flights(
             Flight.departure_time < end
         )
 
-    # Apply price filter
-    if max_price:
-        query = query.filter(Flight.base_price_economy <= max_price)
-
     flights = query.all()
 
+    # Fares and booked seats of all result flights: cached per flight, the
+    # rest priced in one batch after one grouped count query
+    quotes = fare_engine.quote(db, flights) if flights else {}
+
+    # All fares of the page converted in one pass
+    fare_rows = np.array(
+        [[quotes[flight.id].fares[cabin] for cabin in CABINS] for flight in flights], dtype=float,
+    ).reshape(-1, len(CABINS))
+    if currency != rates.base:
+        fare_rows = rates.convert_many(fare_rows, currency)
+
     # Build results with joined data
     results = []
-    for flight in flights:
-        # Count booked seats
-        booked_count = db.query(Booking).filter(Booking.flight_id == flight.id).count()
-        available_seats = flight.aircraft.total_capacity - booked_count
+    for flight, row in zip(flights, fare_rows.tolist()):
+        quote = quotes[flight.id]
+        fares = dict(zip(CABINS, row))
+        # Fares can fall below the base price, so this can't be a SQL filter
+        if max_price and fares["economy"] > max_price:
+            continue
+        airline = reference_cache.get("airlines", flight.airline_id)
+        aircraft = reference_cache.get("aircraft", flight.aircraft_id)
+        available_seats = aircraft["total_capacity"] - quote.booked
 
         results.append({
             "id": flight.id,
@@ -147,51 +251,35 @@ def search_flights(
             "base_price_economy": float(flight.base_price_economy),
             "base_price_business": float(flight.base_price_business) if flight.base_price_business else None,
             "base_price_first": float(flight.base_price_first) if flight.base_price_first else None,
+            "fare_economy": fares["economy"],
+            "fare_business": fares["business"] if flight.base_price_business else None,
+            "fare_first": fares["first"] if flight.base_price_first else None,
+            "currency": currency,
+            "fare_quote": quote.quote_token(rates.version),
             "available_seats": available_seats,
-            "airline_name": flight.airline.name,
-            "airline_code": flight.airline.code,
-            "aircraft_model": flight.aircraft.model,
-            "origin_city": origin.city,
-            "origin_iata": origin.iata_code,
-            "destination_city": destination.city,
-            "destination_iata": destination.iata_code,
+            "airline_name": airline["name"],
+            "airline_code": airline["code"],
+            "aircraft_model": aircraft["model"],
+            "origin_city": origin["city"],
+            "origin_iata": origin["iata_code"],
+            "destination_city": destination["city"],
+            "destination_iata": destination["iata_code"],
         })
 
-    return results
+    return trusted_response(results)
 
 
 @router.get("/{flight_id}/seats")
+@query_budget(2)
 def get_seat_map(
         flight_id: int,
+        request: Request,
         db: Session = Depends(get_db),
 ):
-    """Get seat map with availability for a specific flight"""
-    flight = db.query(Flight).filter(Flight.id == flight_id).first()
-
-    if not flight:
-        raise HTTPException(status_code=404, detail="Flight not found")
+    """
+    Get seat map with availability for a specific flight
 
-    # Get booked seats
-    booked_seats = db.query(Booking.seat_number).filter(
-        Booking.flight_id == flight_id
-    ).all()
-    booked_seat_numbers = [seat[0] for seat in booked_seats]
-
-    # Get seat map from aircraft
-    seat_map = flight.aircraft.seat_map
-
-    # Mark unavailable seats
-    if "rows" in seat_map:
-        for row in seat_map["rows"]:
-            if "seats" in row:
-                for seat in row["seats"]:
-                    seat["available"] = seat["number"] not in booked_seat_numbers
-
-    return {
-        "flight_id": flight_id,
-        "flight_number": flight.flight_number,
-        "aircraft_model": flight.aircraft.model,
-        "total_capacity": flight.aircraft.total_capacity,
-        "booked_seats": len(booked_seat_numbers),
-        "seat_map": seat_map,
-    }
\ No newline at end of file
+    Served pre-serialized (gzip/brotli when accepted) with a strong ETag;
+    send it back in If-None-Match to get a 304 while the map is unchanged.
+    """
+    return seat_map_cache.response(request, db, flight_id)
\ No newline at end of file
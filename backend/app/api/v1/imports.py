@@ -0,0 +1,34 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+
+from app.api.deps_auth import get_admin_user
+from app.schemas.bulk_import import ImportResult
+from app.services.bulk_import import run_import
+from app.utils.streaming import import_format
+
+router = APIRouter(prefix="/imports", tags=["Imports"])
+
+
+@router.post("/{kind}", response_model=ImportResult)
+async def bulk_import(
+        kind: Literal["airports", "routes", "flights"],
+        request: Request,
+        format: str | None = Query(None, description="csv or ndjson (default: from Content-Type)"),
+        user=Depends(get_admin_user),
+):
+    """
+    Upsert airports, routes or flights from a streamed CSV (header row
+    first) or NDJSON request body
+
+    Columns: airports name, city, country, iata_code; routes origin_iata,
+    destination_iata, distance_km; flights flight_number, airline_code,
+    origin_iata, destination_iata, aircraft_id, departure_time,
+    arrival_time, base_price_economy, base_price_business,
+    base_price_first. Existing rows (same IATA code, airport pair, or
+    flight number and departure time) are updated. Batches are committed
+    as they are read, so rows before an error are kept; failed rows are
+    reported by line number.
+    """
+    fmt = import_format(format, request.headers.get("content-type", ""))
+    return await run_import(kind, request.stream(), fmt)
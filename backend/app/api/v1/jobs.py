@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.deps_auth import get_admin_user
+from app.services.jobs import job_registry
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/")
+def list_jobs(
+        kind: str | None = None,
+        user=Depends(get_admin_user),
+):
+    """Recent background jobs on this worker, newest first"""
+    return [job.to_dict() for job in job_registry.list(kind)]
+
+
+@router.get("/{job_id}")
+def get_job(
+        job_id: str,
+        user=Depends(get_admin_user),
+):
+    """Status and progress of a background job"""
+    job = job_registry.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from datetime import datetime
+from decimal import Decimal
 
 from app.api.deps import get_db
-from app.api.deps_auth import get_current_user
-from app.models.booking import Booking, BookingStatus
+from app.api.deps_auth import get_current_user, get_admin_user
+from app.models.booking import Booking, BookingStatus, SEAT_HOLDING_STATUSES
 from app.models.payment import Payment, PaymentStatus
 from app.schemas.payment import PaymentCreate, PaymentOut
 from app.utils.payment_validator import (
@@ -14,17 +15,27 @@ from app.utils.payment_validator import (
     parse_expiry,
     CardValidationError
 )
-from app.utils.payment_gateway import get_payment_gateway
+from app.utils.payment_gateway import get_payment_gateway, full_refund_key
+from app.utils.gateway_resilience import GatewayUnavailable
 from app.utils.websocket_manager import manager
 from app.services.logging_service import log_payment_event
 from app.services.email_service import send_cancellation_email
+from app.services.jobs import job_registry
+from app.services.pending_payments import settle_late_charge, EXPIRED_BEFORE_PAYMENT
+from app.services.reconciliation import reconcile_payments
+from app.services.reference_cache import reference_cache
+from app.services.currency import currency_rates, UnsupportedCurrency
+from app.core.config import RECONCILIATION_PAGE_SIZE
+from app.utils.query_stats import query_budget
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
 
 @router.post("/", response_model=PaymentOut)
+@query_budget(7)
 async def process_payment(
         data: PaymentCreate,
+        response: Response,
         db: Session = Depends(get_db),
         current_user=Depends(get_current_user),
 ):
@@ -35,8 +46,11 @@ async def process_payment(
     1. Validate booking exists and belongs to user
     2. Validate card details
     3. Process payment via gateway
-    4. Update booking status
+    4. Confirm booking (PENDING -> CONFIRMED) and issue ticket
     5. Create payment record
+
+    If the gateway times out the charge may still go through: the payment
+    is recorded as pending (202) and settled when the gateway answers.
     """
 
     # 1. Validate booking
@@ -48,20 +62,38 @@ async def process_payment(
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
 
-    # Check if already paid
+    # Unpaid bookings lose their seat once the payment deadline passes
+    if booking.status == BookingStatus.PENDING and booking.payment_deadline \
+            and booking.payment_deadline < datetime.utcnow():
+        booking.status = BookingStatus.EXPIRED
+        db.commit()
+
+    if booking.status == BookingStatus.EXPIRED:
+        raise HTTPException(status_code=410, detail="Booking payment window has expired")
+
+    if booking.status == BookingStatus.CANCELLED:
+        raise HTTPException(status_code=400, detail="Booking has been cancelled")
+
+    # Check if already paid (or a charge is still in flight)
     existing_payment = db.query(Payment).filter(
         Payment.booking_id == data.booking_id,
-        Payment.status == PaymentStatus.SUCCESS
+        Payment.status.in_([PaymentStatus.SUCCESS, PaymentStatus.PENDING])
     ).first()
 
     if existing_payment:
+        if existing_payment.status == PaymentStatus.PENDING:
+            raise HTTPException(status_code=409, detail="A payment for this booking is still pending")
         raise HTTPException(status_code=400, detail="Booking already paid")
 
-    # Verify amount matches booking
-    if abs(float(data.amount) - float(booking.total_amount)) > 0.01:
+    # Verify amount matches booking (held in BASE_CURRENCY), in the payment currency
+    try:
+        expected = currency_rates.convert(booking.total_amount, data.currency)
+    except UnsupportedCurrency as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if Decimal(str(data.amount)) != expected:
         raise HTTPException(
             status_code=400,
-            detail=f"Payment amount ({data.amount}) does not match booking total ({booking.total_amount})"
+            detail=f"Payment amount ({data.amount} {data.currency}) does not match booking total ({expected} {data.currency})"
         )
 
     # 2. Validate card details
@@ -82,23 +114,57 @@ async def process_payment(
     # 3. Process payment via gateway
     gateway = get_payment_gateway()
 
-    payment_result = gateway.charge(
-        amount=float(data.amount),
-        currency=data.currency,
-        card_number=data.card_number,
-        card_expiry=data.card_expiry,
-        card_cvv=data.card_cvv,
-        cardholder_name=booking.passenger_name,
-        description=f"Flight booking {booking.booking_reference}",
-        metadata={
-            "booking_id": booking.id,
-            "booking_reference": booking.booking_reference,
-            "user_id": current_user.id,
-            "flight_id": booking.flight_id
-        }
-    )
+    try:
+        payment_result = await gateway.charge(
+            amount=float(data.amount),
+            currency=data.currency,
+            card_number=data.card_number,
+            card_expiry=data.card_expiry,
+            card_cvv=data.card_cvv,
+            cardholder_name=booking.passenger_name,
+            description=f"Flight booking {booking.booking_reference}",
+            metadata={
+                "booking_id": booking.id,
+                "booking_reference": booking.booking_reference,
+                "user_id": current_user.id,
+                "flight_id": booking.flight_id
+            }
+        )
+    except GatewayUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
-    # 4. Create payment record
+    # 4. Confirm the booking. Conditional on it still holding the seat, so a
+    # booking the expiry sweeper released meanwhile is not resurrected.
+    booking_expired = False
+    if payment_result.success:
+        confirmed = db.query(Booking).filter(
+            Booking.id == booking.id,
+            Booking.status.in_(SEAT_HOLDING_STATUSES),
+        ).update(
+            {
+                Booking.status: BookingStatus.CONFIRMED,
+                Booking.issued_time: datetime.utcnow(),
+                Booking.ticket_number: f"{reference_cache.get('airlines', booking.flight.airline_id)['code']}-{booking.booking_reference}",
+            },
+            synchronize_session=False,
+        )
+        if not confirmed:
+            booking_expired = True
+            try:
+                refund_result = await gateway.refund(
+                    transaction_id=payment_result.transaction_id,
+                    amount=float(data.amount),
+                    idempotency_key=full_refund_key(payment_result.transaction_id),
+                )
+                refunded = refund_result.success
+            except GatewayUnavailable:
+                refunded = False
+
+    # 5. Create payment record
     payment = Payment(
         booking_id=booking.id,
         amount=data.amount,
@@ -107,9 +173,17 @@ async def process_payment(
         card_last4=last_4,
         card_brand=card_brand,
         transaction_id=payment_result.transaction_id,
-        status=PaymentStatus.SUCCESS if payment_result.success else PaymentStatus.FAILED,
-        failure_reason=payment_result.error_message if not payment_result.success else None
+        status=PaymentStatus.SUCCESS if payment_result.success
+        else PaymentStatus.PENDING if payment_result.pending else PaymentStatus.FAILED,
+        failure_reason=payment_result.error_message if not (payment_result.success or payment_result.pending) else None
     )
+    if booking_expired:
+        if refunded:
+            payment.status = PaymentStatus.REFUNDED
+            payment.refund_transaction_id = refund_result.transaction_id
+            payment.failure_reason = EXPIRED_BEFORE_PAYMENT
+        else:
+            payment.failure_reason = f"{EXPIRED_BEFORE_PAYMENT}; automatic refund failed"
 
     db.add(payment)
 
@@ -118,7 +192,7 @@ async def process_payment(
         payment_id=payment.id,
         booking_id=booking.id,
         amount=float(data.amount),
-        event_type="captured" if payment_result.success else "failed",
+        event_type="captured" if payment_result.success else "pending" if payment_result.pending else "failed",
         payment_status=payment.status.value,
         reason=payment_result.error_message if not payment_result.success else None,
         metadata={
@@ -131,6 +205,18 @@ async def process_payment(
     db.commit()
     db.refresh(payment)
 
+    if payment_result.pending:
+        settle_late_charge(payment.id, payment_result.outcome)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return payment
+
+    if booking_expired:
+        raise HTTPException(
+            status_code=410,
+            detail="Booking payment window has expired; "
+                   + ("payment refunded" if refunded else "refund pending, please contact support")
+        )
+
     # If payment failed, raise exception with details
     if not payment_result.success:
         raise HTTPException(
@@ -141,6 +227,26 @@ async def process_payment(
     return payment
 
 
+@router.post("/reconciliation", status_code=status.HTTP_202_ACCEPTED)
+async def start_reconciliation(
+        page_size: int = Query(RECONCILIATION_PAGE_SIZE, ge=100, le=50000),
+        user=Depends(get_admin_user),
+):
+    """
+    Start a reconciliation run comparing payments with gateway records
+
+    Progress is available at GET /jobs/{job_id}; discrepancies are written to
+    the reconciliation_reports collection with run_id = job id.
+    """
+    active = job_registry.find_active("payment_reconciliation")
+    if active:
+        return active.to_dict()
+
+    job = job_registry.create("payment_reconciliation", page_size=page_size)
+    job_registry.start(job, lambda job: reconcile_payments(job, page_size=page_size))
+    return job.to_dict()
+
+
 @router.get("/{booking_id}", response_model=list[PaymentOut])
 def get_booking_payments(
         booking_id: int,
@@ -194,17 +300,25 @@ async def refund_payment(  # ← CHANGED to async
     
     # Process refund via gateway
     gateway = get_payment_gateway()
-    refund_result = gateway.refund(
-        transaction_id=payment.transaction_id,
-        amount=float(payment.amount)
-    )
+    try:
+        refund_result = await gateway.refund(
+            transaction_id=payment.transaction_id,
+            amount=float(payment.amount),
+            idempotency_key=full_refund_key(payment.transaction_id),
+        )
+    except GatewayUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     
     if not refund_result.success:
         raise HTTPException(status_code=500, detail=f"Refund failed: {refund_result.error_message}")
     
     # Update payment status
     payment.status = PaymentStatus.REFUNDED
-    payment.transaction_id = refund_result.transaction_id  # Store refund transaction ID
+    payment.refund_transaction_id = refund_result.transaction_id  # Keep original transaction_id for reconciliation
     
     # Update booking status
     booking.status = BookingStatus.CANCELLED
@@ -226,6 +340,18 @@ async def refund_payment(  # ← CHANGED to async
         metadata={"refund_transaction_id": refund_result.transaction_id}
     )
 
+    # Seat is free again
+    await manager.broadcast_to_flight(
+        flight_id=flight_id,
+        message={
+            "type": "seat_released",
+            "flight_id": flight_id,
+            "seat_numbers": [seat_number],
+            "reason": "cancelled",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    )
+
     # Send cancellation email
     await send_cancellation_email(
         to_email=booking.passenger_email,
@@ -0,0 +1,74 @@
+import time
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps_auth import get_admin_user
+from app.schemas.profiling import ProfilingArm, ProfileTokenRequest
+from app.utils.profiling import profiler, sign_profile_token
+
+router = APIRouter(prefix="/profiling", tags=["Profiling"])
+
+
+@router.get("/")
+def profiling_status(
+        user=Depends(get_admin_user),
+):
+    """Armed pattern, requests left and what has been collected (this worker)"""
+    return profiler.status()
+
+
+@router.post("/arm")
+def arm_profiling(
+        body: ProfilingArm,
+        request: Request,
+        user=Depends(get_admin_user),
+):
+    """Profile the next N requests of the routes matching a pattern"""
+    routes = profiler.arm(request.app.routes, body.route, body.requests, body.mode)
+    if not routes:
+        raise HTTPException(status_code=404, detail=f"No route matches '{body.route}'")
+    print(f"🔬 Profiling armed by {user.username}: {body.mode} x{body.requests} on {', '.join(routes)}")
+    return profiler.status()
+
+
+@router.delete("/arm")
+def disarm_profiling(
+        user=Depends(get_admin_user),
+):
+    profiler.disarm()
+    return profiler.status()
+
+
+@router.post("/token")
+def create_profile_token(
+        body: ProfileTokenRequest,
+        user=Depends(get_admin_user),
+):
+    """Signed X-Profile header value: profiles any request carrying it until it expires"""
+    if not profiler.header_enabled:
+        raise HTTPException(status_code=400, detail="X-Profile headers are disabled (PROFILING_HEADER_ENABLED)")
+    expires_at = int(time.time()) + body.ttl_seconds
+    return {"header": "X-Profile", "value": sign_profile_token(body.mode, expires_at), "expires_at": expires_at}
+
+
+@router.get("/collapsed", response_class=PlainTextResponse)
+def collapsed_stacks(
+        mode: Literal["sampler", "cprofile"] = "sampler",
+        user=Depends(get_admin_user),
+):
+    """
+    Aggregated profile in collapsed-stack format, one "frame;frame;... count"
+    line per stack: sampler counts are samples, cprofile counts microseconds.
+    Feed to flamegraph.pl, inferno or speedscope.
+    """
+    return PlainTextResponse(profiler.collapsed(mode))
+
+
+@router.delete("/")
+def reset_profiles(
+        user=Depends(get_admin_user),
+):
+    profiler.reset()
+    return profiler.status()
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
+from app.services.reference_cache import reference_cache
 from app.api.deps_auth import get_admin_user
 from app.models.route import Route
 from app.schemas.route import RouteCreate, RouteUpdate, RouteOut
@@ -22,12 +23,17 @@ def create_route(
     route = Route(**data.model_dump())
     db.add(route)
     db.commit()
+    reference_cache.invalidate("routes")
     db.refresh(route)
     return route
 
 @router.get("/", response_model=list[RouteOut])
-def list_routes(db: Session = Depends(get_db)):
-    return db.query(Route).all()
+def list_routes(
+    request: Request,
+    after_id: int | None = Query(None, ge=0, description="Return rows after this id (keyset cursor)"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size; omit for the full list"),
+):
+    return reference_cache.list_response(request, "routes", after_id, limit)
 
 @router.get("/{route_id}", response_model=RouteOut)
 def get_route(route_id: int, db: Session = Depends(get_db)):
@@ -49,6 +55,7 @@ def update_route(
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(route, key, value)
     db.commit()
+    reference_cache.invalidate("routes")
     db.refresh(route)
     return route
 
@@ -63,4 +70,5 @@ def delete_route(
         raise HTTPException(status_code=404, detail="Route not found")
     db.delete(route)
     db.commit()
+    reference_cache.invalidate("routes")
     return {"message": "Route deleted"}
\ No newline at end of file
@@ -0,0 +1,161 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+
+from app.api.deps import get_db
+from app.api.deps_auth import get_admin_user
+from app.core.config import SCHEDULE_DEFAULT_HORIZON_DAYS, SCHEDULE_MAX_HORIZON_DAYS
+from app.models.flight import Flight
+from app.models.flight_schedule import FlightSchedule
+from app.schemas.flight_schedule import (
+    FlightScheduleCreate,
+    FlightScheduleUpdate,
+    FlightScheduleOut,
+    MaterializeResult,
+)
+from app.services.flight_schedules import materialize
+from app.services.reference_cache import reference_cache
+from app.utils.streaming import next_page_headers
+
+router = APIRouter(prefix="/schedules", tags=["Schedules"])
+
+
+def _check_references(values: dict):
+    for kind, key in (("routes", "route_id"), ("airlines", "airline_id"), ("aircraft", "aircraft_id")):
+        if key in values and reference_cache.get(kind, values[key]) is None:
+            raise HTTPException(status_code=400, detail=f"Unknown {key}: {values[key]}")
+
+
+@router.post("/", response_model=FlightScheduleOut)
+def create_schedule(
+        data: FlightScheduleCreate,
+        db: Session = Depends(get_db),
+        user=Depends(get_admin_user),
+):
+    values = data.model_dump()
+    _check_references(values)
+    schedule = FlightSchedule(**values)
+    db.add(schedule)
+    db.commit()
+    db.refresh(schedule)
+    return schedule
+
+
+@router.get("/", response_model=list[FlightScheduleOut])
+def list_schedules(
+        response: Response,
+        after_id: int | None = Query(None, ge=0, description="Return schedules after this id (keyset cursor)"),
+        limit: int = Query(100, ge=1, le=1000),
+        route_id: int | None = None,
+        db: Session = Depends(get_db),
+        user=Depends(get_admin_user),
+):
+    """Page through schedules in id order; follow X-Next-After-Id for the next page"""
+    query = db.query(FlightSchedule)
+    if route_id is not None:
+        query = query.filter(FlightSchedule.route_id == route_id)
+    if after_id is not None:
+        query = query.filter(FlightSchedule.id > after_id)
+    schedules = query.order_by(FlightSchedule.id).limit(limit).all()
+    response.headers.update(next_page_headers(schedules, limit))
+    return schedules
+
+
+@router.post("/materialize", response_model=MaterializeResult)
+def materialize_schedules(
+        start_date: date | None = Query(None, description="First day of the horizon (default: today)"),
+        days: int = Query(SCHEDULE_DEFAULT_HORIZON_DAYS, ge=1, le=SCHEDULE_MAX_HORIZON_DAYS),
+        schedule_id: list[int] | None = Query(None, description="Only these schedules (default: all)"),
+        diff: bool = Query(False, description="Report the changes without writing them"),
+        db: Session = Depends(get_db),
+        user=Depends(get_admin_user),
+):
+    """
+    Generate the flights of schedules for the days [start_date, start_date + days)
+
+    Idempotent: existing flights are matched by (schedule, departure time),
+    so a re-run only writes what changed since. Departures in the past are
+    never touched.
+    """
+    start_date = start_date or date.today()
+    end = datetime.combine(start_date + timedelta(days=days), datetime.min.time())
+    start = max(datetime.combine(start_date, datetime.min.time()), datetime.utcnow().replace(microsecond=0))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="The horizon is entirely in the past")
+
+    query = db.query(FlightSchedule)
+    if schedule_id:
+        query = query.filter(FlightSchedule.id.in_(schedule_id))
+    schedules = query.order_by(FlightSchedule.id).all()
+    if schedule_id and len(schedules) != len(set(schedule_id)):
+        missing = sorted(set(schedule_id) - {schedule.id for schedule in schedules})
+        raise HTTPException(status_code=404, detail=f"Schedules not found: {missing}")
+
+    try:
+        result = materialize(db, schedules, start, end, diff=diff)
+    except IntegrityError:
+        # Another run created the same flights first
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Schedules are being materialized concurrently; retry")
+    print(f"✅ Materialized {len(schedules)} schedules ({'diff' if diff else 'applied'}): "
+          f"{result['created']} created, {result['updated']} updated, {result['deleted']} deleted, "
+          f"{result['conflicts']} conflicts in {result['elapsed_ms']:.0f} ms")
+    return result
+
+
+@router.get("/{schedule_id}", response_model=FlightScheduleOut)
+def get_schedule(
+        schedule_id: int,
+        db: Session = Depends(get_db),
+        user=Depends(get_admin_user),
+):
+    schedule = db.query(FlightSchedule).filter(FlightSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return schedule
+
+
+@router.put("/{schedule_id}", response_model=FlightScheduleOut)
+def update_schedule(
+        schedule_id: int,
+        data: FlightScheduleUpdate,
+        db: Session = Depends(get_db),
+        user=Depends(get_admin_user),
+):
+    """Change a schedule; its flights follow on the next materialize (diff=true to preview)"""
+    schedule = db.query(FlightSchedule).filter(FlightSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    values = data.model_dump(exclude_unset=True)
+    _check_references(values)
+    for key, value in values.items():
+        setattr(schedule, key, value)
+    if schedule.effective_to is not None and schedule.effective_to < schedule.effective_from:
+        raise HTTPException(status_code=400, detail="effective_to is before effective_from")
+
+    db.commit()
+    db.refresh(schedule)
+    return schedule
+
+
+@router.delete("/{schedule_id}")
+def delete_schedule(
+        schedule_id: int,
+        db: Session = Depends(get_db),
+        user=Depends(get_admin_user),
+):
+    """
+    Delete a schedule; flights already generated from it are kept as
+    one-off flights (set effective_to and materialize first to drop them)
+    """
+    schedule = db.query(FlightSchedule).filter(FlightSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    db.execute(update(Flight).where(Flight.schedule_id == schedule_id).values(schedule_id=None))
+    db.delete(schedule)
+    db.commit()
+    return {"message": "Schedule deleted"}
@@ -11,7 +11,11 @@ async def websocket_flight_updates(websocket: WebSocket, flight_id: int):
     
     Clients subscribe to a specific flight and receive:
     - seat_booked: When a seat is booked
-    - seat_released: When a booking is cancelled
+    - seat_released: When bookings are cancelled or expire unpaid
+      (seat_numbers lists every seat freed, one message per sweep)
+    - flight_cancelled: The flight was cancelled and its bookings refunded
+    - queue_update: Booking queue length and per-token positions during
+      flash sales (see X-Queue-Token on the booking endpoints)
     """
     await manager.connect(websocket, flight_id)
     
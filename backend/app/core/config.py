@@ -22,3 +22,121 @@ SMTP_USER = os.getenv("SMTP_USER", "")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
 SMTP_FROM_EMAIL = os.getenv("SMTP_FROM_EMAIL", "noreply@eticket.com")
 SMTP_FROM_NAME = os.getenv("SMTP_FROM_NAME", "E-Ticketing System")
+
+# Database connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+# Booking admission control (per flight)
+BOOKING_ADMISSION_CONCURRENCY = int(os.getenv("BOOKING_ADMISSION_CONCURRENCY", "4"))
+BOOKING_ADMISSION_QUEUE_SIZE = int(os.getenv("BOOKING_ADMISSION_QUEUE_SIZE", "200"))
+BOOKING_ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("BOOKING_ADMISSION_MAX_WAIT_SECONDS", "20"))
+BOOKING_ADMISSION_BROADCAST_INTERVAL = float(os.getenv("BOOKING_ADMISSION_BROADCAST_INTERVAL", "0.5"))
+
+# Pending booking lifecycle
+BOOKING_PAYMENT_WINDOW_MINUTES = int(os.getenv("BOOKING_PAYMENT_WINDOW_MINUTES", "15"))
+BOOKING_EXPIRY_SWEEP_INTERVAL_SECONDS = float(os.getenv("BOOKING_EXPIRY_SWEEP_INTERVAL_SECONDS", "30"))
+BOOKING_EXPIRY_BATCH_SIZE = int(os.getenv("BOOKING_EXPIRY_BATCH_SIZE", "500"))
+
+# Payment gateway resilience
+PAYMENT_GATEWAY_TIMEOUT_SECONDS = float(os.getenv("PAYMENT_GATEWAY_TIMEOUT_SECONDS", "5"))
+PAYMENT_GATEWAY_MAX_CONCURRENCY = int(os.getenv("PAYMENT_GATEWAY_MAX_CONCURRENCY", "32"))
+PAYMENT_GATEWAY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PAYMENT_GATEWAY_QUEUE_TIMEOUT_SECONDS", "2"))
+PAYMENT_GATEWAY_BREAKER_THRESHOLD = int(os.getenv("PAYMENT_GATEWAY_BREAKER_THRESHOLD", "5"))
+PAYMENT_GATEWAY_BREAKER_RESET_SECONDS = float(os.getenv("PAYMENT_GATEWAY_BREAKER_RESET_SECONDS", "30"))
+PAYMENT_GATEWAY_MAX_RETRIES = int(os.getenv("PAYMENT_GATEWAY_MAX_RETRIES", "2"))
+PAYMENT_GATEWAY_HEDGE_AFTER_SECONDS = float(os.getenv("PAYMENT_GATEWAY_HEDGE_AFTER_SECONDS", "1.5"))
+
+# Mock gateway fault injection (for local benchmarking)
+MOCK_GATEWAY_LATENCY_MS = float(os.getenv("MOCK_GATEWAY_LATENCY_MS", "500"))
+MOCK_GATEWAY_JITTER_MS = float(os.getenv("MOCK_GATEWAY_JITTER_MS", "0"))
+MOCK_GATEWAY_FAILURE_RATE = float(os.getenv("MOCK_GATEWAY_FAILURE_RATE", "0"))
+MOCK_GATEWAY_HANG_RATE = float(os.getenv("MOCK_GATEWAY_HANG_RATE", "0"))
+MOCK_GATEWAY_HANG_SECONDS = float(os.getenv("MOCK_GATEWAY_HANG_SECONDS", "30"))
+MOCK_GATEWAY_LEDGER_SIZE = int(os.getenv("MOCK_GATEWAY_LEDGER_SIZE", "100000"))
+
+# Background email delivery
+EMAIL_QUEUE_MAX_SIZE = int(os.getenv("EMAIL_QUEUE_MAX_SIZE", "10000"))
+EMAIL_WORKER_CONCURRENCY = int(os.getenv("EMAIL_WORKER_CONCURRENCY", "4"))
+
+# Flight cancellation (bulk refunds)
+FLIGHT_CANCEL_REFUND_CONCURRENCY = int(os.getenv("FLIGHT_CANCEL_REFUND_CONCURRENCY", "16"))
+FLIGHT_CANCEL_BATCH_SIZE = int(os.getenv("FLIGHT_CANCEL_BATCH_SIZE", "100"))
+
+# Payment reconciliation
+RECONCILIATION_PAGE_SIZE = int(os.getenv("RECONCILIATION_PAGE_SIZE", "2000"))
+RECONCILIATION_LOOKUP_BATCH_SIZE = int(os.getenv("RECONCILIATION_LOOKUP_BATCH_SIZE", "200"))
+
+# Extra card BIN ranges, e.g. "352800-358999:JCB,620000-629999:UnionPay"
+CARD_BIN_RANGES = os.getenv("CARD_BIN_RANGES", "")
+
+# Reference data cache (airlines, airports, aircraft, routes)
+REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+
+# Streaming exports: rows fetched per server-side cursor round trip
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Prometheus-style metrics at GET /metrics (per worker process)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Per-request SQL statement tracking (always feeds /metrics)
+QUERY_DEBUG_HEADERS = os.getenv("QUERY_DEBUG_HEADERS", "false").lower() == "true"
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "3"))
+
+# Slow-request / slow-statement log (system_event_logs, batched)
+SLOW_LOG_ENABLED = os.getenv("SLOW_LOG_ENABLED", "true").lower() == "true"
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "1000"))
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_LOG_SAMPLE_RATE = float(os.getenv("SLOW_LOG_SAMPLE_RATE", "1.0"))
+SLOW_LOG_RETENTION_DAYS = int(os.getenv("SLOW_LOG_RETENTION_DAYS", "7"))
+SLOW_LOG_BATCH_SIZE = int(os.getenv("SLOW_LOG_BATCH_SIZE", "100"))
+SLOW_LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("SLOW_LOG_FLUSH_INTERVAL_SECONDS", "2"))
+SLOW_LOG_BUFFER_SIZE = int(os.getenv("SLOW_LOG_BUFFER_SIZE", "5000"))
+
+# On-demand request profiling (admin: /api/v1/profiling)
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+PROFILING_MAX_REQUESTS = int(os.getenv("PROFILING_MAX_REQUESTS", "1000"))
+PROFILING_HEADER_ENABLED = os.getenv("PROFILING_HEADER_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN_MAX_TTL_SECONDS = int(os.getenv("PROFILING_TOKEN_MAX_TTL_SECONDS", "3600"))
+
+# Hot read endpoints (search, seat map, my bookings) send their payloads with
+# orjson and skip response_model re-validation
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+
+# Seat-map responses: serialized and compressed once per inventory change.
+# The TTL bounds staleness against bookings made on other workers.
+SEAT_MAP_CACHE_TTL_SECONDS = float(os.getenv("SEAT_MAP_CACHE_TTL_SECONDS", "2"))
+SEAT_MAP_CACHE_MAX_FLIGHTS = int(os.getenv("SEAT_MAP_CACHE_MAX_FLIGHTS", "5000"))
+
+# Server-side fares: per-flight fare tables cached until the flight's
+# inventory changes on this worker, or the TTL passes (other workers' bookings)
+PRICING_CACHE_TTL_SECONDS = float(os.getenv("PRICING_CACHE_TTL_SECONDS", "10"))
+PRICING_CACHE_MAX_FLIGHTS = int(os.getenv("PRICING_CACHE_MAX_FLIGHTS", "20000"))
+
+# Signed fare quotes from search / seat map: bookings carrying one are charged
+# the quoted fare until it expires, without re-pricing
+FARE_QUOTE_TTL_SECONDS = int(os.getenv("FARE_QUOTE_TTL_SECONDS", "900"))
+# Expiries are rounded up to this step, so re-signing unchanged fares gives the same quote
+FARE_QUOTE_EXPIRY_STEP_SECONDS = int(os.getenv("FARE_QUOTE_EXPIRY_STEP_SECONDS", "60"))
+
+# Currencies: prices and booking totals are in BASE_CURRENCY; rates come from
+# a JSON file (bundled sample by default) or a "module:callable" provider
+BASE_CURRENCY = os.getenv("BASE_CURRENCY", "USD")
+CURRENCY_RATES_FILE = os.getenv("CURRENCY_RATES_FILE", "")
+CURRENCY_RATES_PROVIDER = os.getenv("CURRENCY_RATES_PROVIDER", "")
+CURRENCY_RATES_REFRESH_SECONDS = float(os.getenv("CURRENCY_RATES_REFRESH_SECONDS", "3600"))
+
+# Flight schedules: POST /schedules/materialize generates their flights for a
+# horizon, writing in batches of SCHEDULE_WRITE_BATCH_SIZE rows
+SCHEDULE_DEFAULT_HORIZON_DAYS = int(os.getenv("SCHEDULE_DEFAULT_HORIZON_DAYS", "90"))
+SCHEDULE_MAX_HORIZON_DAYS = int(os.getenv("SCHEDULE_MAX_HORIZON_DAYS", "400"))
+SCHEDULE_WRITE_BATCH_SIZE = int(os.getenv("SCHEDULE_WRITE_BATCH_SIZE", "5000"))
+SCHEDULE_DIFF_MAX_CHANGES = int(os.getenv("SCHEDULE_DIFF_MAX_CHANGES", "1000"))
+
+# Bulk imports (/api/v1/imports): rows validated and upserted per batch, each
+# committed on its own; the response lists at most IMPORT_MAX_ERRORS row errors
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+IMPORT_MAX_RECORD_BYTES = int(os.getenv("IMPORT_MAX_RECORD_BYTES", "65536"))
@@ -9,6 +9,7 @@ from app.models import (
     Aircraft,
     Route,
     Flight,
+    FlightSchedule,
     Booking,
     Payment
 )  # noqa
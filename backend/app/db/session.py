@@ -1,9 +1,40 @@
+import time
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from sqlalchemy.pool import QueuePool
+from app.core.config import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, SLOW_LOG_ENABLED
+from app.utils.metrics import DB_POOL_CHECKOUT_WAIT, metrics
+from app.utils.query_stats import instrument_engine
+from app.utils.slow_log import watch_slow_queries
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+# Explicit pool limits so a burst of requests queues briefly instead of
+# opening unbounded connections (SQLite uses its own pool and ignores these)
+pool_options = {}
+if not DATABASE_URL.startswith("sqlite"):
+    pool_options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
 
 # Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(DATABASE_URL, pool_pre_ping=True, **pool_options)
+instrument_engine(engine)
+if SLOW_LOG_ENABLED:
+    watch_slow_queries(engine)
 
 # Create DB session factory
 SessionLocal = sessionmaker(
@@ -11,3 +42,16 @@ SessionLocal = sessionmaker(
     autoflush=False,
     bind=engine,
 )
+
+
+def _pool_state():
+    pool = engine.pool
+    return [
+        (("size",), pool.size()),
+        (("checked_out",), pool.checkedout()),
+        (("idle",), pool.checkedin()),
+        (("overflow",), max(pool.overflow(), 0)),  # negative while below pool_size
+    ]
+
+
+metrics.gauge_callback("db_pool_connections", "Database connection pool state", _pool_state, ("state",))
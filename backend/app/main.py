@@ -1,9 +1,22 @@
 import os
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from app.api.v1.api import api_router
 from app.api.v1.websocket import router as ws_router
 from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.services.booking_expiry import run_expiry_sweeper
+from app.services.email_service import run_email_worker
+from app.services.jobs import job_registry
+from app.services.reference_cache import reference_cache
+from app.services.currency import currency_rates
+from app.core.config import EMAIL_WORKER_CONCURRENCY, METRICS_ENABLED, SLOW_LOG_ENABLED, PROFILING_HEADER_ENABLED
+from app.utils.payment_gateway import init_payment_gateway, close_payment_gateway
+from app.utils.metrics import MetricsMiddleware, metrics
+from app.utils.query_stats import QueryStatsMiddleware
+from app.utils.slow_log import SlowRequestMiddleware, slow_log
+from app.utils.profiling import ProfileHeaderMiddleware, profiler
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -13,7 +26,20 @@ from fastapi.middleware.cors import CORSMiddleware
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_to_mongo()
+    init_payment_gateway()
+    reference_cache.load_all()
+    currency_rates.snapshot()  # a bad rate table fails startup, not the first search
+    background = [asyncio.create_task(run_expiry_sweeper())]
+    background += [asyncio.create_task(run_email_worker()) for _ in range(EMAIL_WORKER_CONCURRENCY)]
+    if SLOW_LOG_ENABLED:
+        background.append(asyncio.create_task(slow_log.run()))
     yield
+    await job_registry.shutdown()
+    for task in background:
+        task.cancel()
+    # Let the slow-log writer flush before Mongo closes
+    await asyncio.gather(*background, return_exceptions=True)
+    close_payment_gateway()
     await close_mongo_connection()
 
 limiter = Limiter(key_func=get_remote_address)
@@ -31,6 +57,13 @@ app.add_middleware(
     allow_methods=["*"],  # Allows all HTTP methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Allows all headers
 )
+if SLOW_LOG_ENABLED:
+    # Inside QueryStatsMiddleware, so it can read the request's SQL statements
+    app.add_middleware(SlowRequestMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+if METRICS_ENABLED:
+    # Added last, so it is outermost and times the whole middleware stack
+    app.add_middleware(MetricsMiddleware)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -40,3 +73,15 @@ app.include_router(ws_router)
 @app.get("/")
 def root():
     return {"message": "API is running"}
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+if PROFILING_HEADER_ENABLED:
+    # After every route is registered, so all of them can be profiled
+    app.add_middleware(ProfileHeaderMiddleware)
+    profiler.enable_header(app.routes)
@@ -4,5 +4,6 @@ from app.models.airport import Airport
 from app.models.aircraft import Aircraft
 from app.models.route import Route
 from app.models.flight import Flight
-from app.models.booking import Booking, BookingStatus
+from app.models.flight_schedule import FlightSchedule
+from app.models.booking import Booking, BookingStatus, SEAT_HOLDING_STATUSES
 from app.models.payment import Payment, PaymentStatus
\ No newline at end of file
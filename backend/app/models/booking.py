@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -9,6 +9,11 @@ class BookingStatus(str, enum.Enum):
     PENDING = "pending"
     CONFIRMED = "confirmed"
     CANCELLED = "cancelled"
+    EXPIRED = "expired"  # Payment deadline passed before the booking was paid
+
+
+# Bookings in these states occupy their seat
+SEAT_HOLDING_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
 
 
 class Booking(Base):
@@ -34,7 +39,25 @@ class Booking(Base):
 
     booking_time = Column(DateTime, server_default=func.now())
     issued_time = Column(DateTime, nullable=True)  # When ticket was issued
+    payment_deadline = Column(DateTime, nullable=True)  # Unpaid PENDING bookings expire after this
 
     # Relationships
     user = relationship("User")
-    flight = relationship("Flight")
\ No newline at end of file
+    flight = relationship("Flight")
+
+    __table_args__ = (
+        # Used by the expiry sweeper to find stale PENDING bookings
+        Index("ix_bookings_status_booking_time", "status", "booking_time"),
+        # Seat availability checks and per-flight seat maps / counts (covering)
+        Index("ix_bookings_flight_id_status_seat_number", "flight_id", "status", "seat_number"),
+        # One seat holder per seat: a second booking of a held seat fails to
+        # insert. Partial, so SQLite can't match it to queries with bound
+        # statuses; lookups go through the index above.
+        Index(
+            "ix_bookings_flight_id_seat_number_held", "flight_id", "seat_number", unique=True,
+            sqlite_where=status.in_(SEAT_HOLDING_STATUSES),
+            postgresql_where=status.in_(SEAT_HOLDING_STATUSES),
+        ),
+        # "My bookings"
+        Index("ix_bookings_user_id_booking_time", "user_id", "booking_time"),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -20,7 +20,17 @@ class Flight(Base):
     base_price_business = Column(Numeric(10, 2), nullable=True)
     base_price_first = Column(Numeric(10, 2), nullable=True)
 
+    cancelled_at = Column(DateTime, nullable=True)  # Set when the flight is cancelled
+    schedule_id = Column(Integer, ForeignKey("flight_schedules.id"), nullable=True)  # Set if materialized from one
+
     # Relationships
     route = relationship("Route")
     airline = relationship("Airline")
-    aircraft = relationship("Aircraft")
\ No newline at end of file
+    aircraft = relationship("Aircraft")
+
+    __table_args__ = (
+        # Flight search: flights on the matching routes within a date window
+        Index("ix_flights_route_id_departure_time", "route_id", "departure_time"),
+        # One flight per schedule and departure, so materializing again is idempotent
+        Index("ix_flights_schedule_id_departure_time", "schedule_id", "departure_time", unique=True),
+    )
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Date, Time, Numeric, ForeignKey
+from sqlalchemy.orm import relationship
+from app.db.base import Base
+
+
+class FlightSchedule(Base):
+    """A recurring flight, materialized into Flight rows by POST /schedules/materialize"""
+
+    __tablename__ = "flight_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    flight_number = Column(String(10), nullable=False)
+
+    route_id = Column(Integer, ForeignKey("routes.id"), nullable=False)
+    airline_id = Column(Integer, ForeignKey("airlines.id"), nullable=False)
+    aircraft_id = Column(Integer, ForeignKey("aircraft.id"), nullable=False)
+
+    days_of_week = Column(String(7), nullable=False)  # ISO weekdays, e.g. "135" = Mon, Wed, Fri
+    departure_time = Column(Time, nullable=False)
+    block_minutes = Column(Integer, nullable=False)  # departure to arrival
+
+    effective_from = Column(Date, nullable=False)
+    effective_to = Column(Date, nullable=True)  # inclusive; open-ended if unset
+
+    base_price_economy = Column(Numeric(10, 2), nullable=False)
+    base_price_business = Column(Numeric(10, 2), nullable=True)
+    base_price_first = Column(Numeric(10, 2), nullable=True)
+
+    # Relationships
+    route = relationship("Route")
+    airline = relationship("Airline")
+    aircraft = relationship("Aircraft")
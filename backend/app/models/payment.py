@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -26,6 +26,7 @@ class Payment(Base):
     card_brand = Column(String(20), nullable=True)  # "Visa", "Mastercard", "Amex"
 
     transaction_id = Column(String(255), nullable=True)  # Payment gateway reference
+    refund_transaction_id = Column(String(255), nullable=True)  # Gateway reference of the refund
 
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False)
     failure_reason = Column(Text, nullable=True)  # Only if status = FAILED
@@ -33,4 +34,9 @@ class Payment(Base):
     payment_time = Column(DateTime, server_default=func.now())
 
     # Relationship
-    booking = relationship("Booking")
\ No newline at end of file
+    booking = relationship("Booking")
+
+    __table_args__ = (
+        # Payments of a booking by status ("already paid?", refunds)
+        Index("ix_payments_booking_id_status", "booking_id", "status"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -13,4 +13,9 @@ class Route(Base):
 
     # Relationships
     source_airport = relationship("Airport", foreign_keys=[source_airport_id])
-    destination_airport = relationship("Airport", foreign_keys=[destination_airport_id])
\ No newline at end of file
+    destination_airport = relationship("Airport", foreign_keys=[destination_airport_id])
+
+    __table_args__ = (
+        # Route lookup by origin/destination pair
+        Index("ix_routes_source_destination", "source_airport_id", "destination_airport_id"),
+    )
@@ -23,4 +23,8 @@ class AirportOut(AirportBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class AirportSuggestion(AirportOut):
+    route_count: int = 0
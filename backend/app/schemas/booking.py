@@ -11,6 +11,7 @@ class BookingCreate(BaseModel):
     passenger_id_number: str | None = None
     passenger_id_type: str | None = None
     total_amount: float
+    fare_quote: str | None = None  # from search or the seat map
 
 
 class BookingOut(BaseModel):
@@ -25,6 +26,7 @@ class BookingOut(BaseModel):
     status: str
     booking_time: datetime
     issued_time: datetime | None
+    payment_deadline: datetime | None = None
     # Add these:
     origin_iata: str | None = None
     destination_iata: str | None = None
@@ -47,6 +49,7 @@ class BookingWithPaymentCreate(BaseModel):
     passenger_id_number: str | None = None
     passenger_id_type: str | None = None
     total_amount: float
+    fare_quote: str | None = None  # from search or the seat map
 
     # Payment details
     currency: str = "USD"
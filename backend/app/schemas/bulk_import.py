@@ -0,0 +1,77 @@
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import datetime, timezone
+from typing import List
+
+from app.schemas.airport import AirportBase
+
+IATA_PATTERN = "^[A-Za-z]{3}$"
+
+
+def _upper(value: str) -> str:
+    return value.strip().upper()
+
+
+# One row of an upload, by kind: airports are keyed by iata_code, routes by
+# their airports' IATA codes, flights by (flight_number, departure_time)
+
+class AirportImportRow(AirportBase):
+    iata_code: str = Field(..., pattern=IATA_PATTERN)
+
+    _iata_code = field_validator("iata_code")(_upper)
+
+
+class RouteImportRow(BaseModel):
+    origin_iata: str = Field(..., pattern=IATA_PATTERN)
+    destination_iata: str = Field(..., pattern=IATA_PATTERN)
+    distance_km: int | None = Field(None, ge=0)
+
+    _iata_codes = field_validator("origin_iata", "destination_iata")(_upper)
+
+    @model_validator(mode="after")
+    def check_endpoints(self):
+        if self.origin_iata == self.destination_iata:
+            raise ValueError("origin_iata and destination_iata are the same")
+        return self
+
+
+class FlightImportRow(BaseModel):
+    flight_number: str = Field(..., min_length=1, max_length=10)
+    airline_code: str
+    origin_iata: str = Field(..., pattern=IATA_PATTERN)
+    destination_iata: str = Field(..., pattern=IATA_PATTERN)
+    aircraft_id: int
+    departure_time: datetime
+    arrival_time: datetime
+    base_price_economy: float = Field(..., gt=0)
+    base_price_business: float | None = Field(None, gt=0)
+    base_price_first: float | None = Field(None, gt=0)
+
+    _codes = field_validator("airline_code", "origin_iata", "destination_iata", "flight_number")(_upper)
+
+    @field_validator("departure_time", "arrival_time")
+    @classmethod
+    def naive_utc(cls, value: datetime) -> datetime:
+        # Stored as naive UTC, like every other timestamp
+        return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+    @model_validator(mode="after")
+    def check_times(self):
+        if self.arrival_time <= self.departure_time:
+            raise ValueError("arrival_time is not after departure_time")
+        return self
+
+
+class RowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    kind: str
+    rows: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[RowError]  # the first IMPORT_MAX_ERRORS
+    errors_truncated: bool
+    elapsed_ms: float
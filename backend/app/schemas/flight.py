@@ -32,6 +32,8 @@ class FlightUpdate(BaseModel):
 
 class FlightOut(FlightBase):
     id: int
+    cancelled_at: datetime | None = None
+    schedule_id: int | None = None
 
     class Config:
         from_attributes = True
@@ -46,6 +48,11 @@ class FlightSearchResult(BaseModel):
     base_price_economy: float
     base_price_business: float | None
     base_price_first: float | None
+    fare_economy: float
+    fare_business: float | None
+    fare_first: float | None
+    currency: str
+    fare_quote: str  # send back with the booking to be charged these fares
     available_seats: int
     airline_name: str
     airline_code: str
@@ -0,0 +1,85 @@
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import date, time, datetime
+from typing import Any, Dict, List
+
+DAYS_OF_WEEK_PATTERN = "^[1-7]{1,7}$"  # ISO weekdays, Mon=1
+
+
+def normalize_days_of_week(value: str | None) -> str | None:
+    """ "531" and "1355" are both stored as "135" """
+    return "".join(sorted(set(value))) if value is not None else None
+
+
+class FlightScheduleBase(BaseModel):
+    flight_number: str = Field(..., max_length=10)
+    route_id: int
+    airline_id: int
+    aircraft_id: int
+    days_of_week: str = Field(..., pattern=DAYS_OF_WEEK_PATTERN, description='ISO weekdays, e.g. "135" = Mon, Wed, Fri')
+    departure_time: time
+    block_minutes: int = Field(..., gt=0, le=24 * 60)
+    effective_from: date
+    effective_to: date | None = None
+    base_price_economy: float = Field(..., gt=0)
+    base_price_business: float | None = Field(None, gt=0)
+    base_price_first: float | None = Field(None, gt=0)
+
+    _days_of_week = field_validator("days_of_week")(normalize_days_of_week)
+
+    @model_validator(mode="after")
+    def check_effective_range(self):
+        if self.effective_to is not None and self.effective_to < self.effective_from:
+            raise ValueError("effective_to is before effective_from")
+        return self
+
+
+class FlightScheduleCreate(FlightScheduleBase):
+    pass
+
+
+class FlightScheduleUpdate(BaseModel):
+    flight_number: str | None = Field(None, max_length=10)
+    route_id: int | None = None
+    airline_id: int | None = None
+    aircraft_id: int | None = None
+    days_of_week: str | None = Field(None, pattern=DAYS_OF_WEEK_PATTERN)
+    departure_time: time | None = None
+    block_minutes: int | None = Field(None, gt=0, le=24 * 60)
+    effective_from: date | None = None
+    effective_to: date | None = None
+    base_price_economy: float | None = Field(None, gt=0)
+    base_price_business: float | None = Field(None, gt=0)
+    base_price_first: float | None = Field(None, gt=0)
+
+    _days_of_week = field_validator("days_of_week")(normalize_days_of_week)
+
+
+class FlightScheduleOut(FlightScheduleBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class ScheduleChange(BaseModel):
+    action: str  # create, update, delete, conflict
+    schedule_id: int
+    departure_time: datetime
+    flight_id: int | None = None
+    changes: Dict[str, Any] | None = None  # update: field -> new value
+    reason: str | None = None  # conflict
+
+
+class MaterializeResult(BaseModel):
+    diff: bool  # True: nothing was written
+    window_start: datetime
+    window_end: datetime
+    schedules: int
+    created: int
+    updated: int
+    deleted: int
+    unchanged: int
+    conflicts: int
+    elapsed_ms: float
+    changes: List[ScheduleChange] | None = None  # diff mode only, at most SCHEDULE_DIFF_MAX_CHANGES
+    changes_truncated: bool = False
@@ -21,6 +21,7 @@ class PaymentOut(BaseModel):
     card_last4: str | None
     card_brand: str | None
     transaction_id: str | None
+    refund_transaction_id: str | None = None
     status: str
     failure_reason: str | None
     payment_time: datetime
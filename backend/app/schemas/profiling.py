@@ -0,0 +1,16 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from app.core.config import PROFILING_MAX_REQUESTS, PROFILING_TOKEN_MAX_TTL_SECONDS
+
+
+class ProfilingArm(BaseModel):
+    route: str = Field(..., description="Route path or endpoint name; * and ? wildcards (e.g. /api/v1/flights/*)")
+    requests: int = Field(default=20, ge=1, le=PROFILING_MAX_REQUESTS, description="Requests to profile")
+    mode: Literal["sampler", "cprofile"] = "sampler"
+
+
+class ProfileTokenRequest(BaseModel):
+    mode: Literal["sampler", "cprofile"] = "sampler"
+    ttl_seconds: int = Field(default=300, ge=1, le=PROFILING_TOKEN_MAX_TTL_SECONDS)
@@ -0,0 +1,120 @@
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
+
+from app.services.reference_cache import reference_cache
+
+# Field a key came from; lower ranks first
+IATA, CITY, NAME, COUNTRY = range(4)
+
+_WORDS = re.compile(r"[^\w]+")
+
+
+def fold(text: str) -> str:
+    """Lower-case and strip accents ("São Paulo" -> "sao paulo")"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+
+def _airport_keys(airport: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """Searchable (key, field) pairs: the whole folded field plus each word in it"""
+    keys = {(fold(airport["iata_code"]), IATA)}
+    for field, value in ((CITY, airport["city"]), (NAME, airport["name"]), (COUNTRY, airport["country"])):
+        folded = fold(value)
+        keys.add((folded, field))
+        keys.update((word, field) for word in _WORDS.split(folded) if word)
+    return sorted(keys)
+
+
+class AirportSuggestIndex:
+    """
+    Sorted-array prefix index over airport IATA code, city, name and country
+
+    A lookup is one bisect into the sorted keys plus a scan of the matching
+    run. The index follows the reference cache: when the airports table is
+    reloaded (e.g. after admin CRUD) only airports whose data changed are
+    re-indexed. Updates build new arrays and swap them in, so readers never
+    see a half-updated index.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._refs: List[Tuple[int, int]] = []  # (field, airport_id), parallel to _keys
+        self._airports: Dict[int, Dict[str, Any]] = {}
+        self._route_counts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def sync_airports(self, snapshot):
+        """Apply the difference between the indexed airports and a new snapshot"""
+        with self._lock:
+            current = self._airports
+            changed = [a for a in snapshot.items if current.get(a["id"]) != a]
+            removed = current.keys() - snapshot.by_id.keys()
+            if not changed and not removed:
+                return
+
+            stale = removed | {a["id"] for a in changed}
+            entries = [
+                (key, ref) for key, ref in zip(self._keys, self._refs)
+                if ref[1] not in stale
+            ]
+            for airport in changed:
+                entries.extend((key, (field, airport["id"])) for key, field in _airport_keys(airport))
+            entries.sort()
+
+            self._keys = [key for key, _ in entries]
+            self._refs = [ref for _, ref in entries]
+            self._airports = dict(snapshot.by_id)
+
+    def sync_routes(self, snapshot):
+        counts: Dict[int, int] = {}
+        for route in snapshot.items:
+            for airport_id in (route["source_airport_id"], route["destination_airport_id"]):
+                counts[airport_id] = counts.get(airport_id, 0) + 1
+        self._route_counts = counts
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        q = fold(query)
+        if not q:
+            return []
+
+        # Picks up cache reloads (and thereby index updates) first
+        reference_cache.snapshot("airports")
+        reference_cache.snapshot("routes")
+
+        # Snapshot the arrays; a concurrent sync swaps in new ones
+        keys, refs, airports, route_counts = self._keys, self._refs, self._airports, self._route_counts
+
+        best: Dict[int, int] = {}
+        i = bisect_left(keys, q)
+        while i < len(keys) and keys[i].startswith(q):
+            field, airport_id = refs[i]
+            # An exact IATA match outranks any prefix match
+            rank = -1 if field == IATA and keys[i] == q else field
+            if rank < best.get(airport_id, 99):
+                best[airport_id] = rank
+            i += 1
+
+        ranked = heapq.nsmallest(
+            limit,
+            best.items(),
+            key=lambda item: (
+                item[1],
+                route_counts.get(item[0], 0) == 0,  # airports with routes first
+                -route_counts.get(item[0], 0),
+                airports[item[0]]["name"],
+            ),
+        )
+        return [
+            {**airports[airport_id], "route_count": route_counts.get(airport_id, 0)}
+            for airport_id, _ in ranked
+        ]
+
+
+# Global instance, kept in step with the reference data cache
+airport_suggest = AirportSuggestIndex()
+reference_cache.subscribe("airports", airport_suggest.sync_airports)
+reference_cache.subscribe("routes", airport_suggest.sync_routes)
@@ -0,0 +1,107 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import update
+
+from app.core.config import (
+    BOOKING_PAYMENT_WINDOW_MINUTES,
+    BOOKING_EXPIRY_SWEEP_INTERVAL_SECONDS,
+    BOOKING_EXPIRY_BATCH_SIZE,
+)
+from app.db.session import SessionLocal
+from app.models.booking import Booking, BookingStatus
+from app.services.seat_map_cache import seat_map_cache
+from app.utils.websocket_manager import manager
+
+
+def payment_deadline_from(booking_time: datetime) -> datetime:
+    """Deadline by which a PENDING booking created at `booking_time` must be paid"""
+    return booking_time + timedelta(minutes=BOOKING_PAYMENT_WINDOW_MINUTES)
+
+
+def _expire_batch(cutoff: datetime, batch_size: int) -> List[tuple[int, str]]:
+    """
+    Expire one batch of unpaid bookings created before `cutoff`
+
+    Returns (flight_id, seat_number) for every booking that was expired.
+    Runs in a worker thread (blocking DB calls).
+    """
+    db = SessionLocal()
+    try:
+        # Served by ix_bookings_status_booking_time
+        rows = db.query(Booking.id, Booking.flight_id, Booking.seat_number).filter(
+            Booking.status == BookingStatus.PENDING,
+            Booking.booking_time < cutoff,
+        ).order_by(Booking.booking_time).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        if not rows:
+            return []
+
+        # Re-check status so a payment that confirmed the booking meanwhile wins
+        db.execute(
+            update(Booking)
+            .where(
+                Booking.id.in_([row.id for row in rows]),
+                Booking.status == BookingStatus.PENDING,
+            )
+            .values(status=BookingStatus.EXPIRED)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return [(row.flight_id, row.seat_number) for row in rows]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def sweep_expired_bookings(batch_size: int = BOOKING_EXPIRY_BATCH_SIZE) -> int:
+    """
+    Release seats held by unpaid bookings past their payment deadline
+
+    Each affected flight gets a single seat_released broadcast listing all
+    seats freed in this sweep. Returns the number of bookings expired.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=BOOKING_PAYMENT_WINDOW_MINUTES)
+    released: Dict[int, List[str]] = defaultdict(list)
+    total = 0
+
+    while True:
+        expired = await asyncio.to_thread(_expire_batch, cutoff, batch_size)
+        for flight_id, seat_number in expired:
+            released[flight_id].append(seat_number)
+        total += len(expired)
+        if len(expired) < batch_size:
+            break
+    # Bulk UPDATEs bypass the session events that version seat maps
+    seat_map_cache.invalidate(released)
+
+    timestamp = datetime.utcnow().isoformat()
+    for flight_id, seat_numbers in released.items():
+        await manager.broadcast_to_flight(
+            flight_id=flight_id,
+            message={
+                "type": "seat_released",
+                "flight_id": flight_id,
+                "seat_numbers": seat_numbers,
+                "reason": "expired",
+                "timestamp": timestamp
+            }
+        )
+
+    return total
+
+
+async def run_expiry_sweeper(interval: float = BOOKING_EXPIRY_SWEEP_INTERVAL_SECONDS):
+    """Background loop started from the app lifespan"""
+    while True:
+        try:
+            expired = await sweep_expired_bookings()
+            if expired:
+                print(f"⏳ Expired {expired} unpaid booking(s)")
+        except Exception as e:
+            print(f"❌ Booking expiry sweep failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,188 @@
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Callable, Dict, NamedTuple
+
+import numpy as np
+
+from app.core.config import (
+    BASE_CURRENCY,
+    CURRENCY_RATES_FILE,
+    CURRENCY_RATES_PROVIDER,
+    CURRENCY_RATES_REFRESH_SECONDS,
+)
+
+DEFAULT_RATES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "exchange_rates.json")
+
+# ISO 4217 minor units, where they aren't 2
+MINOR_UNITS = {
+    "BHD": 3, "CLP": 0, "IQD": 3, "ISK": 0, "JOD": 3, "JPY": 0, "KRW": 0, "KWD": 3,
+    "LYD": 3, "OMR": 3, "TND": 3, "UGX": 0, "VND": 0, "XAF": 0, "XOF": 0,
+}
+
+# Replaced snapshots kept, so fare quotes priced against one still verify
+RETAINED_SNAPSHOTS = 8
+
+
+class UnsupportedCurrency(ValueError):
+    pass
+
+
+class RateTable(NamedTuple):
+    """What a rate provider returns: units of each currency per 1 `base`"""
+    base: str
+    rates: Dict[str, Decimal]
+    as_of: str | None = None
+
+
+def minor_units(currency: str) -> int:
+    return MINOR_UNITS.get(currency, 2)
+
+
+def load_rates_file(path: str) -> RateTable:
+    """Rates from a JSON file: {"base": "USD", "as_of": "...", "rates": {"EUR": "0.9187", ...}}"""
+    with open(path) as f:
+        data = json.load(f)
+    base = data["base"].upper()
+    # Through str, so rates written as JSON numbers stay exact too
+    rates = {code.upper(): Decimal(str(rate)) for code, rate in data["rates"].items()}
+    rates[base] = Decimal(1)
+    return RateTable(base, rates, data.get("as_of"))
+
+
+class RateSnapshot:
+    """
+    One immutable rate table
+
+    The version is a hash of the rates, so every worker that loaded the same
+    table agrees on it.
+    """
+
+    __slots__ = ("version", "base", "rates", "as_of", "_ratios")
+
+    def __init__(self, table: RateTable):
+        for code, rate in table.rates.items():
+            if len(code) != 3 or not rate.is_finite() or rate <= 0:
+                raise ValueError(f"Invalid exchange rate {code}: {rate}")
+        canonical = json.dumps([table.base, sorted((code, str(rate.normalize())) for code, rate in table.rates.items())])
+        self.version = hashlib.sha1(canonical.encode()).hexdigest()[:12]
+        self.base = table.base
+        self.rates = dict(table.rates)
+        self.as_of = table.as_of
+        self._ratios = {code: rate.as_integer_ratio() for code, rate in self.rates.items()}
+
+    def rate(self, currency: str) -> Decimal:
+        try:
+            return self.rates[currency]
+        except KeyError:
+            raise UnsupportedCurrency(f"Unsupported currency: {currency}") from None
+
+    def convert(self, amount: Any, to: str, from_: str | None = None) -> Decimal:
+        """`amount` (default: in the base currency) in `to`, rounded half-up to its minor unit"""
+        amount = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+        if from_ is not None and from_ != self.base:
+            amount = amount / self.rate(from_)
+        converted = amount * self.rate(to)
+        return converted.quantize(Decimal(1).scaleb(-minor_units(to)), rounding=ROUND_HALF_UP)
+
+    def convert_many(self, amounts: np.ndarray, to: str) -> np.ndarray:
+        """
+        Base-currency amounts (any shape, NaN for none) in `to`, in one pass
+
+        Exact: the amounts are taken in integer minor units and multiplied by
+        the rate as an integer ratio, so each result is what `convert` gives.
+        """
+        numerator, denominator = self._ratios.get(to) or self.rate(to).as_integer_ratio()
+        base_scale, scale = 10 ** minor_units(self.base), 10 ** minor_units(to)
+        missing = np.isnan(amounts)
+        minor = np.rint(np.where(missing, 0.0, amounts) * base_scale).astype(np.int64)
+        numerator, denominator = numerator * scale, denominator * base_scale
+
+        if int(np.abs(minor).max(initial=0)) * numerator >= 2 ** 62:
+            # Past int64: same result through Decimal, element by element
+            exact = np.vectorize(lambda m: float(self.convert(Decimal(int(m)) / base_scale, to)), otypes=[float])
+            converted = exact(minor)
+        else:
+            # Round half up (amounts are never negative)
+            converted = (minor * numerator + denominator // 2) // denominator / scale
+        return np.where(missing, np.nan, converted)
+
+
+def _configured_provider() -> Callable[[], RateTable]:
+    if CURRENCY_RATES_PROVIDER:
+        module, _, name = CURRENCY_RATES_PROVIDER.partition(":")
+        return getattr(importlib.import_module(module), name)
+    path = CURRENCY_RATES_FILE or DEFAULT_RATES_FILE
+    return lambda: load_rates_file(path)
+
+
+class CurrencyRates:
+    """
+    Exchange rates as versioned snapshots, cached in memory
+
+    Rates come from a provider: a callable returning a RateTable, by default
+    the JSON file at CURRENCY_RATES_FILE, or "module:callable" from
+    CURRENCY_RATES_PROVIDER. It is asked again every
+    CURRENCY_RATES_REFRESH_SECONDS; if it fails, the current snapshot is
+    kept. The last RETAINED_SNAPSHOTS versions stay available to `snapshot`.
+    """
+
+    def __init__(self, provider: Callable[[], RateTable] | None = None, refresh: float = CURRENCY_RATES_REFRESH_SECONDS):
+        self.provider = provider or _configured_provider()
+        self.refresh = refresh
+        self._current: RateSnapshot | None = None
+        self._checked_at = 0.0
+        self._snapshots: "OrderedDict[str, RateSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_provider(self, provider: Callable[[], RateTable]):
+        with self._lock:
+            self.provider = provider
+            self._checked_at = 0.0
+
+    def snapshot(self, version: str | None = None) -> RateSnapshot | None:
+        """The current rates, or the retained snapshot `version` (None if no longer held)"""
+        current = self._current
+        if current is None or time.monotonic() - self._checked_at >= self.refresh:
+            current = self._reload()
+        if version is None or version == current.version:
+            return current
+        return self._snapshots.get(version)
+
+    def _reload(self) -> RateSnapshot:
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            if self._current is not None and time.monotonic() - self._checked_at < self.refresh:
+                return self._current
+            try:
+                snapshot = RateSnapshot(self.provider())
+                if snapshot.base != BASE_CURRENCY:
+                    raise ValueError(f"Rate table base {snapshot.base} is not BASE_CURRENCY {BASE_CURRENCY}")
+            except Exception as e:
+                if self._current is None:
+                    raise
+                print(f"⚠️ Exchange rate refresh failed, keeping version {self._current.version}: {e}")
+                self._checked_at = time.monotonic()
+                return self._current
+
+            self._checked_at = time.monotonic()
+            if self._current is None or snapshot.version != self._current.version:
+                self._snapshots[snapshot.version] = snapshot
+                while len(self._snapshots) > RETAINED_SNAPSHOTS:
+                    self._snapshots.popitem(last=False)
+                self._current = snapshot
+                print(f"✅ Exchange rates loaded (version {snapshot.version}, "
+                      f"{len(snapshot.rates)} currencies, as of {snapshot.as_of})")
+            return self._current
+
+    def convert(self, amount: Any, to: str, from_: str | None = None) -> Decimal:
+        return self.snapshot().convert(amount, to, from_)
+
+
+# Global instance
+currency_rates = CurrencyRates()
@@ -1,3 +1,4 @@
+import asyncio
 import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -7,8 +8,11 @@ from app.core.config import (
     SMTP_USER,
     SMTP_PASSWORD,
     SMTP_FROM_EMAIL,
-    SMTP_FROM_NAME
+    SMTP_FROM_NAME,
+    EMAIL_QUEUE_MAX_SIZE,
 )
+from app.utils.metrics import metrics
+from app.utils.slow_log import track
 
 
 async def send_email(
@@ -32,22 +36,22 @@ async def send_email(
     message.attach(MIMEText(html_content, "html"))
     
     try:
-        await aiosmtplib.send(
-            message,
-            hostname=SMTP_HOST,
-            port=SMTP_PORT,
-            username=SMTP_USER,
-            password=SMTP_PASSWORD,
-            start_tls=True
-        )
+        with track("smtp"):
+            await aiosmtplib.send(
+                message,
+                hostname=SMTP_HOST,
+                port=SMTP_PORT,
+                username=SMTP_USER,
+                password=SMTP_PASSWORD,
+                start_tls=True
+            )
         print(f"✅ Email sent to {to_email}")
     except Exception as e:
         print(f"❌ Email failed: {e}")
         # Don't raise - email failure shouldn't break booking
 
 
-async def send_booking_confirmation(
-    to_email: str,
+def build_booking_confirmation_email(
     booking_reference: str,
     ticket_number: str,
     passenger_name: str,
@@ -57,8 +61,8 @@ async def send_booking_confirmation(
     seat_number: str,
     total_amount: float,
     currency: str
-):
-    """Send booking confirmation email"""
+) -> tuple[str, str, str]:
+    """Build (subject, html_content, plain_content) for a booking confirmation email"""
     
     subject = f"Booking Confirmed - {booking_reference}"
     
@@ -136,17 +140,37 @@ async def send_booking_confirmation(
     This is an automated message. Please do not reply.
     """
     
-    await send_email(to_email, subject, html_content, plain_content)
+    return subject, html_content, plain_content
 
 
-async def send_cancellation_email(
+async def send_booking_confirmation(
     to_email: str,
     booking_reference: str,
+    ticket_number: str,
     passenger_name: str,
-    refund_amount: float,
+    flight_number: str,
+    route: str,
+    departure_time: str,
+    seat_number: str,
+    total_amount: float,
     currency: str
 ):
-    """Send cancellation/refund confirmation email"""
+    """Send booking confirmation email"""
+    
+    subject, html_content, plain_content = build_booking_confirmation_email(
+        booking_reference, ticket_number, passenger_name, flight_number, route,
+        departure_time, seat_number, total_amount, currency,
+    )
+    await send_email(to_email, subject, html_content, plain_content)
+
+
+def build_cancellation_email(
+    booking_reference: str,
+    passenger_name: str,
+    refund_amount: float,
+    currency: str
+) -> tuple[str, str]:
+    """Build (subject, html_content) for a cancellation/refund email"""
     
     subject = f"Booking Cancelled - {booking_reference}"
     
@@ -177,4 +201,68 @@ async def send_cancellation_email(
     </html>
     """
     
-    await send_email(to_email, subject, html_content)
\ No newline at end of file
+    return subject, html_content
+
+
+async def send_cancellation_email(
+    to_email: str,
+    booking_reference: str,
+    passenger_name: str,
+    refund_amount: float,
+    currency: str
+):
+    """Send cancellation/refund confirmation email"""
+    
+    subject, html_content = build_cancellation_email(
+        booking_reference, passenger_name, refund_amount, currency
+    )
+    await send_email(to_email, subject, html_content)
+
+
+# ── Background email queue ──────────────────────────────────────────────────
+# Bulk operations enqueue messages here instead of awaiting SMTP inline;
+# workers started in the app lifespan drain it.
+email_queue: asyncio.Queue = asyncio.Queue(maxsize=EMAIL_QUEUE_MAX_SIZE)
+metrics.gauge_callback("email_queue_depth", "Emails waiting for a delivery worker", email_queue.qsize)
+
+
+def enqueue_email(
+    to_email: str,
+    subject: str,
+    html_content: str,
+    plain_content: str = None
+) -> bool:
+    """Queue an email for background delivery. Returns False if the queue is full."""
+    try:
+        email_queue.put_nowait((to_email, subject, html_content, plain_content))
+        return True
+    except asyncio.QueueFull:
+        print(f"❌ Email queue full, dropping email to {to_email}")
+        return False
+
+
+def enqueue_cancellation_emails(cancellations: list[dict]) -> int:
+    """
+    Queue cancellation emails in bulk
+
+    Each item needs to_email, booking_reference, passenger_name,
+    refund_amount and currency. Returns the number queued.
+    """
+    queued = 0
+    for c in cancellations:
+        subject, html_content = build_cancellation_email(
+            c["booking_reference"], c["passenger_name"], c["refund_amount"], c["currency"]
+        )
+        if enqueue_email(c["to_email"], subject, html_content):
+            queued += 1
+    return queued
+
+
+async def run_email_worker():
+    """Deliver queued emails forever (one SMTP send at a time per worker)"""
+    while True:
+        to_email, subject, html_content, plain_content = await email_queue.get()
+        try:
+            await send_email(to_email, subject, html_content, plain_content)
+        finally:
+            email_queue.task_done()
\ No newline at end of file
@@ -0,0 +1,208 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import select, update
+
+from app.core.config import FLIGHT_CANCEL_REFUND_CONCURRENCY, FLIGHT_CANCEL_BATCH_SIZE
+from app.db.session import SessionLocal
+from app.models.booking import Booking, BookingStatus
+from app.models.payment import Payment, PaymentStatus
+from app.services.email_service import enqueue_cancellation_emails
+from app.services.jobs import Job
+from app.services.logging_service import log_payment_events_bulk
+from app.services.seat_map_cache import seat_map_cache
+from app.utils.gateway_resilience import GatewayUnavailable
+from app.utils.payment_gateway import get_payment_gateway, full_refund_key
+from app.utils.websocket_manager import manager
+
+
+def _load_refundable(flight_id: int) -> List[Dict[str, Any]]:
+    """All successful payments for the flight, with the booking fields we need, in one query"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(
+                Payment.id.label("payment_id"),
+                Payment.transaction_id,
+                Payment.amount,
+                Payment.currency,
+                Booking.id.label("booking_id"),
+                Booking.booking_reference,
+                Booking.passenger_name,
+                Booking.passenger_email,
+                Booking.seat_number,
+            )
+            .join(Booking, Booking.id == Payment.booking_id)
+            .where(
+                Booking.flight_id == flight_id,
+                Payment.status == PaymentStatus.SUCCESS,
+            )
+            .order_by(Payment.id)
+        ).mappings().all()
+        return [dict(row) for row in rows]
+    finally:
+        db.close()
+
+
+def _cancel_unpaid(flight_id: int) -> List[str]:
+    """Cancel PENDING bookings (nothing to refund) and return their seats"""
+    db = SessionLocal()
+    try:
+        seats = [
+            row.seat_number for row in db.query(Booking.seat_number).filter(
+                Booking.flight_id == flight_id,
+                Booking.status == BookingStatus.PENDING,
+            )
+        ]
+        db.execute(
+            update(Booking)
+            .where(Booking.flight_id == flight_id, Booking.status == BookingStatus.PENDING)
+            .values(status=BookingStatus.CANCELLED)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return seats
+    finally:
+        db.close()
+
+
+def _apply_refunds(refunded: List[Dict[str, Any]]):
+    """Batched status updates for one chunk of successful refunds"""
+    db = SessionLocal()
+    try:
+        # ORM bulk UPDATE by primary key -> a single executemany
+        db.execute(
+            update(Payment),
+            [
+                {
+                    "id": r["payment_id"],
+                    "status": PaymentStatus.REFUNDED,
+                    "refund_transaction_id": r["refund_transaction_id"],
+                }
+                for r in refunded
+            ],
+        )
+        db.execute(
+            update(Booking)
+            .where(Booking.id.in_([r["booking_id"] for r in refunded]))
+            .values(status=BookingStatus.CANCELLED)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def cancel_flight_refunds(job: Job, flight_id: int):
+    """
+    Refund and cancel every booking on a (cancelled) flight
+
+    Refunds run concurrently, bounded by FLIGHT_CANCEL_REFUND_CONCURRENCY on
+    top of the gateway's own bulkhead; DB updates, payment logs and emails
+    are applied per chunk of FLIGHT_CANCEL_BATCH_SIZE. Payments whose refund
+    fails stay SUCCESS, so re-running the job retries only those.
+    """
+    gateway = get_payment_gateway()
+    limit = asyncio.Semaphore(FLIGHT_CANCEL_REFUND_CONCURRENCY)
+
+    unpaid_seats = await asyncio.to_thread(_cancel_unpaid, flight_id)
+    # Bulk UPDATEs bypass the session events that version seat maps
+    seat_map_cache.invalidate([flight_id])
+    refundable = await asyncio.to_thread(_load_refundable, flight_id)
+    job.total = len(refundable)
+
+    async def refund_one(row: Dict[str, Any]):
+        async with limit:
+            try:
+                result = await gateway.refund(
+                    transaction_id=row["transaction_id"],
+                    amount=float(row["amount"]),
+                    idempotency_key=full_refund_key(row["transaction_id"]),
+                )
+            except GatewayUnavailable as e:
+                # Breaker is open - wait it out rather than failing the whole tail
+                await asyncio.sleep(e.retry_after)
+                result = await gateway.refund(
+                    transaction_id=row["transaction_id"],
+                    amount=float(row["amount"]),
+                    idempotency_key=full_refund_key(row["transaction_id"]),
+                )
+        return row, result
+
+    released_seats = list(unpaid_seats)
+    for start in range(0, len(refundable), FLIGHT_CANCEL_BATCH_SIZE):
+        chunk = refundable[start:start + FLIGHT_CANCEL_BATCH_SIZE]
+        outcomes = await asyncio.gather(*[refund_one(row) for row in chunk], return_exceptions=True)
+
+        refunded = []
+        for row, outcome in zip(chunk, outcomes):
+            if isinstance(outcome, BaseException):
+                job.failed += 1
+                job.add_error(f"Payment {row['payment_id']}: {outcome}")
+                continue
+            _, result = outcome
+            if result.success:
+                refunded.append({**row, "refund_transaction_id": result.transaction_id})
+            else:
+                job.failed += 1
+                job.add_error(f"Payment {row['payment_id']}: {result.error_message}")
+
+        if refunded:
+            await asyncio.to_thread(_apply_refunds, refunded)
+            seat_map_cache.invalidate([flight_id])
+            job.succeeded += len(refunded)
+            released_seats.extend(r["seat_number"] for r in refunded)
+
+            try:
+                await log_payment_events_bulk([
+                    {
+                        "payment_id": r["payment_id"],
+                        "booking_id": r["booking_id"],
+                        "amount": float(r["amount"]),
+                        "event_type": "refunded",
+                        "payment_status": "refunded",
+                        "reason": "flight_cancelled",
+                        "metadata": {
+                            "refund_transaction_id": r["refund_transaction_id"],
+                            "flight_id": flight_id,
+                            "job_id": job.id
+                        }
+                    }
+                    for r in refunded
+                ])
+            except Exception as e:
+                job.add_error(f"Payment log write failed: {e}")
+
+            enqueue_cancellation_emails([
+                {
+                    "to_email": r["passenger_email"],
+                    "booking_reference": r["booking_reference"],
+                    "passenger_name": r["passenger_name"],
+                    "refund_amount": float(r["amount"]),
+                    "currency": r["currency"],
+                }
+                for r in refunded
+            ])
+
+        job.processed += len(chunk)
+
+    job.result = {
+        "flight_id": flight_id,
+        "refunded": job.succeeded,
+        "refund_failures": job.failed,
+        "unpaid_cancelled": len(unpaid_seats),
+    }
+
+    await manager.broadcast_to_flight(
+        flight_id=flight_id,
+        message={
+            "type": "flight_cancelled",
+            "flight_id": flight_id,
+            "seat_numbers": released_seats,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    )
@@ -0,0 +1,152 @@
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import SCHEDULE_WRITE_BATCH_SIZE, SCHEDULE_DIFF_MAX_CHANGES
+from app.models.booking import Booking
+from app.models.flight import Flight
+from app.models.flight_schedule import FlightSchedule
+from app.services.seat_map_cache import seat_map_cache
+
+# Flight columns a schedule sets, besides schedule_id and departure_time;
+# arrival_time, the only one that varies by departure, last
+SCHEDULED_COLUMNS = (
+    "flight_number", "route_id", "airline_id", "aircraft_id",
+    "base_price_economy", "base_price_business", "base_price_first", "arrival_time",
+)
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def schedule_departures(schedule: FlightSchedule, start: date, end: date) -> np.ndarray:
+    """A schedule's departures (datetime64[m]) on the days in [start, end), in one vectorized pass"""
+    first = max(start, schedule.effective_from)
+    last = end if schedule.effective_to is None else min(end, schedule.effective_to + timedelta(days=1))
+    if first >= last:
+        return np.array([], dtype="datetime64[m]")
+    days = np.arange(np.datetime64(first, "D"), np.datetime64(last, "D"))
+    # Day 0 (1970-01-01) was a Thursday, ISO weekday 4
+    weekdays = (days.astype(np.int64) + 3) % 7 + 1
+    days = days[np.isin(weekdays, [int(day) for day in schedule.days_of_week])]
+    minutes = schedule.departure_time.hour * 60 + schedule.departure_time.minute
+    return days.astype("datetime64[m]") + np.timedelta64(minutes, "m")
+
+
+def _booked_flights(db: Session, flight_ids: List[int]) -> set:
+    """Which of these flights have any booking (one grouped query per chunk)"""
+    booked = set()
+    for chunk in _chunks(flight_ids, SCHEDULE_WRITE_BATCH_SIZE):
+        booked.update(
+            flight_id for (flight_id,) in db.execute(
+                select(Booking.flight_id).where(Booking.flight_id.in_(chunk)).group_by(Booking.flight_id)
+            )
+        )
+    return booked
+
+
+def materialize(
+        db: Session, schedules: Sequence[FlightSchedule], start: datetime, end: datetime, diff: bool = False,
+) -> Dict[str, Any]:
+    """
+    Make the flights of `schedules` departing in [start, end) match them
+
+    Departures are computed per schedule with numpy and compared with the
+    flights the schedules already have in the window, read in one query
+    and keyed by (schedule_id, departure_time) like the unique index.
+    Missing flights are inserted and changed ones updated in batches;
+    flights of dropped departures are deleted. Flights with bookings are
+    never deleted or moved to another aircraft: they are reported as
+    conflicts (cancel them with POST /flights/{id}/cancel). Running it
+    again changes nothing. With `diff` the changes are only reported.
+    """
+    started = time.perf_counter()
+    # Core rows, compared as tuples: a season is a few hundred thousand flights
+    existing = {}
+    columns = [getattr(Flight, column) for column in SCHEDULED_COLUMNS]
+    for chunk in _chunks([schedule.id for schedule in schedules], SCHEDULE_WRITE_BATCH_SIZE):
+        rows = db.connection().execute(
+            select(Flight.id, Flight.schedule_id, Flight.departure_time, *columns)
+            .where(Flight.schedule_id.in_(chunk), Flight.departure_time >= start, Flight.departure_time < end)
+        )
+        existing.update(((row.schedule_id, row.departure_time), row) for row in rows)
+
+    creates: List[Dict[str, Any]] = []
+    updates: List[tuple] = []  # (row, changed columns)
+    unchanged = 0
+    for schedule in schedules:
+        fixed = tuple(getattr(schedule, column) for column in SCHEDULED_COLUMNS[:-1])
+        block = timedelta(minutes=schedule.block_minutes)
+        for departure in schedule_departures(schedule, start.date(), end.date()).astype("datetime64[us]").tolist():
+            if departure < start:
+                continue
+            wanted = (*fixed, departure + block)
+            row = existing.pop((schedule.id, departure), None)
+            if row is None:
+                creates.append({**dict(zip(SCHEDULED_COLUMNS, wanted)), "schedule_id": schedule.id, "departure_time": departure})
+            elif tuple(row[3:]) == wanted:
+                unchanged += 1
+            else:
+                updates.append((row, {
+                    column: value for column, value, current in zip(SCHEDULED_COLUMNS, wanted, row[3:])
+                    if current != value
+                }))
+    # Left over: departures the schedules no longer have
+    removed = list(existing.values())
+
+    booked = _booked_flights(
+        db, [row.id for row in removed] + [row.id for row, changed in updates if "aircraft_id" in changed],
+    )
+    conflicts = []
+    for row, changed in updates:
+        if row.id in booked and "aircraft_id" in changed:
+            conflicts.append((row, "has bookings; aircraft not changed"))
+            del changed["aircraft_id"]
+    updates = [(row, changed) for row, changed in updates if changed]
+    deletes = [row for row in removed if row.id not in booked]
+    conflicts += [(row, "has bookings; cancel it instead") for row in removed if row.id in booked]
+
+    if not diff:
+        for batch in _chunks(creates, SCHEDULE_WRITE_BATCH_SIZE):
+            db.execute(insert(Flight.__table__), batch)
+        # ORM bulk UPDATE by primary key: one executemany per set of changed columns
+        for batch in _chunks([{"id": row.id, **changed} for row, changed in updates], SCHEDULE_WRITE_BATCH_SIZE):
+            db.execute(update(Flight), batch)
+        for batch in _chunks([row.id for row in deletes], SCHEDULE_WRITE_BATCH_SIZE):
+            db.execute(delete(Flight).where(Flight.id.in_(batch)))
+        db.commit()
+        # Prices or aircraft of these may have changed
+        seat_map_cache.invalidate([row.id for row, changed in updates] + [row.id for row in deletes])
+
+    result = {
+        "diff": diff,
+        "window_start": start,
+        "window_end": end,
+        "schedules": len(schedules),
+        "created": len(creates),
+        "updated": len(updates),
+        "deleted": len(deletes),
+        "unchanged": unchanged,
+        "conflicts": len(conflicts),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    if diff:
+        changes = [
+            *({"action": "conflict", "schedule_id": row.schedule_id, "departure_time": row.departure_time,
+               "flight_id": row.id, "reason": reason} for row, reason in conflicts),
+            *({"action": "delete", "schedule_id": row.schedule_id, "departure_time": row.departure_time,
+               "flight_id": row.id} for row in deletes),
+            *({"action": "update", "schedule_id": row.schedule_id, "departure_time": row.departure_time,
+               "flight_id": row.id, "changes": changed} for row, changed in updates),
+            *({"action": "create", "schedule_id": values["schedule_id"], "departure_time": values["departure_time"]}
+              for values in creates),
+        ]
+        result["changes"] = changes[:SCHEDULE_DIFF_MAX_CHANGES]
+        result["changes_truncated"] = len(changes) > SCHEDULE_DIFF_MAX_CHANGES
+    return result
@@ -0,0 +1,120 @@
+import asyncio
+import traceback
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class Job:
+    """Progress record for a long-running admin operation"""
+
+    MAX_ERRORS = 100
+
+    def __init__(self, kind: str, params: Dict[str, Any] | None = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"  # queued, running, completed, failed
+        self.total = 0
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.errors: List[str] = []
+        self.result: Dict[str, Any] = {}
+        self.created_at = datetime.utcnow()
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+
+    def add_error(self, message: str):
+        # Keep the record small for jobs touching millions of rows
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "progress": round(self.processed / self.total, 4) if self.total else None,
+            "errors": self.errors,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRegistry:
+    """
+    In-process registry of background jobs (per worker)
+
+    Jobs run as asyncio tasks on the worker that accepted the request, so
+    their status is only visible from that worker.
+    """
+
+    def __init__(self, max_jobs: int = 200):
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def create(self, kind: str, **params: Any) -> Job:
+        job = Job(kind, params)
+        self.jobs[job.id] = job
+        # Forget the oldest finished jobs
+        while len(self.jobs) > self.max_jobs:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del self.jobs[oldest_id]
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def list(self, kind: str | None = None) -> List[Job]:
+        return [job for job in reversed(self.jobs.values()) if kind is None or job.kind == kind]
+
+    def start(self, job: Job, run: Callable[[Job], Awaitable[None]]) -> Job:
+        """Run `run(job)` in the background, tracking status and failures"""
+
+        async def _runner():
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            try:
+                await run(job)
+                job.status = "completed"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.add_error("Job cancelled (server shutting down)")
+                raise
+            except Exception as e:
+                job.status = "failed"
+                job.add_error(f"{type(e).__name__}: {e}")
+                traceback.print_exc()
+            finally:
+                job.finished_at = datetime.utcnow()
+                self.tasks.pop(job.id, None)
+
+        self.tasks[job.id] = asyncio.create_task(_runner())
+        return job
+
+    def find_active(self, kind: str, **params: Any) -> Job | None:
+        for job in self.jobs.values():
+            if job.kind == kind and job.status in ("queued", "running") \
+                    and all(job.params.get(k) == v for k, v in params.items()):
+                return job
+        return None
+
+    async def shutdown(self):
+        for task in list(self.tasks.values()):
+            task.cancel()
+
+
+# Global instance
+job_registry = JobRegistry()
@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List
 from app.db.mongodb import get_database
+from app.utils.metrics import MONGO_WRITE_DURATION
+from app.utils.slow_log import track
 
 
 async def log_booking_event(
@@ -26,7 +28,8 @@ async def log_booking_event(
         "timestamp": datetime.utcnow()
     }
     
-    await db.booking_logs.insert_one(doc)
+    with MONGO_WRITE_DURATION.time("booking_logs"), track("mongo"):
+        await db.booking_logs.insert_one(doc)
 
 
 async def log_payment_event(
@@ -52,7 +55,38 @@ async def log_payment_event(
         "timestamp": datetime.utcnow()
     }
     
-    await db.payment_logs.insert_one(doc)
+    with MONGO_WRITE_DURATION.time("payment_logs"), track("mongo"):
+        await db.payment_logs.insert_one(doc)
+
+
+async def log_payment_events_bulk(events: List[Dict[str, Any]]):
+    """
+    Log many payment events in one round trip
+
+    Each event takes the same fields as log_payment_event.
+    """
+    if not events:
+        return
+
+    db = get_database()
+    now = datetime.utcnow()
+
+    docs = [
+        {
+            "payment_id": e["payment_id"],
+            "booking_id": e["booking_id"],
+            "amount": e["amount"],
+            "event_type": e["event_type"],
+            "payment_status": e["payment_status"],
+            "reason": e.get("reason"),
+            "metadata": e.get("metadata") or {},
+            "timestamp": now
+        }
+        for e in events
+    ]
+
+    with MONGO_WRITE_DURATION.time("payment_logs"), track("mongo"):
+        await db.payment_logs.insert_many(docs, ordered=False)
 
 
 async def log_user_activity(
@@ -74,7 +108,8 @@ async def log_user_activity(
         "timestamp": datetime.utcnow()
     }
     
-    await db.user_activity_logs.insert_one(doc)
+    with MONGO_WRITE_DURATION.time("user_activity_logs"), track("mongo"):
+        await db.user_activity_logs.insert_one(doc)
 
 
 async def log_system_event(
@@ -96,4 +131,46 @@ async def log_system_event(
         "timestamp": datetime.utcnow()
     }
     
-    await db.system_event_logs.insert_one(doc)
\ No newline at end of file
+    with MONGO_WRITE_DURATION.time("system_event_logs"), track("mongo"):
+        await db.system_event_logs.insert_one(doc)
+
+async def log_system_events_bulk(events: List[Dict[str, Any]]):
+    """
+    Log many system events in one round trip
+
+    Each event takes the same fields as log_system_event, plus an optional
+    timestamp and expires_at (see ensure_system_event_indexes).
+    """
+    if not events:
+        return
+
+    db = get_database()
+    now = datetime.utcnow()
+
+    docs = [
+        {
+            "level": e["level"],
+            "module_name": e["module_name"],
+            "message": e["message"],
+            "stack_trace": e.get("stack_trace"),
+            "metadata": e.get("metadata") or {},
+            "timestamp": e.get("timestamp") or now,
+            **({"expires_at": e["expires_at"]} if e.get("expires_at") else {}),
+        }
+        for e in events
+    ]
+
+    with MONGO_WRITE_DURATION.time("system_event_logs"), track("mongo"):
+        await db.system_event_logs.insert_many(docs, ordered=False)
+
+
+async def ensure_system_event_indexes():
+    """
+    Indexes for system_event_logs
+
+    The TTL index removes documents once their expires_at has passed; events
+    without expires_at (those from log_system_event) are kept.
+    """
+    db = get_database()
+    await db.system_event_logs.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+    await db.system_event_logs.create_index([("module_name", 1), ("timestamp", -1)], name="module_name_timestamp")
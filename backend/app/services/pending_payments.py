@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Set
+
+from app.db.session import SessionLocal
+from app.models.booking import Booking, BookingStatus, SEAT_HOLDING_STATUSES
+from app.models.payment import Payment, PaymentStatus
+from app.services.logging_service import log_payment_event
+from app.services.reference_cache import reference_cache
+from app.utils.gateway_resilience import GatewayUnavailable
+from app.utils.payment_gateway import get_payment_gateway, full_refund_key, PaymentResult, PaymentGatewayError
+
+EXPIRED_BEFORE_PAYMENT = "Booking expired before payment completed"
+
+# Settlements waiting on their charge (referenced so they aren't garbage collected)
+_settling: Set[asyncio.Task] = set()
+
+
+def _apply_outcome(payment_id: int, result: PaymentResult) -> Dict[str, Any] | None:
+    """
+    Record a late charge outcome on its PENDING payment; a capture confirms
+    the booking if it still holds the seat. Runs in a worker thread.
+    """
+    db = SessionLocal()
+    try:
+        payment = db.query(Payment).filter(
+            Payment.id == payment_id,
+            Payment.status == PaymentStatus.PENDING,
+        ).first()
+        if payment is None:
+            return None
+
+        seat_lost = False
+        if result.success:
+            payment.status = PaymentStatus.SUCCESS
+            payment.transaction_id = result.transaction_id
+            booking = payment.booking
+            # Conditional, like process_payment: an expired booking is not resurrected
+            confirmed = db.query(Booking).filter(
+                Booking.id == booking.id,
+                Booking.status.in_(SEAT_HOLDING_STATUSES),
+            ).update(
+                {
+                    Booking.status: BookingStatus.CONFIRMED,
+                    Booking.issued_time: datetime.utcnow(),
+                    Booking.ticket_number: f"{reference_cache.get('airlines', booking.flight.airline_id)['code']}-{booking.booking_reference}",
+                },
+                synchronize_session=False,
+            )
+            if not confirmed:
+                seat_lost = True
+                payment.failure_reason = EXPIRED_BEFORE_PAYMENT
+        else:
+            payment.status = PaymentStatus.FAILED
+            payment.failure_reason = result.error_message
+        db.commit()
+        return {
+            "payment_id": payment.id,
+            "booking_id": payment.booking_id,
+            "amount": float(payment.amount),
+            "status": payment.status,
+            "seat_lost": seat_lost,
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _record_void(payment_id: int, refund: PaymentResult | None):
+    db = SessionLocal()
+    try:
+        payment = db.query(Payment).filter(Payment.id == payment_id).first()
+        if refund is not None and refund.success:
+            payment.status = PaymentStatus.REFUNDED
+            payment.refund_transaction_id = refund.transaction_id
+        else:
+            payment.failure_reason = f"{EXPIRED_BEFORE_PAYMENT}; automatic refund failed"
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _settle(payment_id: int, outcome: asyncio.Future):
+    try:
+        result: PaymentResult = await outcome
+    except PaymentGatewayError:
+        result = PaymentResult(
+            success=False,
+            error_message="Payment gateway error",
+            gateway_response={"code": "gateway_error"}
+        )
+    try:
+        await _record(payment_id, result)
+    except Exception as e:
+        print(f"❌ Settling payment {payment_id} failed: {e}")
+
+
+async def _record(payment_id: int, result: PaymentResult):
+    settled = await asyncio.to_thread(_apply_outcome, payment_id, result)
+    if settled is None:
+        return
+
+    refund = None
+    if settled["seat_lost"]:
+        # Void the charge: the booking it paid for is gone
+        try:
+            refund = await get_payment_gateway().refund(
+                transaction_id=result.transaction_id,
+                amount=settled["amount"],
+                idempotency_key=full_refund_key(result.transaction_id),
+            )
+        except GatewayUnavailable:
+            refund = None
+        await asyncio.to_thread(_record_void, payment_id, refund)
+
+    status = settled["status"]
+    if refund is not None and refund.success:
+        status = PaymentStatus.REFUNDED
+    print(f"⏱️ Payment {payment_id} settled after gateway timeout: {status.value}")
+    await log_payment_event(
+        payment_id=payment_id,
+        booking_id=settled["booking_id"],
+        amount=settled["amount"],
+        event_type="captured" if result.success else "failed",
+        payment_status=status.value,
+        reason=result.error_message if not result.success else (EXPIRED_BEFORE_PAYMENT if settled["seat_lost"] else None),
+        metadata={"transaction_id": result.transaction_id, "settled_late": True}
+    )
+
+
+def settle_late_charge(payment_id: int, outcome: asyncio.Future):
+    """
+    Resolve a PENDING payment once its timed-out charge call answers
+
+    A capture confirms the booking, or is refunded if the booking lost its
+    seat meanwhile; a decline fails the payment (the booking stays PENDING
+    until its deadline, so it can be paid again). If the process stops
+    first the payment stays PENDING.
+    """
+    task = asyncio.create_task(_settle(payment_id, outcome))
+    _settling.add(task)
+    task.add_done_callback(_settling.discard)
@@ -0,0 +1,242 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Sequence
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    SECRET_KEY,
+    PRICING_CACHE_TTL_SECONDS,
+    PRICING_CACHE_MAX_FLIGHTS,
+    FARE_QUOTE_TTL_SECONDS,
+    FARE_QUOTE_EXPIRY_STEP_SECONDS,
+)
+from app.models.booking import Booking, SEAT_HOLDING_STATUSES
+from app.models.flight import Flight
+from app.services.reference_cache import reference_cache
+from app.utils.metrics import metrics
+
+CABINS = ("economy", "business", "first")
+
+# Fare buckets: a multiplier applies from its lower bound up to the next one.
+# Steps rather than a curve, so a quoted fare survives most other bookings.
+LOAD_FACTOR_BANDS = np.array([0.0, 0.5, 0.7, 0.85, 0.95])
+LOAD_FACTOR_MULTIPLIERS = np.array([0.9, 1.0, 1.15, 1.35, 1.6])
+DAYS_OUT_BANDS = np.array([0.0, 3.0, 7.0, 14.0, 30.0])
+DAYS_OUT_MULTIPLIERS = np.array([1.5, 1.3, 1.15, 1.0, 0.9])
+
+FARE_CACHE_LOOKUPS = metrics.counter(
+    "fare_cache_lookups_total", "Per-flight fare table lookups by cache result (hit, miss)", ("result",),
+)
+FARE_QUOTE_CHECKS = metrics.counter(
+    "fare_quote_checks_total", "Fare quotes presented with bookings by result (honoured, expired, invalid)", ("result",),
+)
+
+# Derived, so a fare quote can never pass as another token signed with SECRET_KEY
+_QUOTE_KEY = hmac.new(SECRET_KEY.encode(), b"fare-quote", hashlib.sha256).digest()
+
+
+def fare_table(
+    base_prices: np.ndarray,
+    price_factors: np.ndarray,
+    booked: np.ndarray,
+    capacity: np.ndarray,
+    days_out: np.ndarray,
+) -> np.ndarray:
+    """
+    Fares (n flights x CABINS) in one vectorized pass
+
+    base_prices holds base_price_economy/business/first per flight, NaN where
+    a cabin has no base price: it is then priced like the cabin below it.
+    """
+    base = base_prices.copy()
+    base[:, 1] = np.where(np.isnan(base[:, 1]), base[:, 0], base[:, 1])
+    base[:, 2] = np.where(np.isnan(base[:, 2]), base[:, 1], base[:, 2])
+
+    load = np.clip(booked / np.maximum(capacity, 1), 0.0, 1.0)
+    load_multiplier = LOAD_FACTOR_MULTIPLIERS[np.searchsorted(LOAD_FACTOR_BANDS, load, side="right") - 1]
+    days = np.maximum(days_out, 0.0)
+    days_multiplier = DAYS_OUT_MULTIPLIERS[np.searchsorted(DAYS_OUT_BANDS, days, side="right") - 1]
+
+    return np.round(base * (price_factors * load_multiplier * days_multiplier)[:, None], 2)
+
+
+# ── Fare quotes ──
+
+def _quote_signature(payload: str) -> str:
+    return hmac.new(_QUOTE_KEY, payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def quote_expiry() -> int:
+    """
+    Expiry (unix time) of a quote signed now: FARE_QUOTE_TTL_SECONDS ahead,
+    rounded up to a whole FARE_QUOTE_EXPIRY_STEP_SECONDS
+    """
+    step = max(1, FARE_QUOTE_EXPIRY_STEP_SECONDS)
+    return -(-(int(time.time()) + FARE_QUOTE_TTL_SECONDS) // step) * step
+
+
+def sign_fare_quote(flight_id: int, fares: Sequence[float], expires_at: int, rates_version: str) -> str:
+    """
+    Quote token for a flight's fares (base currency, in CABINS order),
+    honoured until `expires_at` (unix time) and converted to other
+    currencies at exchange rates `rates_version`
+    """
+    cents = ".".join(str(round(fare * 100)) for fare in fares)
+    payload = f"{flight_id}.{expires_at}.{rates_version}.{cents}"
+    return f"{payload}.{_quote_signature(payload)}"
+
+
+class FareQuote(NamedTuple):
+    flight_id: int
+    expires_at: int
+    rates_version: str
+    fares: Dict[str, Decimal]
+
+
+def verify_fare_quote(token: str) -> FareQuote | None:
+    """The quote if its signature is valid; expiry is the caller's to check"""
+    # Quotes are ASCII; compare_digest would raise on anything else
+    if not token.isascii():
+        return None
+    payload, _, signature = token.rpartition(".")
+    if not hmac.compare_digest(signature.encode(), _quote_signature(payload).encode()):
+        return None
+    try:
+        flight_id, expires_at, rates_version, *cents = payload.split(".")
+        quote = FareQuote(
+            int(flight_id), int(expires_at), rates_version,
+            {cabin: Decimal(int(c)).scaleb(-2) for cabin, c in zip(CABINS, cents)},
+        )
+    except ValueError:
+        return None
+    return quote if len(cents) == len(CABINS) else None
+
+
+class FlightFares:
+    """A flight's fare per cabin and the seat count it was priced at"""
+
+    __slots__ = ("flight_id", "version", "built_at", "booked", "fares", "_quote_token", "_rates_version")
+
+    def __init__(self, flight_id: int, version: int, booked: int, fares: Dict[str, float]):
+        self.flight_id = flight_id
+        self.version = version
+        self.built_at = time.monotonic()
+        self.booked = booked
+        self.fares = fares
+        self._quote_token: str | None = None
+        self._rates_version: str | None = None
+
+    def quote_token(self, rates_version: str) -> str:
+        """Signed quote of these fares; signed once per entry and rates version, so cache hits don't pay for it"""
+        if self._rates_version != rates_version:
+            self._quote_token = sign_fare_quote(
+                self.flight_id, [self.fares[cabin] for cabin in CABINS],
+                quote_expiry(), rates_version,
+            )
+            self._rates_version = rates_version
+        return self._quote_token
+
+
+class FareEngine:
+    """
+    Server-side fares from base price, airline price_factor, load factor and
+    days to departure
+
+    Fare tables are cached per flight with the flight's inventory version,
+    which is bumped through `invalidate` whenever its bookings change
+    (seat_map_cache forwards its invalidations here) or an admin edits the
+    flight. Versions are per worker, so entries also expire after
+    PRICING_CACHE_TTL_SECONDS; that also moves fares into the next
+    days-to-departure bucket. Airline price_factor edits clear the cache.
+    """
+
+    def __init__(self, ttl: float = PRICING_CACHE_TTL_SECONDS, max_flights: int = PRICING_CACHE_MAX_FLIGHTS):
+        self.ttl = ttl
+        self.max_flights = max_flights
+        self._entries: "OrderedDict[int, FlightFares]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, flight_ids: Iterable[int]):
+        with self._lock:
+            for flight_id in flight_ids:
+                self._versions[flight_id] = self._versions.get(flight_id, 0) + 1
+                self._entries.pop(flight_id, None)
+
+    def clear(self, _snapshot=None):
+        with self._lock:
+            self._entries.clear()
+
+    def price(self, flights: Sequence[Flight], booked: Sequence[int]) -> np.ndarray:
+        """Fare table for `flights` given their booked seat counts (uncached)"""
+        base_prices = np.array([
+            [float(price) if price is not None else np.nan
+             for price in (f.base_price_economy, f.base_price_business, f.base_price_first)]
+            for f in flights
+        ], dtype=float).reshape(len(flights), len(CABINS))
+        price_factors = np.array(
+            [reference_cache.get("airlines", f.airline_id)["price_factor"] or 1.0 for f in flights], dtype=float,
+        )
+        capacity = np.array(
+            [reference_cache.get("aircraft", f.aircraft_id)["total_capacity"] for f in flights], dtype=float,
+        )
+        departures = np.array([f.departure_time for f in flights], dtype="datetime64[s]")
+        days_out = (departures - np.datetime64(datetime.utcnow(), "s")) / np.timedelta64(1, "D")
+        return fare_table(base_prices, price_factors, np.asarray(booked, dtype=float), capacity, days_out)
+
+    def quote(self, db: Session, flights: List[Flight]) -> Dict[int, FlightFares]:
+        """
+        Fares for many flights: cached tables where current, the rest priced
+        in one batch after one grouped booked-seat count query
+        """
+        now = time.monotonic()
+        quotes: Dict[int, FlightFares] = {}
+        missing: List[Flight] = []
+        for flight in flights:
+            entry = self._entries.get(flight.id)
+            if entry is None or entry.version != self._versions.get(flight.id, 0) or now - entry.built_at >= self.ttl:
+                missing.append(flight)
+            else:
+                quotes[flight.id] = entry
+        FARE_CACHE_LOOKUPS.inc("hit", amount=len(quotes))
+        if not missing:
+            return quotes
+        FARE_CACHE_LOOKUPS.inc("miss", amount=len(missing))
+
+        # Versions are read before counting: a booking committed meanwhile
+        # bumps them, so the new entries are already outdated, never stale
+        ids = [flight.id for flight in missing]
+        versions = [self._versions.get(flight_id, 0) for flight_id in ids]
+        counts = dict(
+            db.query(Booking.flight_id, func.count(Booking.id))
+            .filter(Booking.flight_id.in_(ids), Booking.status.in_(SEAT_HOLDING_STATUSES))
+            .group_by(Booking.flight_id)
+            .all()
+        )
+        booked = [counts.get(flight_id, 0) for flight_id in ids]
+        table = self.price(missing, booked).tolist()
+
+        with self._lock:
+            for flight_id, version, seats, row in zip(ids, versions, booked, table):
+                entry = FlightFares(flight_id, version, seats, dict(zip(CABINS, row)))
+                quotes[flight_id] = self._entries[flight_id] = entry
+                self._entries.move_to_end(flight_id)
+            while len(self._entries) > self.max_flights:
+                self._entries.popitem(last=False)
+        return quotes
+
+    def fare(self, db: Session, flight: Flight, cabin: str) -> float:
+        return self.quote(db, [flight])[flight.id].fares[cabin]
+
+
+# Global instance
+fare_engine = FareEngine()
+reference_cache.subscribe("airlines", fare_engine.clear)
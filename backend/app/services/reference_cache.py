@@ -0,0 +1,190 @@
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_right
+from typing import Any, Callable, Collection, Dict, FrozenSet, List, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.config import REFERENCE_CACHE_TTL_SECONDS
+from app.db.session import SessionLocal
+from app.models.aircraft import Aircraft
+from app.models.airline import Airline
+from app.models.airport import Airport
+from app.models.route import Route
+from app.schemas.aircraft import AircraftOut
+from app.schemas.airline import AirlineOut
+from app.schemas.airport import AirportOut
+from app.schemas.route import RouteOut
+from app.utils.streaming import next_page_headers
+
+
+class _Snapshot:
+    """One immutable, pre-serialized copy of a reference table"""
+
+    __slots__ = ("items", "ids", "by_id", "body", "etag", "loaded_at", "index")
+
+    def __init__(self, kind: str, items: List[Dict[str, Any]], body: bytes):
+        self.items = items
+        self.ids = [item["id"] for item in items]  # ascending, for keyset paging
+        self.by_id = {item["id"]: item for item in items}
+        self.body = body
+        # Content hash, so every worker serving the same data agrees on the ETag
+        self.etag = f'"{kind}-{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.loaded_at = time.monotonic()
+        self.index: Dict[Any, Any] = {}
+
+
+def seat_numbers(seat_map: Dict[str, Any]) -> FrozenSet[str]:
+    """All seat numbers defined in an aircraft seat map"""
+    return frozenset(
+        seat["number"]
+        for row in seat_map.get("rows", [])
+        for seat in row.get("seats", [])
+    )
+
+
+def seat_cabins(seat_map: Dict[str, Any]) -> Dict[str, str]:
+    """Cabin (the row's class, economy if unset) of every seat in an aircraft seat map"""
+    return {
+        seat["number"]: row.get("class", "economy")
+        for row in seat_map.get("rows", [])
+        for seat in row.get("seats", [])
+    }
+
+
+class ReferenceDataCache:
+    """
+    In-process cache of airlines, airports, aircraft and routes
+
+    Each table is loaded once, serialized to JSON once and kept with an ETag
+    until an admin CRUD route invalidates it (or REFERENCE_CACHE_TTL_SECONDS
+    passes, which bounds staleness on other workers). Snapshots are never
+    mutated, only swapped, so readers don't need the lock.
+    """
+
+    KINDS = {
+        "airlines": (Airline, AirlineOut),
+        "airports": (Airport, AirportOut),
+        "aircraft": (Aircraft, AircraftOut),
+        "routes": (Route, RouteOut),
+    }
+
+    def __init__(self, ttl: float = REFERENCE_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._listeners: Dict[str, List[Callable[[_Snapshot], None]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, kind: str, callback: Callable[[_Snapshot], None]):
+        """Call `callback(snapshot)` whenever `kind` is (re)loaded"""
+        self._listeners.setdefault(kind, []).append(callback)
+
+    def load_all(self):
+        for kind in self.KINDS:
+            self._load(kind)
+        print(f"✅ Reference data cached ({', '.join(f'{k}: {len(s.items)}' for k, s in self._snapshots.items())})")
+
+    def invalidate(self, kind: str):
+        """Drop a table after it was changed; the next read reloads it"""
+        self._snapshots.pop(kind, None)
+
+    def _load(self, kind: str) -> _Snapshot:
+        model, schema = self.KINDS[kind]
+        db = SessionLocal()
+        try:
+            rows = db.query(model).order_by(model.id).all()
+            models = [schema.model_validate(row) for row in rows]
+        finally:
+            db.close()
+
+        items = [m.model_dump(mode="json") for m in models]
+        snapshot = _Snapshot(kind, items, TypeAdapter(list[schema]).dump_json(models))
+        if kind == "airports":
+            snapshot.index = {item["iata_code"].upper(): item for item in items}
+        elif kind == "routes":
+            pairs: Dict[Tuple[int, int], List[int]] = {}
+            for item in items:
+                pairs.setdefault((item["source_airport_id"], item["destination_airport_id"]), []).append(item["id"])
+            snapshot.index = pairs
+        elif kind == "aircraft":
+            snapshot.index = {item["id"]: seat_cabins(item["seat_map"]) for item in items}
+
+        self._snapshots[kind] = snapshot
+        for callback in self._listeners.get(kind, []):
+            callback(snapshot)
+        return snapshot
+
+    def snapshot(self, kind: str) -> _Snapshot:
+        snapshot = self._snapshots.get(kind)
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            return snapshot
+        with self._lock:
+            # Another thread may have reloaded it while we waited
+            snapshot = self._snapshots.get(kind)
+            if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+                return snapshot
+            return self._load(kind)
+
+    def get(self, kind: str, item_id: int) -> Dict[str, Any] | None:
+        """
+        Row by id. A miss reloads the table once, since ids referenced from
+        other tables (e.g. a flight's airline) may have been created on
+        another worker.
+        """
+        item = self.snapshot(kind).by_id.get(item_id)
+        if item is None:
+            with self._lock:
+                item = self._load(kind).by_id.get(item_id)
+        return item
+
+    def airport_by_iata(self, iata_code: str) -> Dict[str, Any] | None:
+        return self.snapshot("airports").index.get(iata_code.upper())
+
+    def route_ids_between(self, source_airport_id: int, destination_airport_id: int) -> List[int]:
+        return self.snapshot("routes").index.get((source_airport_id, destination_airport_id), [])
+
+    def valid_seats(self, aircraft_id: int) -> Collection[str]:
+        if self.get("aircraft", aircraft_id) is None:
+            return frozenset()
+        return self.snapshot("aircraft").index.get(aircraft_id, {}).keys()
+
+    def seat_cabin(self, aircraft_id: int, seat_number: str) -> str | None:
+        """Cabin of a seat, or None if the aircraft has no such seat"""
+        if self.get("aircraft", aircraft_id) is None:
+            return None
+        return self.snapshot("aircraft").index.get(aircraft_id, {}).get(seat_number)
+
+    def list_response(
+        self,
+        request: Request,
+        kind: str,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> Response:
+        """
+        Pre-serialized list body with an ETag; 304 if the client's copy is current
+
+        With `after_id`/`limit` a keyset page of the cached rows is returned
+        instead, with X-Next-After-Id on full pages.
+        """
+        snapshot = self.snapshot(kind)
+        if after_id is not None or limit is not None:
+            start = bisect_right(snapshot.ids, after_id) if after_id is not None else 0
+            items = snapshot.items[start:start + limit] if limit is not None else snapshot.items[start:]
+            headers = next_page_headers(items, limit) if limit is not None else {}
+            return Response(content=json.dumps(items), media_type="application/json", headers=headers)
+
+        headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if snapshot.etag in tags or "*" in tags:
+                return Response(status_code=304, headers=headers)
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+# Global instance
+reference_cache = ReferenceDataCache()
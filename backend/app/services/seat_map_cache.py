@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Set
+
+import brotli
+import orjson
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    BASE_CURRENCY,
+    SEAT_MAP_CACHE_TTL_SECONDS,
+    SEAT_MAP_CACHE_MAX_FLIGHTS,
+)
+from app.services.currency import currency_rates
+from app.db.session import SessionLocal
+from app.models.booking import Booking, SEAT_HOLDING_STATUSES
+from app.models.flight import Flight
+from app.services.pricing import fare_engine, sign_fare_quote, quote_expiry, CABINS
+from app.services.reference_cache import reference_cache
+from app.utils.metrics import metrics
+
+SEAT_MAP_REQUESTS = metrics.counter(
+    "seat_map_cache_requests_total", "Seat-map requests by cache result (not_modified, hit, miss)", ("result",),
+)
+
+
+def seat_map_payload(db: Session, flight_id: int) -> Dict[str, Any]:
+    """Seat map of a flight's aircraft with each seat's availability, the current fare per cabin and its quote"""
+    flight = db.query(Flight).filter(Flight.id == flight_id).first()
+    if not flight:
+        raise HTTPException(status_code=404, detail="Flight not found")
+
+    booked = {
+        seat for (seat,) in db.query(Booking.seat_number).filter(
+            Booking.flight_id == flight_id,
+            Booking.status.in_(SEAT_HOLDING_STATUSES),
+        )
+    }
+    aircraft = reference_cache.get("aircraft", flight.aircraft_id)
+    # Copies: the cached aircraft layout is shared and never modified
+    layout = aircraft["seat_map"]
+    seat_map = {
+        **layout,
+        "rows": [
+            {**row, "seats": [{**seat, "available": seat["number"] not in booked} for seat in row.get("seats", [])]}
+            for row in layout.get("rows", [])
+        ],
+    } if "rows" in layout else layout
+    cabins = {row.get("class", "economy") for row in layout.get("rows", [])} or {"economy"}
+    fares = fare_engine.price([flight], [len(booked)])[0].tolist()
+
+    return {
+        "flight_id": flight_id,
+        "flight_number": flight.flight_number,
+        "aircraft_model": aircraft["model"],
+        "total_capacity": aircraft["total_capacity"],
+        "booked_seats": len(booked),
+        "currency": BASE_CURRENCY,
+        "fares": {cabin: fare for cabin, fare in zip(CABINS, fares) if cabin in cabins},
+        # Expiry rounded up to a step: rebuilding an unchanged map within it
+        # yields the same bytes, so the content-hash ETag holds
+        "fare_quote": sign_fare_quote(flight_id, fares, quote_expiry(), currency_rates.snapshot().version),
+        "seat_map": seat_map,
+    }
+
+
+class _Entry:
+    """One serialized seat map; compressed variants are added on first use"""
+
+    __slots__ = ("version", "body", "etag", "built_at", "encoded")
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        # Content hash, so workers holding the same seat map agree on the ETag
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.built_at = time.monotonic()
+        self.encoded: Dict[str, bytes] = {"identity": body}
+
+    def encode(self, encoding: str) -> bytes:
+        data = self.encoded.get(encoding)
+        if data is None:
+            if encoding == "br":
+                data = brotli.compress(self.body, quality=5)
+            else:
+                data = gzip.compress(self.body, compresslevel=6)
+            self.encoded[encoding] = data
+        return data
+
+
+def _preferred_encoding(accept_encoding: str) -> str:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            weight = float(q) if q else 1.0
+        except ValueError:
+            weight = 1.0
+        if weight > 0:
+            accepted.add(coding.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return "identity"
+
+
+class SeatMapCache:
+    """
+    Serialized, precompressed seat maps keyed by (flight_id, inventory version)
+
+    A flight's inventory version is bumped after every commit that adds,
+    changes or deletes one of its bookings (session events), and by the bulk
+    UPDATEs that release seats (expiry sweeper, flight cancellation), which
+    call `invalidate` themselves. Versions are per worker, so an entry also
+    expires after SEAT_MAP_CACHE_TTL_SECONDS to bound staleness against
+    bookings made on other workers. A request whose If-None-Match matches a
+    current entry gets a 304 without touching the database.
+    """
+
+    def __init__(self, ttl: float = SEAT_MAP_CACHE_TTL_SECONDS, max_flights: int = SEAT_MAP_CACHE_MAX_FLIGHTS):
+        self.ttl = ttl
+        self.max_flights = max_flights
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, flight_ids: Iterable[int]):
+        """These flights' bookings changed: drop their seat maps and fare tables"""
+        flight_ids = list(flight_ids)
+        fare_engine.invalidate(flight_ids)
+        with self._lock:
+            for flight_id in flight_ids:
+                self._versions[flight_id] = self._versions.get(flight_id, 0) + 1
+                self._entries.pop(flight_id, None)
+
+    def _current(self, flight_id: int) -> _Entry | None:
+        entry = self._entries.get(flight_id)
+        if entry is None or entry.version != self._versions.get(flight_id, 0) \
+                or time.monotonic() - entry.built_at >= self.ttl:
+            return None
+        return entry
+
+    def _build(self, db: Session, flight_id: int) -> _Entry:
+        # Read the version first: a booking committed while building bumps
+        # it, so the entry is already outdated rather than stale
+        version = self._versions.get(flight_id, 0)
+        entry = _Entry(version, orjson.dumps(seat_map_payload(db, flight_id)))
+        with self._lock:
+            self._entries[flight_id] = entry
+            self._entries.move_to_end(flight_id)
+            while len(self._entries) > self.max_flights:
+                self._entries.popitem(last=False)
+        return entry
+
+    def response(self, request: Request, db: Session, flight_id: int) -> Response:
+        entry = self._current(flight_id)
+        result = "hit"
+        if entry is None:
+            entry = self._build(db, flight_id)
+            result = "miss"
+
+        encoding = _preferred_encoding(request.headers.get("accept-encoding", ""))
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        # Strong ETag per content coding; any coding of the same map matches
+        headers = {
+            "ETag": f'"seats-{flight_id}-{entry.etag}{suffix}"',
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            prefix = f'"seats-{flight_id}-{entry.etag}'
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            if "*" in tags or any(tag.startswith(prefix) for tag in tags):
+                SEAT_MAP_REQUESTS.inc("not_modified")
+                return Response(status_code=304, headers=headers)
+
+        SEAT_MAP_REQUESTS.inc(result)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=entry.encode(encoding), media_type="application/json", headers=headers)
+
+
+# Global instance
+seat_map_cache = SeatMapCache()
+
+
+# Flights whose bookings changed in a session; applied once the commit succeeds
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_changed_flights(session, flush_context):
+    changed: Set[int] = session.info.setdefault("seat_map_flights", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Booking) and obj.flight_id is not None:
+            changed.add(obj.flight_id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_changed_flights(session):
+    changed = session.info.pop("seat_map_flights", None)
+    if changed:
+        seat_map_cache.invalidate(changed)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_changed_flights(session):
+    session.info.pop("seat_map_flights", None)
@@ -0,0 +1,186 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Deque, Dict, Optional
+
+from app.core.config import (
+    BOOKING_ADMISSION_CONCURRENCY,
+    BOOKING_ADMISSION_QUEUE_SIZE,
+    BOOKING_ADMISSION_MAX_WAIT_SECONDS,
+    BOOKING_ADMISSION_BROADCAST_INTERVAL,
+)
+from app.utils.websocket_manager import manager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or wait too long)"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("future", "token")
+
+    def __init__(self, future: asyncio.Future, token: Optional[str]):
+        self.future = future
+        self.token = token
+
+
+class _FlightGate:
+    """Concurrency slots plus FIFO waiting room for a single flight"""
+
+    def __init__(self):
+        self.active = 0
+        self.waiters: Deque[_Waiter] = deque()
+        # Exponentially weighted average of how long a slot is held (seconds)
+        self.avg_hold = 0.5
+        self.broadcast_pending = False
+
+
+class AdmissionController:
+    """
+    Per-flight admission control for booking endpoints
+
+    At most `concurrency` requests per flight run at once. Further requests
+    wait in a FIFO queue (slots are handed over directly, so nobody can cut
+    the line). When the queue is full the request is shed immediately with
+    a Retry-After estimate instead of piling up on the DB pool.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = BOOKING_ADMISSION_CONCURRENCY,
+        queue_size: int = BOOKING_ADMISSION_QUEUE_SIZE,
+        max_wait: float = BOOKING_ADMISSION_MAX_WAIT_SECONDS,
+        broadcast_interval: float = BOOKING_ADMISSION_BROADCAST_INTERVAL,
+    ):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.broadcast_interval = broadcast_interval
+        # flight_id -> gate (removed again once idle)
+        self.gates: Dict[int, _FlightGate] = {}
+
+    def _retry_after(self, gate: _FlightGate) -> int:
+        """Estimate seconds until a newly arriving request could be served"""
+        backlog = len(gate.waiters) + 1
+        return max(1, math.ceil(backlog * gate.avg_hold / self.concurrency))
+
+    async def acquire(self, flight_id: int, token: Optional[str] = None):
+        gate = self.gates.get(flight_id)
+        if gate is None:
+            gate = self.gates[flight_id] = _FlightGate()
+
+        # Fast path: free slot and nobody queued ahead of us
+        if gate.active < self.concurrency and not gate.waiters:
+            gate.active += 1
+            return
+
+        if len(gate.waiters) >= self.queue_size:
+            raise AdmissionRejected(
+                "Booking queue for this flight is full, please retry shortly",
+                retry_after=self._retry_after(gate),
+            )
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), token)
+        gate.waiters.append(waiter)
+        self._schedule_broadcast(flight_id, gate)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was handed to us just as we gave up - pass it on
+                self.release(flight_id)
+            else:
+                waiter.future.cancel()
+                try:
+                    gate.waiters.remove(waiter)
+                except ValueError:
+                    pass
+                self._schedule_broadcast(flight_id, gate)
+                self._discard_if_idle(flight_id, gate)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            raise AdmissionRejected(
+                "Timed out waiting in the booking queue, please retry shortly",
+                retry_after=self._retry_after(gate),
+            )
+
+    def release(self, flight_id: int, held_for: float | None = None):
+        gate = self.gates.get(flight_id)
+        if gate is None:
+            return
+
+        if held_for is not None:
+            gate.avg_hold = 0.8 * gate.avg_hold + 0.2 * held_for
+
+        # Hand the slot straight to the next live waiter (FIFO fairness)
+        while gate.waiters:
+            waiter = gate.waiters.popleft()
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                self._schedule_broadcast(flight_id, gate)
+                return
+
+        gate.active -= 1
+        self._discard_if_idle(flight_id, gate)
+
+    @asynccontextmanager
+    async def admit(self, flight_id: int, token: Optional[str] = None):
+        """Hold a booking slot for `flight_id` for the duration of the block"""
+        await self.acquire(flight_id, token)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(flight_id, time.monotonic() - started)
+
+    def queue_length(self, flight_id: int) -> int:
+        gate = self.gates.get(flight_id)
+        return len(gate.waiters) if gate else 0
+
+    def _discard_if_idle(self, flight_id: int, gate: _FlightGate):
+        if gate.active <= 0 and not gate.waiters and not gate.broadcast_pending:
+            if self.gates.get(flight_id) is gate:
+                del self.gates[flight_id]
+
+    def _schedule_broadcast(self, flight_id: int, gate: _FlightGate):
+        """Coalesce queue updates so a busy flight gets at most one per interval"""
+        if gate.broadcast_pending:
+            return
+        gate.broadcast_pending = True
+        asyncio.get_running_loop().call_later(
+            self.broadcast_interval,
+            lambda: asyncio.ensure_future(self._broadcast_queue(flight_id, gate)),
+        )
+
+    async def _broadcast_queue(self, flight_id: int, gate: _FlightGate):
+        gate.broadcast_pending = False
+        positions = {}
+        for position, waiter in enumerate(gate.waiters, start=1):
+            if waiter.token and not waiter.future.done():
+                positions[waiter.token] = position
+
+        await manager.broadcast_to_flight(
+            flight_id=flight_id,
+            message={
+                "type": "queue_update",
+                "flight_id": flight_id,
+                "waiting": len(gate.waiters),
+                "in_progress": gate.active,
+                "estimated_wait_seconds": self._retry_after(gate),
+                "positions": positions,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        )
+        self._discard_if_idle(flight_id, gate)
+
+
+# Global instance
+admission_controller = AdmissionController()
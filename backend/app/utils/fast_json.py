@@ -0,0 +1,40 @@
+from decimal import Decimal
+from typing import Any, Dict
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.core.config import FAST_JSON_RESPONSES
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson
+
+    Datetimes, enums and dataclasses are encoded natively (UTC as "Z", like
+    pydantic), Decimals as floats.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_response(payload: Any, headers: Dict[str, str] | None = None) -> Any:
+    """
+    Send an internally built payload without re-validating it
+
+    FastAPI skips response_model validation and jsonable_encoder when an
+    endpoint returns a Response, so the payload must already have exactly
+    the model's fields and types; the response_model stays on the route for
+    the OpenAPI schema. With FAST_JSON_RESPONSES off the payload is returned
+    as is and goes through FastAPI's usual validation.
+    """
+    if not FAST_JSON_RESPONSES:
+        return payload
+    return FastJSONResponse(payload, headers=headers)
@@ -0,0 +1,276 @@
+import asyncio
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict
+
+from app.core.config import (
+    PAYMENT_GATEWAY_TIMEOUT_SECONDS,
+    PAYMENT_GATEWAY_MAX_CONCURRENCY,
+    PAYMENT_GATEWAY_QUEUE_TIMEOUT_SECONDS,
+    PAYMENT_GATEWAY_BREAKER_THRESHOLD,
+    PAYMENT_GATEWAY_BREAKER_RESET_SECONDS,
+    PAYMENT_GATEWAY_MAX_RETRIES,
+    PAYMENT_GATEWAY_HEDGE_AFTER_SECONDS,
+)
+from app.utils.metrics import GATEWAY_CALL_DURATION
+from app.utils.slow_log import track
+from app.utils.payment_gateway import PaymentGateway, PaymentResult, PaymentGatewayError, GatewayTransaction
+
+
+class GatewayUnavailable(Exception):
+    """Raised instead of calling the gateway when it is known to be degraded"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GatewayTimeout(Exception):
+    """A single gateway call exceeded its deadline"""
+
+    def __init__(self, message: str, call: asyncio.Future | None = None):
+        super().__init__(message)
+        # The call itself, still running in its thread
+        self.call = call
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed    -> calls flow; `threshold` failures in a row open the circuit
+    open      -> calls fail fast until `reset_timeout` has passed
+    half_open -> one probe call is let through; success closes, failure reopens
+    """
+
+    def __init__(
+        self,
+        threshold: int = PAYMENT_GATEWAY_BREAKER_THRESHOLD,
+        reset_timeout: float = PAYMENT_GATEWAY_BREAKER_RESET_SECONDS,
+    ):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 1
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            # (Re)open - a failed half-open probe restarts the cool-down
+            self.opened_at = time.monotonic()
+
+
+class ResilientPaymentGateway:
+    """
+    Async client wrapping a (blocking) PaymentGateway with:
+
+    - per-call timeouts
+    - a bulkhead: at most `max_concurrency` calls in flight, run on a
+      dedicated thread pool so a stalled gateway cannot starve the
+      threadpool used by sync endpoints
+    - a circuit breaker that fails fast while the gateway is degraded
+    - retries with backoff and request hedging, for idempotent operations only
+      (refunds carry an idempotency key, lookups are reads; charges are
+      never retried)
+    """
+
+    def __init__(
+        self,
+        gateway: PaymentGateway,
+        timeout: float = PAYMENT_GATEWAY_TIMEOUT_SECONDS,
+        max_concurrency: int = PAYMENT_GATEWAY_MAX_CONCURRENCY,
+        queue_timeout: float = PAYMENT_GATEWAY_QUEUE_TIMEOUT_SECONDS,
+        max_retries: int = PAYMENT_GATEWAY_MAX_RETRIES,
+        hedge_after: float | None = PAYMENT_GATEWAY_HEDGE_AFTER_SECONDS,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.gateway = gateway
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after or None
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="payment-gateway"
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _call(self, fn: Callable[..., Any], **kwargs: Any) -> Any:
+        """One guarded gateway call: breaker check, bulkhead slot, deadline"""
+        if not self.breaker.allow():
+            raise GatewayUnavailable(
+                "Payment gateway temporarily unavailable",
+                retry_after=self.breaker.retry_after(),
+            )
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Saturation is not the gateway's fault - don't trip the breaker
+            self.breaker.probe_in_flight = False
+            raise GatewayUnavailable("Payment gateway is at capacity", retry_after=1)
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        started = time.perf_counter()
+        future = loop.run_in_executor(self._executor, partial(fn, **kwargs))
+
+        def _free_slot(done):
+            # The slot is held until the thread actually finishes, so calls
+            # that outlive their deadline still count against the bulkhead
+            self.in_flight -= 1
+            self._slots.release()
+            outcome = "error" if done.cancelled() or done.exception() is not None else "ok"
+            GATEWAY_CALL_DURATION.observe(time.perf_counter() - started, fn.__name__, outcome)
+
+        future.add_done_callback(_free_slot)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            raise GatewayTimeout(f"Gateway call exceeded {self.timeout:.1f}s", call=future)
+        except PaymentGatewayError:
+            self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            # e.g. the losing copy of a hedged request - let another probe through
+            self.breaker.probe_in_flight = False
+            raise
+
+        if isinstance(result, PaymentResult) and result.gateway_response.get("code") == "timeout":
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return result
+
+    async def _call_idempotent(self, fn: Callable[..., Any], **kwargs: Any) -> Any:
+        """Retry (with jittered backoff) and optionally hedge an idempotent call"""
+        attempt = 0
+        while True:
+            try:
+                if self.hedge_after:
+                    return await self._hedged(fn, **kwargs)
+                return await self._call(fn, **kwargs)
+            except (GatewayTimeout, PaymentGatewayError):
+                if attempt >= self.max_retries:
+                    raise
+            attempt += 1
+            await asyncio.sleep(min(2.0, 0.1 * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+    async def _hedged(self, fn: Callable[..., Any], **kwargs: Any) -> Any:
+        """Send a second copy if the first is slower than `hedge_after`; first answer wins"""
+        first = asyncio.ensure_future(self._call(fn, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            return first.result()
+
+        second = asyncio.ensure_future(self._call(fn, **kwargs))
+        pending = {first, second}
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def charge(self, **kwargs: Any) -> PaymentResult:
+        """
+        Charge a card. Not retried (not idempotent).
+
+        A call that times out may still capture the money, so its result is
+        `pending` (neither success nor decline) and carries the running call
+        as `outcome`, which resolves to the gateway's eventual answer.
+        """
+        try:
+            with track("gateway"):
+                return await self._call(self.gateway.charge, **kwargs)
+        except GatewayTimeout as e:
+            return PaymentResult(
+                success=False,
+                error_message="Payment outcome unknown (gateway timeout)",
+                gateway_response={"code": "pending"},
+                pending=True,
+                outcome=e.call,
+            )
+        except PaymentGatewayError:
+            return PaymentResult(
+                success=False,
+                error_message="Payment gateway error",
+                gateway_response={"code": "gateway_error"}
+            )
+
+    async def refund(
+        self, transaction_id: str, amount: float | None = None, idempotency_key: str | None = None,
+    ) -> PaymentResult:
+        """
+        Refund a transaction (retried and hedged under one idempotency key;
+        a fresh one per call if none is given)
+        """
+        idempotency_key = idempotency_key or f"refund_{uuid.uuid4().hex}"
+        try:
+            with track("gateway"):
+                return await self._call_idempotent(
+                    self.gateway.refund, transaction_id=transaction_id, amount=amount,
+                    idempotency_key=idempotency_key,
+                )
+        except (GatewayTimeout, PaymentGatewayError) as e:
+            return PaymentResult(
+                success=False,
+                error_message=str(e) or "Payment gateway error",
+                gateway_response={"code": "timeout" if isinstance(e, GatewayTimeout) else "gateway_error"}
+            )
+
+    def records_since(self) -> datetime | None:
+        """How far back the gateway's records go (local, no call)"""
+        return self.gateway.records_since()
+
+    async def lookup_transactions(self, transaction_ids: list[str]) -> Dict[str, GatewayTransaction]:
+        """Bulk read of gateway records (idempotent: retried and hedged)"""
+        with track("gateway"):
+            return await self._call_idempotent(
+                self.gateway.lookup_transactions, transaction_ids=transaction_ids
+            )
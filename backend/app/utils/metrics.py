@@ -0,0 +1,297 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; suits HTTP handlers, DB checkouts and gateway calls alike
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(ABC):
+    """A named metric rendered in the Prometheus text format"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Exposition lines: header, then one line per sample"""
+        pass
+
+
+class _ShardedMetric(_Metric):
+    """
+    Base for metrics with one shard per thread
+
+    Each thread writes only to its own dict, so recording takes no lock and
+    never contends; a scrape sums the shards. Shard dicts are copied before
+    reading, which is atomic under the GIL. Shards of threads that have
+    exited are folded into one retired total (when a thread creates its
+    shard, and at scrape time), so thread churn doesn't grow the list.
+    Values are per worker process.
+    """
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+        # Guards the shard list and the retired total; not taken when recording
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._retire_dead()
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _retire_dead(self):
+        """Fold the shards of exited threads (which can't write any more) into the retired total"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+
+    @abstractmethod
+    def _merge(self, into: dict, shard: dict) -> dict:
+        """Add one shard's values into `into`"""
+        pass
+
+    def _totals(self) -> dict:
+        with self._lock:
+            self._retire_dead()
+            shards = [shard for thread, shard in self._shards]
+            totals = self._merge({}, self._retired)
+        for shard in shards:
+            self._merge(totals, shard.copy())
+        return totals
+
+
+class Counter(_ShardedMetric):
+    type_name = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def _merge(self, into: Dict[LabelValues, float], shard: Dict[LabelValues, float]) -> Dict[LabelValues, float]:
+        for labels, value in shard.items():
+            into[labels] = into.get(labels, 0.0) + value
+        return into
+
+    def render(self) -> List[str]:
+        totals = self._totals()
+        if not totals and not self.label_names:
+            totals = {(): 0.0}
+        return self._header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in sorted(totals.items())
+        ]
+
+
+class Gauge(Counter):
+    """Up/down value (e.g. requests in flight); shards sum like a counter's"""
+
+    type_name = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackGauge(_Metric):
+    """
+    Gauge read from its owner at scrape time (queue sizes, pool state)
+
+    `read` returns a number, or (label values, number) pairs for a labelled
+    gauge. Nothing is recorded on the hot path.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], object], labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.read = read
+
+    def render(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception:
+            return []  # e.g. the owner isn't initialised yet
+        samples = [((), value)] if isinstance(value, (int, float)) else list(value)
+        return self._header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(v)}" for labels, v in samples
+        ]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: "Histogram", labels: LabelValues):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class Histogram(_ShardedMetric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # Per-bucket counts (the last one is +Inf), then sum, then count
+            cell = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def time(self, *labels: str) -> _Timer:
+        """`with histogram.time(label, ...):` records the block's wall time"""
+        return _Timer(self, labels)
+
+    def _merge(self, into: Dict[LabelValues, List[float]], shard: Dict[LabelValues, List[float]]) -> Dict[LabelValues, List[float]]:
+        for labels, cell in shard.items():
+            total = into.setdefault(labels, [0] * len(cell))
+            for i, v in enumerate(list(cell)):
+                total[i] += v
+        return into
+
+    def render(self) -> List[str]:
+        totals = self._totals()
+        lines = self._header()
+        bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+        for labels, cell in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, cell):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(cell[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {int(cell[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def gauge_callback(self, name: str, documentation: str, read: Callable[[], object], labels: Sequence[str] = ()) -> CallbackGauge:
+        return self._register(CallbackGauge(name, documentation, read, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests being handled")
+DB_POOL_CHECKOUT_WAIT = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a database connection from the pool",
+)
+MONGO_WRITE_DURATION = metrics.histogram(
+    "mongo_log_write_duration_seconds", "MongoDB log write latency", ("collection",),
+)
+GATEWAY_CALL_DURATION = metrics.histogram(
+    "payment_gateway_call_duration_seconds", "Payment gateway call latency (until the call returns)",
+    ("operation", "outcome"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency and requests in flight
+
+    Routes are labelled by their template (/api/v1/flights/{flight_id}/seats),
+    read from the route FastAPI stores in the scope, so label cardinality
+    stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], route, str(status))
@@ -1,8 +1,27 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Dict, Any
+import hashlib
+import random
+import time
 import uuid
 from datetime import datetime
 
+from app.core.config import (
+    MOCK_GATEWAY_LATENCY_MS,
+    MOCK_GATEWAY_JITTER_MS,
+    MOCK_GATEWAY_FAILURE_RATE,
+    MOCK_GATEWAY_HANG_RATE,
+    MOCK_GATEWAY_HANG_SECONDS,
+    MOCK_GATEWAY_LEDGER_SIZE,
+)
+from app.utils.metrics import metrics
+
+
+class PaymentGatewayError(Exception):
+    """Transport-level failure talking to the gateway (connection reset, 5xx, ...)"""
+    pass
+
 
 class PaymentResult:
     """Standardized payment result across all gateways"""
@@ -12,12 +31,43 @@ class PaymentResult:
             success: bool,
             transaction_id: str | None = None,
             error_message: str | None = None,
-            gateway_response: Dict[str, Any] | None = None
+            gateway_response: Dict[str, Any] | None = None,
+            pending: bool = False,
+            outcome: Any = None
     ):
         self.success = success
         self.transaction_id = transaction_id
         self.error_message = error_message
         self.gateway_response = gateway_response or {}
+        # Outcome unknown (the call timed out but may still go through);
+        # `outcome` then resolves to the gateway's eventual PaymentResult
+        self.pending = pending
+        self.outcome = outcome
+
+
+class GatewayTransaction:
+    """A transaction as recorded by the gateway (used for reconciliation)"""
+
+    def __init__(
+            self,
+            transaction_id: str,
+            status: str,
+            amount: float | None,
+            currency: str | None,
+            refund_transaction_id: str | None = None,
+            created_at: datetime | None = None
+    ):
+        self.transaction_id = transaction_id
+        self.status = status  # captured, refunded
+        self.amount = amount
+        self.currency = currency
+        self.refund_transaction_id = refund_transaction_id
+        self.created_at = created_at
+
+
+def full_refund_key(transaction_id: str) -> str:
+    """Idempotency key for refunding a whole transaction: it can happen only once"""
+    return f"refund_{transaction_id}"
 
 
 class PaymentGateway(ABC):
@@ -47,7 +97,8 @@ class PaymentGateway(ABC):
     def refund(
             self,
             transaction_id: str,
-            amount: float | None = None
+            amount: float | None = None,
+            idempotency_key: str | None = None
     ) -> PaymentResult:
         """
         Refund a payment (full or partial)
@@ -55,12 +106,35 @@ class PaymentGateway(ABC):
         Args:
             transaction_id: Original transaction ID
             amount: Amount to refund (None = full refund)
+            idempotency_key: Repeating a refund with the same key returns
+                the first refund's result instead of refunding again
 
         Returns:
             PaymentResult with success status
         """
         pass
 
+    @abstractmethod
+    def lookup_transactions(
+            self,
+            transaction_ids: list[str]
+    ) -> Dict[str, GatewayTransaction]:
+        """
+        Fetch gateway records for many transactions in one call
+
+        Returns:
+            transaction_id -> GatewayTransaction for every ID the gateway
+            knows; unknown IDs are simply absent
+        """
+        pass
+
+    def records_since(self) -> datetime | None:
+        """
+        Time (naive UTC) after which lookup_transactions knows every
+        transaction; None if its records go back forever
+        """
+        return None
+
 
 class MockPaymentGateway(PaymentGateway):
     """
@@ -71,8 +145,56 @@ class MockPaymentGateway(PaymentGateway):
     - Ends with 1111: Declined (card declined)
     - Ends with 2222: Gateway timeout
     - Otherwise: Success
+
+    Latency and faults can be injected (see MOCK_GATEWAY_* settings) to
+    exercise the resilience layer:
+    - latency/jitter: simulated network delay per call (seconds)
+    - failure_rate: fraction of calls raising PaymentGatewayError
+    - hang_rate: fraction of calls that stall for hang_seconds
+
+    Its ledger is not durable: it lives in this process, starts empty and
+    keeps only the last `ledger_size` transactions. records_since() says
+    how far back it reaches, so reconciliation skips older payments.
     """
 
+    def __init__(
+            self,
+            latency: float = MOCK_GATEWAY_LATENCY_MS / 1000,
+            jitter: float = MOCK_GATEWAY_JITTER_MS / 1000,
+            failure_rate: float = MOCK_GATEWAY_FAILURE_RATE,
+            hang_rate: float = MOCK_GATEWAY_HANG_RATE,
+            hang_seconds: float = MOCK_GATEWAY_HANG_SECONDS,
+            ledger_size: int = MOCK_GATEWAY_LEDGER_SIZE,
+            seed: int | None = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self._rng = random.Random(seed)
+        # What the "gateway" has processed (this process only, oldest first)
+        self.ledger_size = ledger_size
+        self._ledger: OrderedDict[str, GatewayTransaction] = OrderedDict()
+        self._records_since = datetime.utcnow()
+        # Refund results by idempotency key, replayed for repeats
+        self._refunds: OrderedDict[str, PaymentResult] = OrderedDict()
+
+    def _simulate_network(self):
+        """Sleep like a network round trip and apply injected faults"""
+        roll = self._rng.random()
+        if roll < self.hang_rate:
+            time.sleep(self.hang_seconds)
+        elif roll < self.hang_rate + self.failure_rate:
+            time.sleep(self.latency / 10)
+            raise PaymentGatewayError("Injected gateway failure")
+
+        delay = self.latency
+        if self.jitter:
+            delay += self._rng.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
     def charge(
             self,
             amount: float,
@@ -85,9 +207,8 @@ class MockPaymentGateway(PaymentGateway):
             metadata: Dict[str, Any] | None = None
     ) -> PaymentResult:
 
-        # Simulate processing delay
-        import time
-        time.sleep(0.5)  # 500ms delay to simulate network call
+        # Simulate processing delay (500ms by default)
+        self._simulate_network()
 
         # Check test card numbers
         last_4 = card_number[-4:]
@@ -115,6 +236,12 @@ class MockPaymentGateway(PaymentGateway):
 
         # Success case
         transaction_id = f"mock_txn_{uuid.uuid4().hex[:16]}"
+        self._ledger[transaction_id] = GatewayTransaction(
+            transaction_id, "captured", amount, currency, created_at=datetime.utcnow()
+        )
+        while len(self._ledger) > self.ledger_size:
+            _, evicted = self._ledger.popitem(last=False)
+            self._records_since = max(self._records_since, evicted.created_at)
 
         return PaymentResult(
             success=True,
@@ -130,13 +257,24 @@ class MockPaymentGateway(PaymentGateway):
     def refund(
             self,
             transaction_id: str,
-            amount: float | None = None
+            amount: float | None = None,
+            idempotency_key: str | None = None
     ) -> PaymentResult:
 
+        self._simulate_network()
+
+        key = idempotency_key or transaction_id
+        if key in self._refunds:
+            return self._refunds[key]
+
         # Mock refund always succeeds
-        refund_id = f"mock_refund_{uuid.uuid4().hex[:16]}"
+        refund_id = f"mock_refund_{hashlib.sha1(key.encode()).hexdigest()[:16]}"
+        record = self._ledger.get(transaction_id)
+        if record:
+            record.status = "refunded"
+            record.refund_transaction_id = refund_id
 
-        return PaymentResult(
+        result = PaymentResult(
             success=True,
             transaction_id=refund_id,
             gateway_response={
@@ -145,15 +283,62 @@ class MockPaymentGateway(PaymentGateway):
                 "timestamp": datetime.utcnow().isoformat()
             }
         )
+        self._refunds[key] = result
+        if len(self._refunds) > self.ledger_size:
+            self._refunds.popitem(last=False)
+        return result
 
+    def lookup_transactions(
+            self,
+            transaction_ids: list[str]
+    ) -> Dict[str, GatewayTransaction]:
 
-# Factory function to get the configured gateway
-def get_payment_gateway() -> PaymentGateway:
+        # One round trip per batch
+        self._simulate_network()
+
+        return {
+            txn_id: self._ledger[txn_id]
+            for txn_id in transaction_ids
+            if txn_id in self._ledger
+        }
+
+    def records_since(self) -> datetime | None:
+        return self._records_since
+
+
+# Shared gateway client, created once in the app lifespan
+_gateway = None
+
+
+def init_payment_gateway():
     """
-    Returns the configured payment gateway
+    Build the configured gateway wrapped in the resilience layer
 
     TODO: Add real gateways (Stripe, Razorpay) and configure via .env
     """
-    # For now, always return mock gateway
-    # Later: Read from config and return appropriate gateway
-    return MockPaymentGateway()
\ No newline at end of file
+    from app.utils.gateway_resilience import ResilientPaymentGateway
+
+    global _gateway
+    if _gateway is None:
+        # For now, always use the mock gateway
+        _gateway = ResilientPaymentGateway(MockPaymentGateway())
+    return _gateway
+
+
+def close_payment_gateway():
+    global _gateway
+    if _gateway is not None:
+        _gateway.close()
+        _gateway = None
+
+
+# Factory function to get the configured gateway
+def get_payment_gateway():
+    """Returns the shared (resilient) payment gateway client"""
+    return _gateway or init_payment_gateway()
+
+
+metrics.gauge_callback(
+    "payment_gateway_calls_in_flight", "Gateway calls holding a bulkhead slot",
+    lambda: _gateway.in_flight if _gateway else 0,
+)
@@ -1,7 +1,8 @@
-from stdnum import luhn
-from stdnum.exceptions import InvalidChecksum, InvalidLength, InvalidFormat
-import re
+from bisect import bisect_right
 from datetime import datetime
+from typing import Iterable, List, NamedTuple, Tuple
+
+from app.core.config import CARD_BIN_RANGES
 
 
 class CardValidationError(Exception):
@@ -9,74 +10,166 @@ class CardValidationError(Exception):
     pass
 
 
-def detect_card_brand(card_number: str) -> str:
+class CardCheck(NamedTuple):
+    """Result of validate_card_number (immutable; unpacks like the old tuple)"""
+    is_valid: bool
+    brand: str
+    last_4: str
+
+
+# Brand ranges over the first 6 digits of the card number (inclusive).
+# Later entries override earlier ones where they overlap.
+DEFAULT_BIN_RANGES: List[Tuple[int, int, str]] = [
+    (400000, 499999, "Visa"),
+    (510000, 559999, "Mastercard"),
+    (222100, 272099, "Mastercard"),
+    (340000, 349999, "Amex"),
+    (370000, 379999, "Amex"),
+    (601100, 601199, "Discover"),
+    (650000, 659999, "Discover"),
+    (622126, 622925, "Discover"),
+    (644000, 649999, "Discover"),
+]
+
+
+def parse_bin_ranges(spec: str) -> List[Tuple[int, int, str]]:
     """
-    Detect card brand from card number using BIN ranges
+    Parse extra BIN ranges from config
 
-    Returns: "Visa", "Mastercard", "Amex", "Discover", "Unknown"
+    Format: "352800-358999:JCB,620000-629999:UnionPay"; a range bound shorter
+    than 6 digits is padded ("62-62:UnionPay" covers 620000-629999).
+    """
+    ranges = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            bounds, brand = entry.split(":", 1)
+            low, _, high = bounds.partition("-")
+            high = high or low
+            ranges.append((int(low.strip().ljust(6, "0")), int(high.strip().ljust(6, "9")), brand.strip()))
+        except ValueError:
+            raise ValueError(f"Invalid CARD_BIN_RANGES entry: {entry!r}")
+    return ranges
+
+
+def prefix_length(low: int, high: int) -> int:
+    """Digits a card number needs to tell it's in a range (2221-2720 needs 4, 34 needs 2)"""
+    for length in range(1, 6):
+        step = 10 ** (6 - length)
+        if low % step == 0 and (high + 1) % step == 0:
+            return length
+    return 6
+
+
+def build_bin_table(
+        ranges: Iterable[Tuple[int, int, str]]
+) -> Tuple[List[int], List[int], List[str], List[int]]:
     """
-    # Remove spaces and dashes
-    card_number = re.sub(r'[\s-]', '', card_number)
+    Flatten (possibly overlapping) ranges into sorted, disjoint lookup arrays
 
-    # Visa: starts with 4
-    if card_number.startswith('4'):
-        return "Visa"
+    Each piece keeps the prefix length of the range it came from.
+    """
+    table: List[Tuple[int, int, str, int]] = []
+    for low, high, brand in ranges:
+        clipped = []
+        for t_low, t_high, t_brand, t_length in table:
+            if t_high < low or t_low > high:
+                clipped.append((t_low, t_high, t_brand, t_length))
+                continue
+            if t_low < low:
+                clipped.append((t_low, low - 1, t_brand, t_length))
+            if t_high > high:
+                clipped.append((high + 1, t_high, t_brand, t_length))
+        clipped.append((low, high, brand, prefix_length(low, high)))
+        table = clipped
+    table.sort()
+    return [r[0] for r in table], [r[1] for r in table], [r[2] for r in table], [r[3] for r in table]
+
+
+_BIN_LOWS, _BIN_HIGHS, _BIN_BRANDS, _BIN_LENGTHS = build_bin_table(DEFAULT_BIN_RANGES + parse_bin_ranges(CARD_BIN_RANGES))
+
+# ASCII whitespace and dashes are stripped in one translate() pass
+_SEPARATORS = str.maketrans("", "", " \t\n\r\f\v-")
+
+# Luhn: byte tables mapping an ASCII digit to its value as-is and when
+# doubled (digits of 2*d summed), so the checksum is two C-level sums
+_DIGIT = bytes.maketrans(b"0123456789", bytes(range(10)))
+_DOUBLED = bytes.maketrans(b"0123456789", bytes([0, 2, 4, 6, 8, 1, 3, 5, 7, 9]))
+
+
+def _brand_for(digits: str) -> str:
+    """
+    BIN lookup on an already-normalized, all-digit prefix
 
-    # Mastercard: starts with 51-55 or 2221-2720
-    if card_number.startswith(('51', '52', '53', '54', '55')):
-        return "Mastercard"
-    if card_number[:4].isdigit() and 2221 <= int(card_number[:4]) <= 2720:
-        return "Mastercard"
+    A prefix shorter than a range's own prefix length can't place a card in
+    it ("27" is Unknown, "2720" is Mastercard), nor in a range covering
+    only part of the numbers the prefix starts.
+    """
+    prefix = digits[:6]
+    low = int(prefix.ljust(6, "0"))
+    i = bisect_right(_BIN_LOWS, low) - 1
+    if i >= 0 and len(prefix) >= _BIN_LENGTHS[i] and int(prefix.ljust(6, "9")) <= _BIN_HIGHS[i]:
+        return _BIN_BRANDS[i]
+    return "Unknown"
 
-    # Amex: starts with 34 or 37
-    if card_number.startswith(('34', '37')):
-        return "Amex"
 
-    # Discover: starts with 6011, 622126-622925, 644-649, 65
-    if card_number.startswith('6011') or card_number.startswith('65'):
-        return "Discover"
-    if card_number[:6].isdigit() and 622126 <= int(card_number[:6]) <= 622925:
-        return "Discover"
-    if card_number[:3].isdigit() and 644 <= int(card_number[:3]) <= 649:
-        return "Discover"
+def _strip_separators(card_number: str) -> str:
+    """Remove whitespace (any Unicode space, e.g. a pasted NBSP) and dashes"""
+    if card_number.isascii():
+        return card_number.translate(_SEPARATORS)
+    return "".join(ch for ch in card_number if not (ch.isspace() or ch == "-"))
+
+
+def _luhn_ok(digits: str) -> bool:
+    raw = digits.encode("ascii")
+    return (sum(raw[-1::-2].translate(_DIGIT)) + sum(raw[-2::-2].translate(_DOUBLED))) % 10 == 0
 
-    return "Unknown"
 
+def detect_card_brand(card_number: str) -> str:
+    """
+    Detect card brand from card number using BIN ranges
 
-def validate_card_number(card_number: str) -> tuple[bool, str, str]:
+    Returns: "Visa", "Mastercard", "Amex", "Discover", a brand added via
+    CARD_BIN_RANGES, or "Unknown"
+    """
+    head = card_number[:6]
+    if not (head.isascii() and head.isdigit()):
+        head = _strip_separators(card_number)[:6]
+        # Only the leading digits matter for the BIN
+        for length, ch in enumerate(head):
+            if not ("0" <= ch <= "9"):
+                head = head[:length]
+                break
+        if not head:
+            return "Unknown"
+    return _brand_for(head)
+
+
+def validate_card_number(card_number: str) -> CardCheck:
     """
     Validate credit/debit card number using Luhn algorithm
 
     Returns:
-        (is_valid, card_brand, last_4_digits)
+        CardCheck(is_valid, card_brand, last_4_digits)
 
     Raises:
         CardValidationError: If card number is invalid
     """
-    # Remove spaces and dashes
-    card_number = re.sub(r'[\s-]', '', card_number)
+    if not (card_number.isascii() and card_number.isdigit()):
+        # Remove spaces and dashes
+        card_number = _strip_separators(card_number)
 
-    # Check if contains only digits
-    if not card_number.isdigit():
+    # Check if contains only (ASCII) digits
+    if not (card_number.isascii() and card_number.isdigit()):
         raise CardValidationError("Card number must contain only digits")
 
     # Check length (13-19 digits for most cards)
     if len(card_number) < 13 or len(card_number) > 19:
         raise CardValidationError("Card number must be 13-19 digits")
 
-    # Detect brand
-    brand = detect_card_brand(card_number)
-
-    # Validate using Luhn algorithm
-    try:
-        luhn.validate(card_number)
-    except (InvalidChecksum, InvalidLength, InvalidFormat) as e:
-        raise CardValidationError(f"Invalid card number: {str(e)}")
-
-    # Extract last 4 digits
-    last_4 = card_number[-4:]
+    if not _luhn_ok(card_number):
+        raise CardValidationError("Invalid card number: The number's checksum or check digit is invalid.")
 
-    return True, brand, last_4
+    return CardCheck(True, _brand_for(card_number), card_number[-4:])
 
 
 def validate_expiry(expiry_month: str, expiry_year: str) -> bool:
@@ -0,0 +1,346 @@
+import cProfile
+import hashlib
+import hmac
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from fnmatch import fnmatch
+from typing import Any, Callable, Dict, List
+
+from fastapi.routing import APIRoute
+
+from app.core.config import SECRET_KEY, PROFILING_SAMPLE_INTERVAL_MS
+
+MODES = ("sampler", "cprofile")
+PROFILE_HEADER = "x-profile"
+
+# Mode asked for by a valid signed X-Profile header on the current request
+requested_mode: ContextVar[str | None] = ContextVar("requested_mode", default=None)
+
+
+def _frame_name(code, module: str) -> str:
+    return f"{module}:{code.co_name}"
+
+
+# ── Signed header ──
+
+def sign_profile_token(mode: str, expires_at: int) -> str:
+    """X-Profile header value that profiles any request until `expires_at` (unix time)"""
+    payload = f"{mode}:{expires_at}"
+    signature = hmac.new(SECRET_KEY.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    return f"{payload}:{signature}"
+
+
+def verify_profile_token(token: str) -> str | None:
+    """The token's mode if its signature is valid and it hasn't expired"""
+    try:
+        mode, expires_at, signature = token.split(":")
+        expires = int(expires_at)
+    except ValueError:
+        return None
+    if mode not in MODES or expires < time.time():
+        return None
+    expected = sign_profile_token(mode, expires).rsplit(":", 1)[1]
+    # Bytes: compare_digest rejects non-ASCII str, and headers decode as latin-1
+    return mode if hmac.compare_digest(signature.encode("latin-1"), expected.encode()) else None
+
+
+# ── cProfile → collapsed stacks ──
+
+def _cprofile_stacks(profile: cProfile.Profile, root_code, label: str) -> Counter:
+    """
+    Collapsed stacks (microseconds) from a cProfile run rooted at `root_code`
+
+    cProfile keeps caller→callee totals, not whole stacks, so a function's
+    time under each caller is split in proportion to those totals (as
+    flameprof does). Recursion is cut at the first repeat, and branches
+    under 0.1% of the endpoint's time are dropped to bound the walk.
+    """
+    stats = pstats.Stats(profile).stats
+    callees: Dict[tuple, Dict[tuple, float]] = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, {})[func] = cumulative
+
+    root = (root_code.co_filename, root_code.co_firstlineno, root_code.co_name)
+    stacks: Counter = Counter()
+
+    def name(func) -> str:
+        filename, line, function = func
+        if filename == "~":
+            return function  # builtins, e.g. <method 'execute' of ...>
+        return f"{function} ({filename.rsplit('/', 1)[-1]}:{line})"
+
+    def walk(func, path: List[str], seen: set, share: float):
+        total = stats[func][3]
+        if total <= 0 or share < min_share or len(path) > 64:
+            return
+        fraction = share / total
+        path = path + [name(func).replace(";", ",")]
+        stacks[";".join(path)] += stats[func][2] * fraction * 1e6
+        for callee, cumulative in callees.get(func, {}).items():
+            if callee not in seen and callee in stats:
+                walk(callee, path, seen | {callee}, cumulative * fraction)
+
+    if root in stats:
+        min_share = stats[root][3] / 1000
+        walk(root, [label], {root}, stats[root][3])
+    return Counter({stack: round(us) for stack, us in stacks.items() if round(us) > 0})
+
+
+# ── Profiler ──
+
+class RequestProfiler:
+    """
+    Profiles endpoint calls on demand and aggregates collapsed stacks
+
+    Nothing is installed until an admin arms it: `arm` swaps the matching
+    routes' endpoint callables for profiling wrappers, and they are swapped
+    back once N requests have been profiled or it is disarmed, so idle
+    routes run exactly as before. With PROFILING_HEADER_ENABLED every route
+    is wrapped at startup so a signed X-Profile header can profile any
+    request.
+
+    Wrapping the endpoint rather than the ASGI app means sync endpoints are
+    profiled in the thread-pool thread that runs them. "sampler" mode
+    snapshots the profiled threads' stacks every PROFILING_SAMPLE_INTERVAL_MS
+    (on-CPU time; an async endpoint's awaits are not attributed); "cprofile"
+    traces every call. Profiles are per worker process.
+    """
+
+    def __init__(self, interval: float = PROFILING_SAMPLE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.stacks: Dict[str, Counter] = {mode: Counter() for mode in MODES}
+        self.requests_profiled: Dict[str, int] = {mode: 0 for mode in MODES}
+        self.pattern: str | None = None
+        self.mode: str | None = None
+        self.remaining = 0
+        self.header_enabled = False
+        # Keyed by id(): routes compare by value and aren't hashable
+        self._originals: Dict[int, Callable] = {}
+        self._armed_routes: Dict[int, APIRoute] = {}
+        self._lock = threading.Lock()
+        self._sampled_threads: Counter = Counter()
+        self._sampler: threading.Thread | None = None
+        self._cprofile_threads: set = set()
+        self._wrapper_codes: set = set()
+
+    # Route wrapping
+
+    def _wrap(self, route: APIRoute):
+        if id(route) in self._originals:
+            return
+        call = route.dependant.call
+        root_code = getattr(route.endpoint, "__code__", None)
+        label = f"{','.join(sorted(route.methods))} {route.path}"
+        profiler = self
+
+        if route.dependant.is_coroutine_callable:
+            async def profiled(**values):
+                mode = profiler._claim(route)
+                if mode is None:
+                    return await call(**values)
+                started = profiler._start(mode)
+                try:
+                    return await call(**values)
+                finally:
+                    profiler._finish(mode, started, root_code, label)
+        else:
+            def profiled(**values):
+                mode = profiler._claim(route)
+                if mode is None:
+                    return call(**values)
+                started = profiler._start(mode)
+                try:
+                    return call(**values)
+                finally:
+                    profiler._finish(mode, started, root_code, label)
+
+        self._wrapper_codes.add(profiled.__code__)
+        self._originals[id(route)] = call
+        route.dependant.call = profiled
+
+    def _unwrap(self, route: APIRoute):
+        call = self._originals.pop(id(route), None)
+        if call is not None:
+            route.dependant.call = call
+
+    def enable_header(self, routes: List[Any]):
+        """Wrap every API route for the lifetime of the process (X-Profile header)"""
+        self.header_enabled = True
+        for route in routes:
+            if isinstance(route, APIRoute):
+                self._wrap(route)
+
+    def arm(self, routes: List[Any], pattern: str, requests: int, mode: str) -> List[str]:
+        """Profile the next `requests` calls of routes whose path or endpoint name matches `pattern`"""
+        matched = [
+            r for r in routes
+            if isinstance(r, APIRoute) and (fnmatch(r.path, pattern) or fnmatch(r.name, pattern))
+        ]
+        with self._lock:
+            self._disarm_locked()
+            if not matched:
+                return []
+            self.pattern, self.mode, self.remaining = pattern, mode, requests
+            self._armed_routes = {id(r): r for r in matched}
+            for route in matched:
+                self._wrap(route)
+        return [f"{','.join(sorted(r.methods))} {r.path}" for r in matched]
+
+    def disarm(self):
+        with self._lock:
+            self._disarm_locked()
+
+    def _disarm_locked(self):
+        if not self.header_enabled:
+            for route in self._armed_routes.values():
+                self._unwrap(route)
+        self._armed_routes = {}
+        self.pattern, self.mode, self.remaining = None, None, 0
+
+    def _claim(self, route: APIRoute) -> str | None:
+        """Mode to profile this call with, or None"""
+        mode = requested_mode.get()
+        if mode is not None:
+            return mode if self._can_trace(mode) else None
+        if id(route) not in self._armed_routes:
+            return None
+        with self._lock:
+            if self.remaining <= 0 or not self._can_trace(self.mode):
+                return None
+            mode = self.mode
+            self.remaining -= 1
+            if self.remaining == 0:
+                self._disarm_locked()
+        return mode
+
+    def _can_trace(self, mode: str) -> bool:
+        # One cProfile per thread: concurrent async calls on the event loop
+        # thread would replace each other's profiler
+        return mode != "cprofile" or threading.get_ident() not in self._cprofile_threads
+
+    # Collection
+
+    def _start(self, mode: str):
+        thread = threading.get_ident()
+        if mode == "cprofile":
+            self._cprofile_threads.add(thread)
+            profile = cProfile.Profile()
+            profile.enable()
+            return profile
+        with self._lock:
+            self._sampled_threads[thread] += 1
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+                self._sampler.start()
+        return None
+
+    def _finish(self, mode: str, profile, root_code, label: str):
+        thread = threading.get_ident()
+        if mode == "cprofile":
+            profile.disable()
+            self._cprofile_threads.discard(thread)
+            if root_code is not None:
+                stacks = _cprofile_stacks(profile, root_code, label)
+                with self._lock:
+                    self.stacks[mode].update(stacks)
+        else:
+            with self._lock:
+                self._sampled_threads[thread] -= 1
+                if self._sampled_threads[thread] <= 0:
+                    del self._sampled_threads[thread]
+        with self._lock:
+            self.requests_profiled[mode] += 1
+
+    def _sample(self):
+        """Sampler thread: runs while any sampled call is in progress"""
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._sampled_threads:
+                    self._sampler = None
+                    return
+                threads = list(self._sampled_threads)
+            frames = sys._current_frames()
+            samples = Counter()
+            for thread in threads:
+                frame = frames.get(thread)
+                stack = []
+                while frame is not None:
+                    if frame.f_code in self._wrapper_codes:
+                        local = frame.f_locals
+                        if local.get("mode") is not None:  # not a pass-through call
+                            samples[";".join([local["label"], *reversed(stack)])] += 1
+                        break
+                    stack.append(_frame_name(frame.f_code, frame.f_globals.get("__name__", "?")))
+                    frame = frame.f_back
+                # No wrapper frame: the event loop is running something else
+                # while an async endpoint awaits
+            with self._lock:
+                self.stacks["sampler"].update(samples)
+
+    # Reporting
+
+    def collapsed(self, mode: str) -> str:
+        """Aggregated stacks in collapsed format (flamegraph.pl, speedscope, inferno)"""
+        with self._lock:
+            items = sorted(self.stacks[mode].items())
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def reset(self):
+        with self._lock:
+            for mode in MODES:
+                self.stacks[mode].clear()
+                self.requests_profiled[mode] = 0
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "armed": self.remaining > 0,
+                "pattern": self.pattern,
+                "mode": self.mode,
+                "remaining": self.remaining,
+                "routes": sorted(f"{','.join(sorted(r.methods))} {r.path}" for r in self._armed_routes.values()),
+                "header_enabled": self.header_enabled,
+                "requests_profiled": dict(self.requests_profiled),
+                "stacks": {mode: len(self.stacks[mode]) for mode in MODES},
+                "sample_interval_ms": self.interval * 1000,
+            }
+
+
+# Global instance
+profiler = RequestProfiler()
+
+
+class ProfileHeaderMiddleware:
+    """
+    Pure ASGI middleware honouring signed X-Profile headers
+
+    Only installed with PROFILING_HEADER_ENABLED; the header is minted by
+    POST /api/v1/profiling/token and signed with SECRET_KEY.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                mode = verify_profile_token(value.decode("latin-1"))
+                break
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        token = requested_mode.set(mode)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            requested_mode.reset(token)
@@ -0,0 +1,172 @@
+import json
+import re
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import QUERY_DEBUG_HEADERS, QUERY_BUDGET_STRICT, QUERY_REPEAT_THRESHOLD
+from app.utils.metrics import metrics
+
+_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+DB_QUERIES_PER_REQUEST = metrics.histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ("route",), buckets=_COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = metrics.histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", ("route",),
+)
+DB_REPEATED_QUERY_REQUESTS = metrics.counter(
+    "db_repeated_query_requests_total", "Requests that ran one statement QUERY_REPEAT_THRESHOLD+ times (N+1)", ("route",),
+)
+DB_QUERY_BUDGET_EXCEEDED = metrics.counter(
+    "db_query_budget_exceeded_total", "Requests that ran more statements than their endpoint's query budget", ("route",),
+)
+
+# "IN (?, ?, ?)" and "IN (%(p_1)s, %(p_2)s)" fingerprint alike whatever the list length
+_PARAM_LISTS = re.compile(r"\((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*,)+\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement text with whitespace and expanded IN-lists normalised"""
+    return _PARAM_LISTS.sub("(...)", _SPACES.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """Statements run while handling one request"""
+
+    __slots__ = ("count", "seconds", "fingerprints", "timings")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints: Dict[str, int] = {}
+        self.timings: Dict[str, float] = {}
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        key = fingerprint(statement)
+        self.fingerprints[key] = self.fingerprints.get(key, 0) + 1
+        self.timings[key] = self.timings.get(key, 0.0) + seconds
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statements run `threshold` or more times, most frequent first"""
+        return sorted(
+            ((sql, n) for sql, n in self.fingerprints.items() if n >= threshold),
+            key=lambda item: -item[1],
+        )
+
+    def slowest(self, limit: int = 5) -> List[Tuple[str, int, float]]:
+        """(statement, runs, total seconds) of the statements that took longest in total"""
+        top = sorted(self.timings.items(), key=lambda item: -item[1])[:limit]
+        return [(sql, self.fingerprints[sql], seconds) for sql, seconds in top]
+
+
+# Stats of the request being handled. Set by the middleware; sync endpoints
+# run in a thread pool with a copy of the context, which still points at
+# the same QueryStats object.
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def instrument_engine(engine: Engine):
+    """Count and time every statement the engine executes for the current request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - context._query_started)
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare how many SQL statements an endpoint may run per request
+
+        @router.get("/{booking_id}")
+        @query_budget(2)
+        def get_booking(...): ...
+
+    Over-budget requests are counted in db_query_budget_exceeded_total and
+    logged; with QUERY_BUDGET_STRICT they fail with a 500 instead.
+    """
+    def mark(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return mark
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware collecting QueryStats per HTTP request
+
+    Records per-route metrics; with QUERY_DEBUG_HEADERS adds X-DB-Query-Count,
+    X-DB-Query-Time-Ms and X-DB-Repeated-Queries to responses. Statements run
+    while a streaming body is produced (exports) come after the headers and
+    only reach the metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        swallow = False
+
+        async def send_with_stats(message):
+            nonlocal swallow
+            if swallow:
+                return
+            if message["type"] == "http.response.start":
+                budget = getattr(getattr(scope.get("route"), "endpoint", None), "query_budget", None)
+                if budget is not None and stats.count > budget:
+                    route = scope["route"].path
+                    DB_QUERY_BUDGET_EXCEEDED.inc(route)
+                    print(f"⚠️ Query budget exceeded: {scope['method']} {route} ran {stats.count} statements (budget {budget})")
+                    if QUERY_BUDGET_STRICT:
+                        swallow = True
+                        await self._budget_error(send, route, stats, budget)
+                        return
+                if QUERY_DEBUG_HEADERS:
+                    repeated = stats.repeated()
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-query-count", str(stats.count).encode()),
+                        (b"x-db-query-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                        (b"x-db-repeated-queries", ";".join(f"{n}x {sql[:120]}" for sql, n in repeated).encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_query_stats.reset(token)
+            if stats.count:
+                route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+                DB_QUERIES_PER_REQUEST.observe(stats.count, route)
+                DB_TIME_PER_REQUEST.observe(stats.seconds, route)
+                if stats.repeated():
+                    DB_REPEATED_QUERY_REQUESTS.inc(route)
+
+    @staticmethod
+    async def _budget_error(send, route: str, stats: QueryStats, budget: int):
+        body = json.dumps({
+            "detail": f"Query budget exceeded: {route} ran {stats.count} statements (budget {budget})",
+            "repeated": [{"count": n, "statement": sql} for sql, n in stats.repeated(2)],
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 500,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
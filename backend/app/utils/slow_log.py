@@ -0,0 +1,233 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from urllib.parse import parse_qsl
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import (
+    SLOW_REQUEST_THRESHOLD_MS,
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_LOG_SAMPLE_RATE,
+    SLOW_LOG_RETENTION_DAYS,
+    SLOW_LOG_BATCH_SIZE,
+    SLOW_LOG_FLUSH_INTERVAL_SECONDS,
+    SLOW_LOG_BUFFER_SIZE,
+)
+from app.utils.metrics import metrics
+from app.utils.query_stats import current_query_stats, fingerprint
+
+SLOW_LOG_RECORDS = metrics.counter(
+    "slow_log_records_total", "Slow requests and statements queued for system_event_logs", ("kind",),
+)
+SLOW_LOG_DROPPED = metrics.counter(
+    "slow_log_dropped_total", "Slow-log records dropped (buffer full or write failed)",
+)
+
+# Query parameters never copied into the log
+_REDACTED = ("password", "token", "secret", "card", "cvv")
+
+
+class RequestProfile:
+    """Time a sampled request spent outside Python, by component (mongo, gateway, smtp)"""
+
+    __slots__ = ("scope", "components")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.components: Dict[str, float] = {}
+
+    def add(self, component: str, seconds: float):
+        self.components[component] = self.components.get(component, 0.0) + seconds
+
+
+# Profile of the request being handled; None when it wasn't sampled
+current_profile: ContextVar[RequestProfile | None] = ContextVar("current_profile", default=None)
+
+
+@contextmanager
+def track(component: str):
+    """`with track("smtp"):` adds the block's wall time to the current request's profile"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(component, time.perf_counter() - started)
+
+
+# ── Batched writer ──
+
+class SlowLogWriter:
+    """
+    Buffers slow-log records and writes them to system_event_logs in batches
+
+    `submit` only appends to a bounded deque, so it is safe from request
+    handlers and from the threads running sync endpoints; `run` drains it
+    every SLOW_LOG_FLUSH_INTERVAL_SECONDS with one insert_many per batch.
+    Records get an expires_at SLOW_LOG_RETENTION_DAYS out for the TTL index.
+    """
+
+    def __init__(self, max_size: int = SLOW_LOG_BUFFER_SIZE, batch_size: int = SLOW_LOG_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._buffer: deque = deque(maxlen=max_size)
+        metrics.gauge_callback("slow_log_buffer_depth", "Slow-log records waiting to be written", lambda: len(self._buffer))
+
+    def submit(self, kind: str, level: str, message: str, metadata: Dict[str, Any]):
+        if len(self._buffer) == self._buffer.maxlen:
+            SLOW_LOG_DROPPED.inc()  # the oldest record is pushed out
+        now = datetime.utcnow()
+        self._buffer.append({
+            "level": level,
+            "module_name": kind,
+            "message": message,
+            "metadata": metadata,
+            "timestamp": now,
+            "expires_at": now + timedelta(days=SLOW_LOG_RETENTION_DAYS),
+        })
+        SLOW_LOG_RECORDS.inc(kind)
+
+    async def flush(self):
+        # Imported here: logging_service times its own writes with track()
+        from app.services.logging_service import log_system_events_bulk
+
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                await log_system_events_bulk(batch)
+            except Exception as e:
+                SLOW_LOG_DROPPED.inc(amount=len(batch))
+                print(f"❌ Slow-log write failed, dropped {len(batch)} records: {e}")
+                return
+
+    async def run(self):
+        """Write buffered records forever; flushes what is left when cancelled"""
+        from app.services.logging_service import ensure_system_event_indexes
+
+        try:
+            await ensure_system_event_indexes()
+        except Exception as e:
+            print(f"⚠️ Could not create system_event_logs indexes: {e}")
+        try:
+            while True:
+                await asyncio.sleep(SLOW_LOG_FLUSH_INTERVAL_SECONDS)
+                await self.flush()
+        except asyncio.CancelledError:
+            # Bounded, so an unreachable Mongo doesn't hold up shutdown
+            await asyncio.wait_for(self.flush(), timeout=5)
+            raise
+
+
+# Global instance
+slow_log = SlowLogWriter()
+
+
+# ── Slow statements ──
+
+def watch_slow_queries(engine: Engine):
+    """Log every statement slower than SLOW_QUERY_THRESHOLD_MS, in requests or not"""
+    threshold = SLOW_QUERY_THRESHOLD_MS / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        context._slow_log_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._slow_log_started
+        if elapsed < threshold:
+            return
+        profile = current_profile.get()
+        route = getattr(profile.scope.get("route"), "path", None) if profile else None
+        # Parameters are left out: they may hold personal data
+        slow_log.submit("slow_query", "warning", f"SQL statement took {elapsed * 1000:.0f} ms", {
+            "statement": fingerprint(statement)[:2000],
+            "duration_ms": round(elapsed * 1000, 2),
+            "executemany": executemany,
+            "route": route,
+        })
+
+
+# ── Slow requests ──
+
+def _query_params(scope) -> Dict[str, str]:
+    params = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    return {
+        key: "***" if any(word in key.lower() for word in _REDACTED) else value[:200]
+        for key, value in params
+    }
+
+
+def _slow_request_metadata(scope, status: int, elapsed: float, profile: RequestProfile) -> Dict[str, Any]:
+    stats = current_query_stats.get()
+    top: List[Dict[str, Any]] = []
+    if stats is not None:
+        top = [
+            {"statement": sql[:500], "runs": runs, "time_ms": round(seconds * 1000, 2)}
+            for sql, runs, seconds in stats.slowest()
+        ]
+    return {
+        "method": scope["method"],
+        "route": getattr(scope.get("route"), "path", None) or "<unmatched>",
+        "path": scope["path"],
+        "status": status,
+        "duration_ms": round(elapsed * 1000, 2),
+        "path_params": {k: str(v) for k, v in scope.get("path_params", {}).items()},
+        "query_params": _query_params(scope),
+        "db_queries": stats.count if stats else 0,
+        "db_time_ms": round(stats.seconds * 1000, 2) if stats else 0.0,
+        "top_statements": top,
+        "component_time_ms": {k: round(v * 1000, 2) for k, v in profile.components.items()},
+        "sample_rate": SLOW_LOG_SAMPLE_RATE,
+    }
+
+
+class SlowRequestMiddleware:
+    """
+    Pure ASGI middleware logging requests slower than SLOW_REQUEST_THRESHOLD_MS
+
+    Only SLOW_LOG_SAMPLE_RATE of requests are profiled; the rest pass straight
+    through, so the cost at full traffic is one random() call per request
+    plus a few microseconds per sampled one. Must sit inside
+    QueryStatsMiddleware (add it first) to see the request's SQL statements.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= SLOW_LOG_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope)
+        token = current_profile.set(profile)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_profile.reset(token)
+            if elapsed * 1000 >= SLOW_REQUEST_THRESHOLD_MS:
+                metadata = _slow_request_metadata(scope, status, elapsed, profile)
+                slow_log.submit(
+                    "slow_request", "warning",
+                    f"{metadata['method']} {metadata['route']} took {metadata['duration_ms']:.0f} ms", metadata,
+                )
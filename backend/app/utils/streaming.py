@@ -0,0 +1,154 @@
+import codecs
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.core.config import EXPORT_BATCH_SIZE, IMPORT_MAX_RECORD_BYTES
+from app.db.session import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_FORMATS = ("ndjson", "json")
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_row(row: Mapping[str, Any]) -> str:
+    return json.dumps(dict(row), default=_json_default, separators=(",", ":"))
+
+
+def stream_rows(statement: Select, fmt: str = "ndjson", batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Run a column select on a server-side cursor and yield it encoded in chunks
+
+    Rows are fetched `batch_size` at a time (yield_per) as plain mappings, so
+    memory stays flat no matter how many rows the query returns. Uses its own
+    session because the response body is produced after the endpoint returns.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_size)).mappings()
+        first = True
+        if fmt == "json":
+            yield b"["
+        for partition in result.partitions():
+            lines = [encode_row(row) for row in partition]
+            if fmt == "json":
+                chunk = ",".join(lines)
+                yield (chunk if first else "," + chunk).encode()
+            else:
+                yield ("\n".join(lines) + "\n").encode()
+            first = False
+        if fmt == "json":
+            yield b"]"
+    finally:
+        db.close()
+
+
+def export_response(statement: Select, fmt: str, filename: str) -> StreamingResponse:
+    """Streaming NDJSON (default) or chunked JSON array download"""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format (use one of: {', '.join(EXPORT_FORMATS)})")
+    return StreamingResponse(
+        stream_rows(statement, fmt),
+        media_type=NDJSON_MEDIA_TYPE if fmt == "ndjson" else "application/json",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+def next_page_headers(items: List[Any], limit: int, key: str = "id") -> Dict[str, str]:
+    """X-Next-After-Id for a full page (absent on the last page)"""
+    if not items or len(items) < limit:
+        return {}
+    last = items[-1]
+    return {"X-Next-After-Id": str(last[key] if isinstance(last, Mapping) else getattr(last, key))}
+
+
+def import_format(fmt: str | None, content_type: str) -> str:
+    """Upload format from ?format=, else from the Content-Type"""
+    if fmt is None:
+        media_type = content_type.split(";")[0].strip().lower()
+        fmt = {"text/csv": "csv", NDJSON_MEDIA_TYPE: "ndjson", "application/jsonl": "ndjson"}.get(media_type)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown upload format (send ?format= or a Content-Type for one of: {', '.join(IMPORT_FORMATS)})",
+        )
+    return fmt
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decoded lines (without the newline) of a byte stream, one buffered line at a time"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.removesuffix("\r")
+        if len(pending) > IMPORT_MAX_RECORD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Line longer than {IMPORT_MAX_RECORD_BYTES} bytes")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.removesuffix("\r")
+
+
+async def stream_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Dict[str, Any] | str]]:
+    """
+    Parse an uploaded CSV (header row first) or NDJSON body as it arrives
+
+    Yields (line number, record) per row, or (line number, error message)
+    for a row that can't be parsed, holding only the current record in
+    memory. Empty CSV fields are None; blank lines are skipped.
+    """
+    header: List[str] | None = None
+    record: List[str] = []
+    line_no = start = 0
+    async for line in _lines(chunks):
+        line_no += 1
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"Invalid JSON: {e}"
+                continue
+            yield line_no, value if isinstance(value, dict) else "Expected a JSON object"
+            continue
+
+        # A CSV record ends on a line that leaves no quoted field open
+        if not record:
+            if not line.strip():
+                continue
+            start = line_no
+        record.append(line)
+        if sum(part.count('"') for part in record) % 2:
+            if sum(map(len, record)) > IMPORT_MAX_RECORD_BYTES:
+                raise HTTPException(status_code=413, detail=f"Record at line {start} longer than {IMPORT_MAX_RECORD_BYTES} bytes")
+            continue
+        fields = next(csv.reader(["\n".join(record)]))
+        record = []
+        if header is None:
+            header = [name.strip() for name in fields]
+        elif len(fields) != len(header):
+            yield start, f"Expected {len(header)} fields, got {len(fields)}"
+        else:
+            yield start, {name: (value if value != "" else None) for name, value in zip(header, fields)}
+    if record:
+        yield start, "Unterminated quoted field"
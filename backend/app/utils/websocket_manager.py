@@ -1,5 +1,6 @@
 from typing import Dict, Set
 from fastapi import WebSocket
+from app.utils.metrics import metrics
 
 
 class ConnectionManager:
@@ -39,4 +40,9 @@ class ConnectionManager:
 
 
 # Global instance
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
+metrics.gauge_callback(
+    "websocket_connections", "Open WebSocket connections per flight",
+    lambda: [((str(flight_id),), len(sockets)) for flight_id, sockets in list(manager.active_connections.items())],
+    ("flight_id",),
+)
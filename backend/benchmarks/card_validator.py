@@ -0,0 +1,149 @@
+"""
+Micro-benchmark the card validator against the previous stdnum-based version
+
+Generates synthetic PANs across all known BIN ranges (a mix of valid and
+bad-checksum numbers, some with spaces/dashes), checks that both versions
+agree on every one (plus some non-ASCII separators and digits), then times
+validate_card_number and detect_card_brand.
+
+Run: python -m benchmarks.card_validator --count 1000000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from stdnum import luhn
+from stdnum.exceptions import InvalidChecksum, InvalidLength, InvalidFormat
+
+from app.utils.payment_validator import (
+    CardValidationError,
+    detect_card_brand,
+    validate_card_number,
+)
+
+PREFIXES = ["4", "51", "55", "2221", "2720", "34", "37", "6011", "65", "622126", "644", "3528", "9"]
+
+
+# --- Previous implementation (kept here for comparison only) ---
+
+def legacy_detect_card_brand(card_number: str) -> str:
+    card_number = re.sub(r'[\s-]', '', card_number)
+    if card_number.startswith('4'):
+        return "Visa"
+    if card_number.startswith(('51', '52', '53', '54', '55')):
+        return "Mastercard"
+    if card_number[:4].isdigit() and 2221 <= int(card_number[:4]) <= 2720:
+        return "Mastercard"
+    if card_number.startswith(('34', '37')):
+        return "Amex"
+    if card_number.startswith('6011') or card_number.startswith('65'):
+        return "Discover"
+    if card_number[:6].isdigit() and 622126 <= int(card_number[:6]) <= 622925:
+        return "Discover"
+    if card_number[:3].isdigit() and 644 <= int(card_number[:3]) <= 649:
+        return "Discover"
+    return "Unknown"
+
+
+def legacy_validate_card_number(card_number: str) -> tuple[bool, str, str]:
+    card_number = re.sub(r'[\s-]', '', card_number)
+    if not card_number.isdigit():
+        raise CardValidationError("Card number must contain only digits")
+    if len(card_number) < 13 or len(card_number) > 19:
+        raise CardValidationError("Card number must be 13-19 digits")
+    brand = legacy_detect_card_brand(card_number)
+    try:
+        luhn.validate(card_number)
+    except (InvalidChecksum, InvalidLength, InvalidFormat) as e:
+        raise CardValidationError(f"Invalid card number: {str(e)}")
+    return True, brand, card_number[-4:]
+
+
+# --- Data ---
+
+def make_pans(count: int, seed: int, invalid_rate: float, formatted_rate: float) -> list[str]:
+    rng = random.Random(seed)
+    pans = []
+    for _ in range(count):
+        prefix = rng.choice(PREFIXES)
+        length = rng.choice((15, 16, 16, 16, 19))
+        body = prefix + "".join(rng.choice("0123456789") for _ in range(length - len(prefix) - 1))
+        check = luhn.calc_check_digit(body)
+        if rng.random() < invalid_rate:
+            check = str((int(check) + rng.randint(1, 9)) % 10)
+        pan = body + check
+        if rng.random() < formatted_rate:
+            pan = " ".join(pan[i:i + 4] for i in range(0, len(pan), 4))
+        pans.append(pan)
+    return pans
+
+
+# Non-ASCII input, checked for agreement but not timed: Unicode spaces are
+# separators, non-ASCII digits are not digits
+UNICODE_PANS = [
+    "4242\xa04242\xa04242\xa04242",
+    "4242\u20034242\u2009\u20094242 4242",
+    "\u30004242-4242-4242-4242\u3000",
+    "5555\u202f5555\u202f5555\u202f4444",
+    "3782\u2028822463\u200a10005",
+    "\xa06011111111111117",
+    "4242\u200b4242424242424242",
+    "\uff14242424242424242",
+    "\u0664242424242424242",
+    "4242\xa04242\xa04242\xa04241",
+]
+
+
+def outcome(fn, pan):
+    try:
+        return tuple(fn(pan))
+    except CardValidationError:
+        return "invalid"
+
+
+def time_it(fn, pans) -> float:
+    started = time.perf_counter()
+    for pan in pans:
+        try:
+            fn(pan)
+        except CardValidationError:
+            pass
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--invalid-rate", type=float, default=0.1)
+    parser.add_argument("--formatted-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.count:,} PANs...")
+    pans = make_pans(args.count, args.seed, args.invalid_rate, args.formatted_rate)
+
+    mismatches = 0
+    for pan in pans + UNICODE_PANS:
+        if outcome(validate_card_number, pan) != outcome(legacy_validate_card_number, pan) \
+                or detect_card_brand(pan) != legacy_detect_card_brand(pan):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  mismatch: {pan!r}")
+    print(f"Equivalence: {mismatches} mismatches")
+
+    for name, new, old in (
+        ("validate_card_number", validate_card_number, legacy_validate_card_number),
+        ("detect_card_brand", detect_card_brand, legacy_detect_card_brand),
+    ):
+        legacy_time = time_it(old, pans)
+        new_time = time_it(new, pans)
+        print(f"\n── {name} ──")
+        print(f"  legacy : {legacy_time:.2f}s  ({legacy_time / args.count * 1e9:.0f} ns/card)")
+        print(f"  new    : {new_time:.2f}s  ({new_time / args.count * 1e9:.0f} ns/card)")
+        print(f"  speedup: {legacy_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Query-plan regression check for the hot endpoints
+
+Seeds a scratch database, calls search_flights, get_seat_map,
+list_my_bookings and process_payment directly, captures every SQL
+statement they issue (engine events), EXPLAINs each one and fails if any
+of them full-scans bookings, flights, payments or routes. A case also
+fails if it never reaches its key statement (e.g. it raised first), so a
+broken call can't pass with nothing explained.
+
+SQLite (default, a temp file) reads EXPLAIN QUERY PLAN; PostgreSQL reads
+EXPLAIN (FORMAT JSON) with enable_seqscan off, so the check is about
+whether a usable index exists rather than what the planner prefers on a
+small table. Only point --database-url at an empty scratch database.
+
+Run: python -m benchmarks.explain_plans [--database-url URL] [--flights 5000]
+Exit status is 1 if any plan regressed or any case didn't reach its key statement.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+HOT_TABLES = ("bookings", "flights", "payments", "routes")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: temp SQLite file)")
+    parser.add_argument("--airports", type=int, default=40)
+    parser.add_argument("--flights", type=int, default=5000)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print every plan")
+    return parser.parse_args()
+
+
+def seed(db, args):
+    """Bulk-insert a dataset big enough that a missing index shows up"""
+    from app.core.security import hash_password
+    from app.models import Airline, Airport, Aircraft, Route, Flight, User, Booking, BookingStatus, Payment, PaymentStatus
+    import seed_data
+
+    if db.query(Flight).first() is not None:
+        sys.exit("Refusing to seed: the target database already has flights (use an empty scratch database)")
+
+    rng = random.Random(7)
+    explain_user = User(name="Explain", email="explain@example.com", username="explain",
+                        password_hash=hash_password("Explain@123"))
+    db.add(explain_user)
+    db.flush()
+    # Other users, so "my bookings" is a small slice of the table
+    password_hash = hash_password("Explain@123")
+    db.bulk_insert_mappings(User, [
+        {"name": f"User {i}", "email": f"user{i}@example.com", "username": f"user{i}", "password_hash": password_hash}
+        for i in range(args.users - 1)
+    ])
+    db.add(Airline(name="Explain Air", code="EX", price_factor=1.0))
+    db.add(Aircraft(model="Boeing 737-800", total_capacity=162, seat_map=seed_data.make_seat_map_737()))
+    db.bulk_insert_mappings(Airport, [
+        {"name": f"Airport {i}", "city": f"City {i}", "country": "Testland", "iata_code": f"{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}X"}
+        for i in range(args.airports)
+    ])
+    db.bulk_insert_mappings(Route, [
+        {"source_airport_id": s, "destination_airport_id": d, "distance_km": 1000}
+        for s in range(1, args.airports + 1) for d in range(1, args.airports + 1) if s != d
+    ])
+    db.flush()
+    route_count = args.airports * (args.airports - 1)
+
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    db.bulk_insert_mappings(Flight, [
+        {
+            "flight_number": f"EX{i}", "route_id": 1 if i % 50 == 0 else rng.randint(1, route_count),
+            "airline_id": 1, "aircraft_id": 1,
+            "departure_time": start + timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+            "arrival_time": start + timedelta(days=31),
+            "base_price_economy": 200,
+        }
+        for i in range(args.flights)
+    ])
+    seats = [f"{row}{letter}" for row in range(1, 28) for letter in "ABCDEF"]
+    # Distinct (flight, seat) pairs, as seat holders must be; the first
+    # (flight 1, seat 1A) is left for the booking process_payment pays
+    slots = rng.sample(range(1, args.flights * len(seats)), args.bookings)
+    db.bulk_insert_mappings(Booking, [
+        {
+            "booking_reference": f"E{i:07d}", "user_id": rng.randint(1, args.users),
+            "flight_id": slot // len(seats) + 1, "seat_number": seats[slot % len(seats)],
+            "passenger_name": "P", "passenger_email": "p@example.com",
+            "passenger_phone": "1", "total_amount": 200,
+            "status": BookingStatus.CONFIRMED if i % 3 else BookingStatus.CANCELLED,
+            "booking_time": start - timedelta(minutes=i),
+        }
+        for i, slot in enumerate(slots)
+    ])
+    db.bulk_insert_mappings(Payment, [
+        {"booking_id": i, "amount": 200, "currency": "USD", "payment_method": "credit_card",
+         "transaction_id": f"txn_{i}", "status": PaymentStatus.SUCCESS}
+        for i in range(1, args.bookings + 1, 2)
+    ])
+    # The booking that process_payment will pay
+    db.add(Booking(booking_reference="EXPLAIN", user_id=explain_user.id, flight_id=1, seat_number="1A", passenger_name="P",
+                   passenger_email="p@example.com", passenger_phone="1", total_amount=200,
+                   status=BookingStatus.PENDING, payment_deadline=datetime.utcnow() + timedelta(hours=1)))
+    db.commit()
+    return start
+
+
+def capture(engine, run):
+    """
+    Run `run()` and return the (statement, parameters) pairs it sent to the
+    database, and the exception it stopped with (None if it returned)
+    """
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    error = None
+    try:
+        run()
+    except Exception as e:
+        # Side effects after the SQL (MongoDB logging, email) are expected to
+        # fail without those services; the caller checks the SQL was reached
+        error = e
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements, error
+
+
+def full_scans(engine, statement, parameters):
+    """Hot tables the statement reads without an index, plus the plan text"""
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if engine.dialect.name == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            plan = [row[-1] for row in cursor.fetchall()]
+            bad = [t for t in HOT_TABLES for line in plan if line.startswith(f"SCAN {t}")]
+            return bad, "\n".join(plan)
+
+        cursor.execute("SET enable_seqscan = off")
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        bad = []
+
+        def walk(node):
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+                bad.append(node["Relation Name"])
+            for child in node.get("Plans", []):
+                walk(child)
+
+        walk(plan[0]["Plan"])
+        return bad, json.dumps(plan[0]["Plan"], indent=1)
+    finally:
+        raw.rollback()
+        raw.close()
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "explain.db")
+    os.environ.setdefault("MOCK_GATEWAY_LATENCY_MS", "0")
+
+    # App modules read their settings at import time
+    from fastapi import Request, Response
+    from sqlalchemy import text
+    from app.api.v1.booking import list_my_bookings
+    from app.api.v1.flight import search_flights, get_seat_map
+    from app.api.v1.payment import process_payment
+    from app.db.init_db import init_db
+    from app.db.session import SessionLocal, engine
+    from app.models import Booking, User
+    from app.schemas.payment import PaymentCreate
+    from app.services.reference_cache import reference_cache
+
+    init_db()
+    db = SessionLocal()
+    start = seed(db, args)
+    if engine.dialect.name == "sqlite":
+        db.execute(text("ANALYZE"))
+    reference_cache.load_all()
+
+    user = db.query(User).filter(User.username == "explain").one()
+    booking = db.query(Booking).filter(Booking.booking_reference == "EXPLAIN").one()
+    first_route = reference_cache.get("routes", 1)
+    origin = reference_cache.get("airports", first_route["source_airport_id"])["iata_code"]
+    destination = reference_cache.get("airports", first_route["destination_airport_id"])["iata_code"]
+
+    booking_id = booking.id
+    # name -> (call, start of the statement it must reach: its last hot query)
+    cases = {
+        "search_flights": (lambda: search_flights(
+            origin_iata=origin, destination_iata=destination, date=start.strftime("%Y-%m-%d"),
+            time_window=None, max_price=None, currency="USD", db=db,
+        ), "SELECT bookings.flight_id"),
+        "get_seat_map": (lambda: get_seat_map(
+            flight_id=1, request=Request({"type": "http", "headers": []}), db=db,
+        ), "SELECT bookings.seat_number"),
+        "list_my_bookings": (lambda: list_my_bookings(
+            response=Response(), after_id=None, limit=50, db=db, current_user=user,
+        ), "SELECT bookings.id"),
+        "process_payment": (lambda: asyncio.run(process_payment(
+            PaymentCreate(booking_id=booking_id, amount=200, card_number="4242424242424242",
+                          card_expiry="12/35", card_cvv="123"),
+            response=Response(), db=db, current_user=user,
+        )), "UPDATE bookings SET"),
+    }
+
+    failures = incomplete = 0
+    print(f"Dialect: {engine.dialect.name}")
+    for name, (run, key_statement) in cases.items():
+        print(f"\n── {name} ──")
+        statements, error = capture(engine, run)
+        reached = any(" ".join(statement.split()).startswith(key_statement) for statement, parameters in statements)
+        if error is not None:
+            print(f"    ({'stopped after SQL' if reached else 'FAILED before its SQL'}: "
+                  f"{type(error).__name__}: {str(error)[:80]})")
+        if not reached:
+            incomplete += 1
+            print(f"  [NOT REACHED] {key_statement} ... ({len(statements)} statement(s) captured)")
+        # Repeats of one statement (e.g. a lazy load per row) are explained once
+        distinct = {}
+        for statement, parameters in statements:
+            distinct.setdefault(statement, [parameters, 0])[1] += 1
+        for statement, (parameters, count) in distinct.items():
+            bad, plan = full_scans(engine, statement, parameters)
+            status = "FULL SCAN: " + ", ".join(sorted(set(bad))) if bad else "ok"
+            failures += bool(bad)
+            repeat = f" (x{count})" if count > 1 else ""
+            print(f"  [{status}]{repeat} {' '.join(statement.split())[:110]}")
+            if bad or args.verbose:
+                print("    " + plan.replace("\n", "\n    "))
+        db.rollback()
+
+    print(f"\n{failures} statement(s) with full scans on {', '.join(HOT_TABLES)}")
+    if incomplete:
+        print(f"{incomplete} case(s) didn't reach their key statement")
+    sys.exit(1 if failures or incomplete else 0)
+
+
+if __name__ == "__main__":
+    main()
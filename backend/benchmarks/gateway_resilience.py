@@ -0,0 +1,135 @@
+"""
+Benchmark the payment gateway resilience layer against a degraded mock gateway
+
+Fires a burst of concurrent charges at MockPaymentGateway with injected
+latency, failures and hangs, once through a bare thread pool (the old
+behaviour) and once through ResilientPaymentGateway, and prints latency
+percentiles and outcome counts for both.
+
+Run: python -m benchmarks.gateway_resilience --requests 300 --hang-rate 0.1
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+from app.utils.payment_gateway import MockPaymentGateway, PaymentGatewayError
+from app.utils.gateway_resilience import (
+    ResilientPaymentGateway,
+    CircuitBreaker,
+    GatewayUnavailable,
+)
+
+CHARGE = {
+    "amount": 199.0,
+    "currency": "USD",
+    "card_number": "4242424242424242",
+    "card_expiry": "12/30",
+    "card_cvv": "123",
+    "cardholder_name": "Bench Mark",
+}
+
+
+def make_gateway(args) -> MockPaymentGateway:
+    return MockPaymentGateway(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+    )
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, latencies, outcomes, wall):
+    print(f"\n── {name} ──")
+    print(f"  wall time      : {wall:.2f}s")
+    print(f"  throughput     : {len(latencies) / wall:.1f} req/s")
+    print(f"  p50/p95/p99    : {percentile(latencies, 50) * 1000:.0f} / "
+          f"{percentile(latencies, 95) * 1000:.0f} / {percentile(latencies, 99) * 1000:.0f} ms")
+    print(f"  mean           : {statistics.mean(latencies) * 1000:.0f} ms")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome:<15}: {count}")
+
+
+async def run_unprotected(args):
+    """Old behaviour: every request blocks a default-pool thread on the gateway"""
+    gateway = make_gateway(args)
+    loop = asyncio.get_running_loop()
+    latencies, outcomes = [], Counter()
+
+    async def one():
+        started = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(None, lambda: gateway.charge(**CHARGE))
+            outcomes["success" if result.success else "declined/timeout"] += 1
+        except PaymentGatewayError:
+            outcomes["gateway_error"] += 1
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(args.requests)])
+    report("unprotected", latencies, outcomes, time.perf_counter() - started)
+
+
+async def run_resilient(args):
+    gateway = ResilientPaymentGateway(
+        make_gateway(args),
+        timeout=args.timeout,
+        max_concurrency=args.concurrency,
+        queue_timeout=args.queue_timeout,
+        breaker=CircuitBreaker(threshold=args.breaker_threshold, reset_timeout=args.breaker_reset),
+    )
+    latencies, outcomes = [], Counter()
+
+    async def one():
+        started = time.perf_counter()
+        try:
+            result = await gateway.charge(**CHARGE)
+            code = result.gateway_response.get("code")
+            outcomes["success" if result.success else code or "declined"] += 1
+        except GatewayUnavailable:
+            outcomes["fast_fail"] += 1
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(args.requests)])
+    report("resilient", latencies, outcomes, time.perf_counter() - started)
+    gateway.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--hang-rate", type=float, default=0.05)
+    parser.add_argument("--hang-seconds", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--queue-timeout", type=float, default=2.0)
+    parser.add_argument("--breaker-threshold", type=int, default=5)
+    parser.add_argument("--breaker-reset", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-unprotected", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{args.requests} charges | latency {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms | "
+          f"failure {args.failure_rate:.0%} | hang {args.hang_rate:.0%} ({args.hang_seconds:.0f}s)")
+    if not args.skip_unprotected:
+        asyncio.run(run_unprotected(args))
+    asyncio.run(run_resilient(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Generate a production-sized synthetic dataset for load and performance tests
+
+Builds the reference data and flights with seed_data.seed_database (same
+airlines, airports, aircraft and routes, --days of flights), then adds
+--users users and fills every flight with bookings and payments:
+
+- each flight's occupancy is drawn around --load-factor (fuller closer to
+  departure) and seats are picked from the aircraft's seat_map, so no seat
+  is held twice and fares follow the seat's cabin class
+- seat holders are CONFIRMED (paid, ticketed) or PENDING (--pending-rate,
+  inside their payment window); on top of them come CANCELLED bookings
+  with a refunded payment (--refund-rate) and EXPIRED ones (--expire-rate)
+- --failure-rate of payments are preceded by a declined attempt
+- matching booking_logs / payment_logs documents are written to MongoDB
+  (those two collections are emptied first, as the SQL tables are)
+
+Everything is derived from --seed, so a run is reproducible. Rows are
+written in bulk per chunk of flights (COPY on PostgreSQL). This CLEARS the
+target database, like seed_data.py.
+
+Run: python -m benchmarks.load_dataset --days 90 --users 500000 --load-factor 0.8
+     (roughly 10M bookings; --skip-mongo to leave MongoDB alone)
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+import seed_data
+from app.core.config import MONGODB_URL, MONGODB_DB_NAME
+from app.core.security import hash_password
+from app.db.init_db import init_db
+from app.db.session import SessionLocal
+from app.models import Aircraft, Airline, Booking, Flight, Payment, User
+from app.models.booking import BookingStatus
+from app.models.payment import PaymentStatus
+
+FIRST_NAMES = ["James", "Mary", "Wei", "Fatima", "Carlos", "Aisha", "Hiroshi", "Olga", "Raj", "Emma",
+               "Mohammed", "Sofia", "Liam", "Yuki", "Ana", "David", "Priya", "Lucas", "Chen", "Amara"]
+LAST_NAMES = ["Smith", "Garcia", "Wang", "Khan", "Müller", "Silva", "Tanaka", "Ivanova", "Patel", "Brown",
+              "Kim", "Rossi", "Nguyen", "Okafor", "Dubois", "Cohen", "Santos", "Jensen", "Ali", "Lopez"]
+CARD_BRANDS = ["Visa", "Visa", "Mastercard", "Mastercard", "Amex", "Discover"]
+DECLINE_REASONS = ["Card declined", "Insufficient funds", "Card expired", "Do not honor"]
+
+USER_COLUMNS = ("id", "name", "email", "username", "password_hash", "phone_number", "is_admin")
+BOOKING_COLUMNS = (
+    "id", "booking_reference", "ticket_number", "user_id", "flight_id", "seat_number",
+    "passenger_name", "passenger_email", "passenger_phone", "total_amount", "status",
+    "booking_time", "issued_time", "payment_deadline",
+)
+PAYMENT_COLUMNS = (
+    "id", "booking_id", "amount", "currency", "payment_method", "card_last4", "card_brand",
+    "transaction_id", "refund_transaction_id", "status", "failure_reason", "payment_time",
+)
+
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_REFERENCE_SPACE = 36 ** 6
+_REFERENCE_MULTIPLIER = 2654435761  # coprime with 36, so id -> reference is a bijection
+
+
+def booking_reference(booking_id: int) -> str:
+    """Unique, random-looking 6-character reference for an id (< 36^6)"""
+    n = booking_id * _REFERENCE_MULTIPLIER % _REFERENCE_SPACE
+    chars = []
+    for _ in range(6):
+        n, digit = divmod(n, 36)
+        chars.append(_BASE36[digit])
+    return "".join(chars)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=14, help="Days of flights")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--load-factor", type=float, default=0.75, help="Mean share of seats held per flight")
+    parser.add_argument("--load-spread", type=float, default=0.15, help="Std-dev of the per-flight load factor")
+    parser.add_argument("--pending-rate", type=float, default=0.05, help="Seat holders still inside the payment window")
+    parser.add_argument("--refund-rate", type=float, default=0.06, help="Cancelled + refunded bookings per seat holder")
+    parser.add_argument("--expire-rate", type=float, default=0.04, help="Expired (never paid) bookings per seat holder")
+    parser.add_argument("--failure-rate", type=float, default=0.03, help="Payments preceded by a declined attempt")
+    parser.add_argument("--payment-window", type=int, default=15, help="Minutes a PENDING booking has to pay")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows per COPY / insert batch")
+    parser.add_argument("--flight-chunk", type=int, default=2000, help="Flights per commit")
+    parser.add_argument("--skip-mongo", action="store_true", help="Don't write MongoDB log documents")
+    return parser.parse_args()
+
+
+class DatasetGenerator:
+    """Turns flights into booking, payment and log rows; keeps id counters across chunks"""
+
+    def __init__(self, args, user_ids, airlines, seats_by_aircraft, now):
+        self.args = args
+        self.user_ids = user_ids
+        self.airlines = airlines  # id -> (code, price_factor)
+        self.seats_by_aircraft = seats_by_aircraft  # id -> [(seat_number, cabin class)]
+        self.now = now
+        self.next_booking_id = 1
+        self.next_payment_id = 1
+        self.counts = {}
+
+    def _passenger(self, user_id):
+        name = f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}"
+        return name, f"user{user_id}@example.com", f"+1555{user_id % 10_000_000:07d}"
+
+    def _payment(self, booking_id, amount, status, paid_at, reason=None, refund=False):
+        payment_id = self.next_payment_id
+        self.next_payment_id += 1
+        brand = random.choice(CARD_BRANDS)
+        last4 = f"{random.randint(0, 9999):04d}"
+        txn = f"mock_txn_{payment_id:012x}" if reason is None else None
+        row = (
+            payment_id, booking_id, amount, "USD", "credit_card", last4, brand, txn,
+            f"mock_refund_{payment_id:012x}" if refund else None,
+            status, reason, paid_at,
+        )
+        return row, {"card_brand": brand, "card_last4": last4, "transaction_id": txn}
+
+    def flight_rows(self, flight):
+        """Bookings, payments and log documents for one flight"""
+        args, now = self.args, self.now
+        flight_id, aircraft_id, airline_id, departure, prices = flight
+        code, factor = self.airlines[airline_id]
+        seats = self.seats_by_aircraft[aircraft_id]
+
+        # Flights fill up as departure approaches
+        days_out = max((departure - now).total_seconds() / 86400, 0)
+        load = random.gauss(args.load_factor, args.load_spread) * (1 - 0.5 * min(days_out, 60) / 60)
+        held = random.sample(seats, int(len(seats) * min(max(load, 0.0), 1.0)))
+        extra = [(BookingStatus.CANCELLED, s) for s in held if random.random() < args.refund_rate]
+        extra += [(BookingStatus.EXPIRED, s) for s in held if random.random() < args.expire_rate]
+
+        bookings, payments, booking_logs, payment_logs = [], [], [], []
+        for status, (seat, cabin) in [
+            (BookingStatus.PENDING if random.random() < args.pending_rate else BookingStatus.CONFIRMED, s)
+            for s in held
+        ] + extra:
+            booking_id = self.next_booking_id
+            self.next_booking_id += 1
+            user_id = random.choice(self.user_ids)
+            amount = round(float(prices[cabin] or prices["economy"]) * factor, 2)
+            reference = booking_reference(booking_id)
+
+            if status == BookingStatus.PENDING:
+                booked_at = now - timedelta(seconds=random.randint(0, args.payment_window * 60 - 1))
+            else:
+                # Booked some time before departure (and before now)
+                lead = timedelta(minutes=random.randint(args.payment_window + 1, 60 * 24 * 90))
+                booked_at = min(departure, now) - lead
+            deadline = booked_at + timedelta(minutes=args.payment_window)
+            paid_at = booked_at + timedelta(seconds=random.randint(20, args.payment_window * 60 - 1))
+
+            issued_at = ticket = None
+            if status in (BookingStatus.CONFIRMED, BookingStatus.CANCELLED):
+                issued_at, ticket = paid_at, f"{code}-{reference}"
+                deadline = None
+
+            name, email, phone = self._passenger(user_id)
+            bookings.append((
+                booking_id, reference, ticket, user_id, flight_id, seat, name, email, phone,
+                amount, status, booked_at, issued_at, deadline,
+            ))
+            logs = [("created", BookingStatus.PENDING, booked_at)]
+
+            attempts = []
+            if random.random() < args.failure_rate and status != BookingStatus.PENDING:
+                attempts.append((PaymentStatus.FAILED, random.choice(DECLINE_REASONS), paid_at - timedelta(seconds=10)))
+            if status == BookingStatus.CONFIRMED:
+                attempts.append((PaymentStatus.SUCCESS, None, paid_at))
+                logs.append(("confirmed", status, paid_at))
+            elif status == BookingStatus.CANCELLED:
+                attempts.append((PaymentStatus.REFUNDED, None, paid_at))
+                logs.append(("confirmed", BookingStatus.CONFIRMED, paid_at))
+                cancelled_at = paid_at + (now - paid_at) * random.random()
+                logs.append(("cancelled", status, cancelled_at))
+            elif status == BookingStatus.EXPIRED:
+                logs.append(("expired", status, deadline))
+
+            for payment_status, reason, at in attempts:
+                refunded = payment_status == PaymentStatus.REFUNDED
+                row, meta = self._payment(booking_id, amount, payment_status, at, reason, refunded)
+                payments.append(row)
+                events = [("failed" if reason else "captured", PaymentStatus.FAILED if reason else PaymentStatus.SUCCESS, at)]
+                if refunded:
+                    events.append(("refunded", payment_status, cancelled_at))
+                for event_type, event_status, event_at in events:
+                    payment_logs.append({
+                        "payment_id": row[0], "booking_id": booking_id, "amount": amount,
+                        "event_type": event_type, "payment_status": event_status.value, "reason": reason,
+                        "metadata": meta if event_type != "refunded" else {"refund_transaction_id": row[8]},
+                        "timestamp": event_at,
+                    })
+
+            for event_type, event_status, event_at in logs:
+                booking_logs.append({
+                    "booking_id": booking_id, "user_id": user_id, "flight_id": flight_id, "seat_id": seat,
+                    "event_type": event_type, "status": event_status.value,
+                    "metadata": {"booking_reference": reference, "total_amount": amount},
+                    "timestamp": event_at,
+                })
+            self.counts[status.value] = self.counts.get(status.value, 0) + 1
+
+        return bookings, payments, booking_logs, payment_logs
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    init_db()
+    seed_data.seed_database(days=args.days, batch_size=args.batch_size)
+
+    mongo = None
+    if not args.skip_mongo:
+        from pymongo import MongoClient
+        mongo = MongoClient(MONGODB_URL)[MONGODB_DB_NAME]
+        mongo.booking_logs.delete_many({})
+        mongo.payment_logs.delete_many({})
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        dialect = db.get_bind().dialect.name
+
+        # ── Users (one shared password hash; bcrypt per row would dominate) ──
+        first_user_id = (db.scalar(select(func.max(User.id))) or 0) + 1
+        password_hash = hash_password("Test@1234")
+        user_ids = list(range(first_user_id, first_user_id + args.users))
+        seed_data.write_rows(db, User.__table__, USER_COLUMNS, (
+            (uid, f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}", f"user{uid}@example.com",
+             f"user{uid}", password_hash, f"+1555{uid % 10_000_000:07d}", False)
+            for uid in user_ids
+        ), args.batch_size)
+        db.commit()
+        print(f"  ✓ Created {args.users:,} load-test users (password Test@1234)")
+
+        # ── Bookings, payments and logs, a chunk of flights at a time ──
+        airlines = {a.id: (a.code, a.price_factor or 1.0) for a in db.query(Airline)}
+        seats_by_aircraft = {
+            ac.id: [
+                (seat["number"], row.get("class", "economy"))
+                for row in ac.seat_map.get("rows", []) for seat in row.get("seats", [])
+            ]
+            for ac in db.query(Aircraft)
+        }
+        generator = DatasetGenerator(args, user_ids, airlines, seats_by_aircraft, datetime.now())
+        flight_total = db.scalar(select(func.count(Flight.id)))
+
+        last_id, done, booking_count, payment_count = 0, 0, 0, 0
+        while True:
+            page = db.execute(
+                select(Flight.id, Flight.aircraft_id, Flight.airline_id, Flight.departure_time,
+                       Flight.base_price_economy, Flight.base_price_business, Flight.base_price_first)
+                .where(Flight.id > last_id).order_by(Flight.id).limit(args.flight_chunk)
+            ).all()
+            if not page:
+                break
+            last_id = page[-1].id
+
+            bookings, payments, booking_logs, payment_logs = [], [], [], []
+            for f in page:
+                prices = {"economy": f.base_price_economy, "business": f.base_price_business, "first": f.base_price_first}
+                b, p, bl, pl = generator.flight_rows((f.id, f.aircraft_id, f.airline_id, f.departure_time, prices))
+                bookings += b
+                payments += p
+                booking_logs += bl
+                payment_logs += pl
+
+            booking_count += seed_data.write_rows(db, Booking.__table__, BOOKING_COLUMNS, bookings, args.batch_size)
+            payment_count += seed_data.write_rows(db, Payment.__table__, PAYMENT_COLUMNS, payments, args.batch_size)
+            db.commit()
+            if mongo is not None:
+                for collection, docs in ((mongo.booking_logs, booking_logs), (mongo.payment_logs, payment_logs)):
+                    for i in range(0, len(docs), args.batch_size):
+                        collection.insert_many(docs[i:i + args.batch_size], ordered=False)
+
+            done += len(page)
+            elapsed = time.perf_counter() - started
+            print(f"  … {done:,}/{flight_total:,} flights, {booking_count:,} bookings "
+                  f"({booking_count / elapsed:,.0f}/s)", flush=True)
+
+        # Explicit ids were inserted, so move the sequences past them
+        if dialect == "postgresql":
+            for table in ("users", "bookings", "payments"):
+                db.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                ))
+            db.commit()
+
+        elapsed = time.perf_counter() - started
+        print()
+        print(f"✅ Load dataset generated in {elapsed:.1f}s (seed {args.seed})")
+        print(f"   Users    : {args.users:,}")
+        print(f"   Bookings : {booking_count:,} ({', '.join(f'{k}: {v:,}' for k, v in sorted(generator.counts.items()))})")
+        print(f"   Payments : {payment_count:,}")
+        if mongo is None:
+            print("   MongoDB  : skipped")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+"""
+Micro-benchmarks for the API's CPU-bound hot paths
+
+Times seat-map validation and the availability overlay, search result
+building, fare pricing and currency conversion, schedule departures,
+bulk-import row validation, booking references, the card validators,
+JWT encode/decode, the email HTML builders and response encoding
+(validated vs trusted), pytest-benchmark style (auto-ranged iterations,
+several rounds, min/median/mean per call). Fixtures are the real seat maps
+and reference data from seed_data.py in a temporary SQLite database, with
+one Boeing 777 flight about 75% booked.
+
+Run: python -m benchmarks.micro [--filter card] [--save baseline.json]
+     python -m benchmarks.micro --compare baseline.json --threshold 10
+With --compare the exit status is 1 if any benchmark got more than
+--threshold percent slower than the saved baseline (by --metric).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+# name -> setup(fixtures) returning the zero-argument callable to time
+BENCHMARKS = {}
+
+
+def bench(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# ── Fixtures ──
+
+class Fixtures:
+    """Seeded SQLite stand-in plus the objects the benchmarks need"""
+
+    def __init__(self, days: int, load_factor: float):
+        import seed_data
+        from sqlalchemy import func
+        from app.db.init_db import init_db
+        from app.db.session import SessionLocal
+        from app.models import Aircraft, Booking, BookingStatus, Flight, User
+        from app.services.reference_cache import reference_cache
+
+        init_db()
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed_data.seed_database(days=days)
+            reference_cache.load_all()
+
+        db = SessionLocal()
+        self.db = db
+        self.aircraft = db.query(Aircraft).filter(Aircraft.model == "Boeing 777-300ER").one()
+        self.flight = db.query(Flight).filter(Flight.aircraft_id == self.aircraft.id).order_by(Flight.id).first()
+
+        # The busiest route/day, so search builds a realistic number of results
+        route_id, day, _ = (
+            db.query(Flight.route_id, func.date(Flight.departure_time), func.count(Flight.id))
+            .group_by(Flight.route_id, func.date(Flight.departure_time))
+            .order_by(func.count(Flight.id).desc()).first()
+        )
+        route = reference_cache.get("routes", route_id)
+        self.search = {
+            "origin_iata": reference_cache.get("airports", route["source_airport_id"])["iata_code"],
+            "destination_iata": reference_cache.get("airports", route["destination_airport_id"])["iata_code"],
+            "date": str(day),
+        }
+
+        user = db.query(User).first()
+        seats = sorted(reference_cache.valid_seats(self.aircraft.id))
+        rng = random.Random(7)
+        now = datetime.utcnow()
+        db.add_all([
+            Booking(
+                booking_reference=f"MB{i:05d}", user_id=user.id, flight_id=self.flight.id, seat_number=seat,
+                passenger_name="Micro Bench", passenger_email="bench@example.com", passenger_phone="1",
+                total_amount=250, status=BookingStatus.CONFIRMED, booking_time=now - timedelta(days=1),
+            )
+            for i, seat in enumerate(rng.sample(seats, int(len(seats) * load_factor)))
+        ])
+        db.commit()
+        self.seats = seats
+        self.user = user
+        self.username = user.username
+
+    def close(self):
+        self.db.close()
+
+
+# ── Benchmarks ──
+
+@bench("booking.seat_validation")
+def _(fx):
+    """create_booking: is the requested seat in the aircraft's seat map"""
+    from app.services.reference_cache import reference_cache
+    aircraft_id, seat = fx.aircraft.id, fx.seats[len(fx.seats) // 2]
+    return lambda: seat in reference_cache.valid_seats(aircraft_id)
+
+
+@bench("booking.seat_numbers_777")
+def _(fx):
+    """Seat set of a 396-seat map (built on every reference cache load)"""
+    from app.services.reference_cache import seat_numbers
+    seat_map = fx.aircraft.seat_map
+    return lambda: seat_numbers(seat_map)
+
+
+@bench("booking.generate_booking_reference")
+def _(fx):
+    from app.api.v1.booking import generate_booking_reference
+    return generate_booking_reference
+
+
+def _request(**headers):
+    from starlette.requests import Request
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+    })
+
+
+@bench("flight.get_seat_map_777")
+def _(fx):
+    """Seat map with the availability overlay, ~75% booked, cache miss (SQLite round trips included)"""
+    from app.api.v1.flight import get_seat_map
+    from app.services.seat_map_cache import seat_map_cache
+    flight_id, db, request = fx.flight.id, fx.db, _request()
+
+    def run():
+        seat_map_cache.invalidate([flight_id])
+        return get_seat_map(flight_id=flight_id, request=request, db=db)
+    return run
+
+
+@bench("flight.get_seat_map_777_cached_gzip")
+def _(fx):
+    """Poll served from the seat-map cache, precompressed"""
+    from app.api.v1.flight import get_seat_map
+    flight_id, db, request = fx.flight.id, fx.db, _request(accept_encoding="gzip, deflate, br")
+    get_seat_map(flight_id=flight_id, request=request, db=db)
+    return lambda: get_seat_map(flight_id=flight_id, request=request, db=db)
+
+
+@bench("flight.get_seat_map_777_not_modified")
+def _(fx):
+    """Poll with a current If-None-Match: 304, no database query"""
+    from app.api.v1.flight import get_seat_map
+    flight_id, db = fx.flight.id, fx.db
+    etag = get_seat_map(flight_id=flight_id, request=_request(), db=db).headers["etag"]
+    request = _request(if_none_match=etag)
+    return lambda: get_seat_map(flight_id=flight_id, request=request, db=db)
+
+
+@bench("flight.search_flights")
+def _(fx):
+    """Search on the busiest route/day: query plus result building, fare tables cached"""
+    from app.api.v1.flight import search_flights
+    params, db = fx.search, fx.db
+    return lambda: search_flights(**params, time_window=None, max_price=None, currency="USD", db=db)
+
+
+@bench("flight.search_flights_unpriced")
+def _(fx):
+    """Same search with every fare table invalidated: booked-seat count query plus batch pricing"""
+    from app.api.v1.flight import search_flights
+    from app.services.pricing import fare_engine
+    params, db = fx.search, fx.db
+
+    def run():
+        fare_engine.clear()
+        return search_flights(**params, time_window=None, max_price=None, currency="USD", db=db)
+    return run
+
+
+@bench("schedule.departures_season")
+def _(fx):
+    """Departures of a Mon/Wed/Fri/Sun schedule over a 180-day horizon"""
+    from datetime import date, time as dtime, timedelta
+    from app.models.flight_schedule import FlightSchedule
+    from app.services.flight_schedules import schedule_departures
+    schedule = FlightSchedule(days_of_week="1357", departure_time=dtime(8, 30), effective_from=date(2026, 1, 1))
+    start = date(2026, 3, 1)
+    return lambda: schedule_departures(schedule, start, start + timedelta(days=180))
+
+
+@bench("import.resolve_flight_rows_1000")
+def _(fx):
+    """Bulk flight import: validate 1000 parsed CSV rows and resolve their codes from the reference maps"""
+    from app.services.bulk_import import FlightImport
+    from app.services.reference_cache import reference_cache
+    importer = FlightImport()
+    route = reference_cache.snapshot("routes").items[0]
+    origin = reference_cache.get("airports", route["source_airport_id"])["iata_code"]
+    destination = reference_cache.get("airports", route["destination_airport_id"])["iata_code"]
+    airline = reference_cache.snapshot("airlines").items[0]["code"]
+    records = [
+        {"flight_number": f"XX{i}", "airline_code": airline, "origin_iata": origin, "destination_iata": destination,
+         "aircraft_id": "1", "departure_time": f"2027-01-{1 + i % 28:02d}T08:30:00",
+         "arrival_time": f"2027-01-{1 + i % 28:02d}T14:10:00", "base_price_economy": "199.00",
+         "base_price_business": None, "base_price_first": None}
+        for i in range(1000)
+    ]
+    return lambda: [importer.resolve(importer.row_schema.model_validate(record)) for record in records]
+
+
+@bench("pricing.fare_table_500")
+def _(fx):
+    """Fares for 500 flights x 3 cabins in one vectorized pass"""
+    import numpy as np
+    from app.services.pricing import fare_table
+    rng = np.random.default_rng(7)
+    base = rng.uniform(60, 1400, (500, 3))
+    base[rng.random(500) < 0.6, 2] = np.nan
+    factors, capacity = rng.uniform(0.8, 1.3, 500), np.full(500, 180.0)
+    booked, days_out = rng.integers(0, 180, 500).astype(float), rng.uniform(-1, 90, 500)
+    return lambda: fare_table(base, factors, booked, capacity, days_out)
+
+
+@bench("booking.check_seat_fare_quoted")
+def _(fx):
+    """create_booking_with_payment: seat cabin lookup plus fare quote HMAC check, no query"""
+    from app.api.v1.booking import check_seat_fare
+    from app.services.currency import currency_rates
+    from app.services.pricing import fare_engine
+    from app.services.reference_cache import reference_cache
+    flight, db, seat = fx.flight, fx.db, fx.seats[-1]
+    fares = fare_engine.quote(db, [flight])[flight.id]
+    fare = fares.fares[reference_cache.seat_cabin(flight.aircraft_id, seat)]
+    token = fares.quote_token(currency_rates.snapshot().version)
+    return lambda: check_seat_fare(db, flight, seat, fare, token)
+
+
+@bench("booking.check_seat_fare_quoted_eur")
+def _(fx):
+    """Same, paying in EUR: plus one Decimal conversion at the quote's rates"""
+    from app.api.v1.booking import check_seat_fare
+    from app.services.currency import currency_rates
+    from app.services.pricing import fare_engine
+    from app.services.reference_cache import reference_cache
+    flight, db, seat = fx.flight, fx.db, fx.seats[-1]
+    fares = fare_engine.quote(db, [flight])[flight.id]
+    rates = currency_rates.snapshot()
+    fare = float(rates.convert(fares.fares[reference_cache.seat_cabin(flight.aircraft_id, seat)], "EUR"))
+    token = fares.quote_token(rates.version)
+    return lambda: check_seat_fare(db, flight, seat, fare, token, "EUR")
+
+
+@bench("currency.convert_many_500")
+def _(fx):
+    """A search page's fares (500 flights x 3 cabins, some missing) to JPY, exactly, in one pass"""
+    import numpy as np
+    from app.services.currency import currency_rates
+    rng = np.random.default_rng(7)
+    fares = np.round(rng.uniform(60, 4000, (500, 3)), 2)
+    fares[rng.random(500) < 0.3, 2] = np.nan
+    rates = currency_rates.snapshot()
+    return lambda: rates.convert_many(fares, "JPY")
+
+
+@bench("currency.convert_decimal_500")
+def _(fx):
+    """The same page through Decimal convert, fare by fare, for comparison"""
+    import numpy as np
+    from app.services.currency import currency_rates
+    rng = np.random.default_rng(7)
+    fares = np.round(rng.uniform(60, 4000, 1500), 2).tolist()
+    rates = currency_rates.snapshot()
+    return lambda: [rates.convert(fare, "JPY") for fare in fares]
+
+
+@bench("booking.check_seat_fare")
+def _(fx):
+    """create_booking: seat cabin lookup plus fare check against the cached fare table"""
+    from app.api.v1.booking import check_seat_fare
+    from app.services.pricing import fare_engine
+    from app.services.reference_cache import reference_cache
+    flight, db, seat = fx.flight, fx.db, fx.seats[-1]
+    fare = fare_engine.fare(db, flight, reference_cache.seat_cabin(flight.aircraft_id, seat))
+    return lambda: check_seat_fare(db, flight, seat, fare)
+
+
+@bench("card.validate_card_number")
+def _(fx):
+    from app.utils.payment_validator import validate_card_number
+    return lambda: validate_card_number("4111111111111111")
+
+
+@bench("card.validate_card_number_formatted")
+def _(fx):
+    from app.utils.payment_validator import validate_card_number
+    return lambda: validate_card_number("5500 0000 0000 0004")
+
+
+@bench("card.detect_card_brand")
+def _(fx):
+    from app.utils.payment_validator import detect_card_brand
+    return lambda: detect_card_brand("6011000990139424")
+
+
+@bench("card.validate_expiry")
+def _(fx):
+    from app.utils.payment_validator import parse_expiry, validate_expiry
+    return lambda: validate_expiry(*parse_expiry("12/35"))
+
+
+@bench("card.validate_cvv")
+def _(fx):
+    from app.utils.payment_validator import validate_cvv
+    return lambda: validate_cvv("1234", "Amex")
+
+
+@bench("auth.create_access_token")
+def _(fx):
+    from app.core.security import create_access_token
+    username = fx.username
+    return lambda: create_access_token({"sub": username})
+
+
+@bench("auth.decode_access_token")
+def _(fx):
+    from app.core.security import create_access_token, decode_access_token
+    token = create_access_token({"sub": fx.username})
+    return lambda: decode_access_token(token)
+
+
+@bench("email.build_booking_confirmation_email")
+def _(fx):
+    from app.services.email_service import build_booking_confirmation_email
+    return lambda: build_booking_confirmation_email(
+        "AB12CD", "EK-AB12CD", "Micro Bench", "EK202", "DXB → JFK",
+        "2026-01-01 10:00", "23E", 1234.5, "USD",
+    )
+
+
+@bench("email.build_cancellation_email")
+def _(fx):
+    from app.services.email_service import build_cancellation_email
+    return lambda: build_cancellation_email("AB12CD", "Micro Bench", 1234.5, "USD")
+
+
+# Response encoding: FastAPI's validated path (response_model validation or
+# jsonable_encoder, then stdlib json) against trusted_response (orjson, no
+# re-validation) for the same payloads
+
+def _unencoded(endpoint, **kwargs):
+    """An endpoint's payload as built, before trusted_response encodes it"""
+    from app.utils import fast_json
+    enabled, fast_json.FAST_JSON_RESPONSES = fast_json.FAST_JSON_RESPONSES, False
+    try:
+        return endpoint(**kwargs)
+    finally:
+        fast_json.FAST_JSON_RESPONSES = enabled
+
+
+def _validated_encoder(route_name, payload):
+    import asyncio
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from app.main import app
+    route = next(r for r in app.routes if getattr(r, "name", None) == route_name)
+    loop = asyncio.new_event_loop()
+    # is_coroutine=True: the real sync-endpoint path also hops to the thread pool
+    return lambda: JSONResponse(loop.run_until_complete(
+        serialize_response(field=route.response_field, response_content=payload, is_coroutine=True)
+    )).body
+
+
+def _search_200(fx):
+    from app.api.v1.flight import search_flights
+    results = _unencoded(search_flights, **fx.search, time_window=None, max_price=None, currency="USD", db=fx.db)
+    return [dict(results[i % len(results)], id=i) for i in range(200)]
+
+
+def _seat_map_777(fx):
+    from app.services.seat_map_cache import seat_map_payload
+    return seat_map_payload(fx.db, fx.flight.id)
+
+
+def _my_bookings_100(fx):
+    from fastapi import Response
+    from app.api.v1.booking import list_my_bookings
+    return _unencoded(list_my_bookings, response=Response(), after_id=None, limit=100, db=fx.db, current_user=fx.user)
+
+
+@bench("json.search_200_validated")
+def _(fx):
+    return _validated_encoder("search_flights", _search_200(fx))
+
+
+@bench("json.search_200_trusted")
+def _(fx):
+    from app.utils.fast_json import FastJSONResponse
+    payload = _search_200(fx)
+    return lambda: FastJSONResponse(payload).body
+
+
+@bench("json.seat_map_777_validated")
+def _(fx):
+    return _validated_encoder("get_seat_map", _seat_map_777(fx))
+
+
+@bench("json.seat_map_777_trusted")
+def _(fx):
+    from app.utils.fast_json import FastJSONResponse
+    payload = _seat_map_777(fx)
+    return lambda: FastJSONResponse(payload).body
+
+
+@bench("json.my_bookings_100_validated")
+def _(fx):
+    return _validated_encoder("list_my_bookings", _my_bookings_100(fx))
+
+
+@bench("json.my_bookings_100_trusted")
+def _(fx):
+    from app.utils.fast_json import FastJSONResponse
+    payload = _my_bookings_100(fx)
+    return lambda: FastJSONResponse(payload).body
+
+
+# ── Runner ──
+
+def measure(fn, rounds: int, min_time: float):
+    """Per-call seconds of `rounds` rounds, each auto-ranged to run >= min_time"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2 if number < 8 else 10
+    times = [t / number for t in timer.repeat(repeat=rounds, number=number)]
+    return {
+        "min_us": round(min(times) * 1e6, 3),
+        "median_us": round(statistics.median(times) * 1e6, 3),
+        "mean_us": round(statistics.fmean(times) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(times) * 1e6, 3) if len(times) > 1 else 0.0,
+        "rounds": rounds,
+        "iterations": number,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", "-k", default=None, help="Only benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per round")
+    parser.add_argument("--days", type=int, default=3, help="Days of seeded flights")
+    parser.add_argument("--load-factor", type=float, default=0.75, help="Share of the 777 flight's seats booked")
+    parser.add_argument("--save", default=None, help="Write results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Baseline JSON from an earlier --save")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown that fails --compare")
+    parser.add_argument("--metric", choices=("min", "median", "mean"), default="min", help="Statistic compared")
+    args = parser.parse_args()
+
+    # The stand-in database; app modules read DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "micro.db")
+    os.environ.setdefault("MOCK_GATEWAY_LATENCY_MS", "0")
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["benchmarks"]
+
+    names = [n for n in BENCHMARKS if not args.filter or args.filter in n]
+    print(f"Seeding SQLite stand-in ({args.days} days)...")
+    fx = Fixtures(args.days, args.load_factor)
+
+    results, regressions = {}, []
+    key = f"{args.metric}_us"
+    print(f"\n  {'benchmark':42} {'min µs':>10} {'median µs':>10} {'mean µs':>10} {'ops/s':>12}")
+    try:
+        for name in names:
+            result = results[name] = measure(BENCHMARKS[name](fx), args.rounds, args.min_time)
+            line = (f"  {name:42} {result['min_us']:>10.2f} {result['median_us']:>10.2f} "
+                    f"{result['mean_us']:>10.2f} {1e6 / result['median_us']:>12,.0f}")
+            base = baseline.get(name)
+            if base and base.get(key):
+                change = (result[key] - base[key]) / base[key] * 100
+                regressed = change > args.threshold
+                line += f"  {change:+6.1f}%{'  ❌ REGRESSION' if regressed else ''}"
+                if regressed:
+                    regressions.append((name, change))
+            print(line, flush=True)
+    finally:
+        fx.close()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "git_commit": git_commit(),
+                "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "benchmarks": results,
+            }, f, indent=2)
+        print(f"\n📄 Saved to {args.save}")
+
+    if args.compare:
+        missing = [n for n in names if n not in baseline]
+        if missing:
+            print(f"\n(no baseline for: {', '.join(missing)})")
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) more than {args.threshold:g}% slower ({args.metric}):")
+            for name, change in regressions:
+                print(f"   {name}: {change:+.1f}%")
+            sys.exit(1)
+        print(f"\n✅ No benchmark more than {args.threshold:g}% slower ({args.metric})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+HTTP / WebSocket load-testing harness
+
+Drives scenario scripts (loadtest.scenarios) against a running API with
+an async client at a fixed concurrency and writes p50/p95/p99 latency,
+throughput and error rates per operation to a JSON file, tagged with the
+git commit, so runs can be compared across commits.
+
+Run: python -m loadtest search_storm --concurrency 100 --duration 30
+     python -m loadtest all --spawn --baseline loadtest/results/<earlier>.json
+"""
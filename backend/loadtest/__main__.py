@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+import httpx
+
+from loadtest import __doc__ as package_doc
+from loadtest.scenarios import SCENARIOS, Context
+from loadtest.stats import Recorder
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+USER_PASSWORD = "Loadtest@123"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest", description=package_doc,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Scenarios:\n" + "\n".join(f"  {name:16} {cls.description}" for name, cls in SCENARIOS.items()),
+    )
+    parser.add_argument("scenario", choices=[*SCENARIOS, "all"])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per scenario")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many steps instead")
+    parser.add_argument("--users", type=int, default=20, help="Test accounts to register and spread requests over")
+    parser.add_argument("--days", type=int, default=14, help="Search horizon; match the seeded --days")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=42, help="Fixture discovery seed")
+    parser.add_argument("--suggest-ratio", type=float, default=0.3, help="search_storm: share of searches preceded by a typeahead")
+    parser.add_argument("--ws-book-interval", type=float, default=0.2, help="ws_viewers: seconds between bookings")
+    parser.add_argument("--max-backoff", type=float, default=2.0, help="Cap on honouring Retry-After (s)")
+    parser.add_argument("--output", default=None, help="Result file (default: loadtest/results/<scenario>-<commit>-<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier result file to compare against")
+    parser.add_argument("--spawn", action="store_true", help="Start uvicorn on --base-url for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn")
+    return parser.parse_args()
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def spawn_server(base_url: str, workers: int) -> subprocess.Popen:
+    url = urlparse(base_url)
+    process = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app", "--host", url.hostname, "--port", str(url.port or 80),
+        "--workers", str(workers), "--log-level", "warning",
+    ])
+    for _ in range(120):
+        if process.poll() is not None:
+            sys.exit(f"❌ uvicorn exited with status {process.returncode}")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                print(f"✅ Started app at {base_url} (pid {process.pid})")
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    sys.exit("❌ App did not come up within 60s")
+
+
+async def prepare_users(client: httpx.AsyncClient, count: int):
+    """Register load-test accounts (existing ones are reused) and mint their tokens"""
+    # Login is rate-limited per IP, so tokens are signed locally with the
+    # app's SECRET_KEY (same .env as the locally started app)
+    from app.core.security import create_access_token
+
+    semaphore = asyncio.Semaphore(10)
+
+    async def register(i):
+        async with semaphore:
+            response = await client.post("/api/v1/auth/register", json={
+                "name": f"Load Test {i}", "email": f"loadtest{i}@example.com",
+                "username": f"loadtest{i}", "password": USER_PASSWORD,
+            })
+            if response.status_code not in (200, 400):  # 400: already registered
+                response.raise_for_status()
+
+    await asyncio.gather(*(register(i) for i in range(count)))
+    return [create_access_token({"sub": f"loadtest{i}"}) for i in range(count)]
+
+
+async def run_scenario(name: str, args, tokens) -> dict:
+    scenario = SCENARIOS[name]()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        recorder = Recorder()
+        ws_url = args.base_url.replace("http", "ws", 1)
+        ctx = Context(client, ws_url, tokens, recorder, args)
+        await scenario.setup(ctx)
+
+        # The clock starts after fixture discovery
+        recorder.started = time.perf_counter()
+        ctx.deadline = recorder.started + args.duration
+        print(f"▶ {name}: {args.concurrency} workers for {args.duration:g}s ...", flush=True)
+        await asyncio.gather(*(scenario.worker(ctx, i) for i in range(args.concurrency)))
+        recorder.stop()
+
+    commit, dirty = git_revision()
+    return {
+        "scenario": name,
+        "description": scenario.description,
+        "git_commit": commit,
+        "git_dirty": dirty,
+        "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "base_url": args.base_url,
+        "params": {
+            "concurrency": args.concurrency, "duration_s": args.duration, "requests": args.requests,
+            "users": args.users if scenario.needs_users else 0,
+        },
+        "notes": ctx.notes,
+        **recorder.summary(),
+    }
+
+
+def print_report(result: dict, baseline: dict | None):
+    if "error" in result:
+        print(f"\n── {result['scenario']} ── not run: {result['error']}")
+        return
+    print(f"\n── {result['scenario']} ({result['elapsed_s']:.1f}s, commit {result['git_commit']}) ──")
+    if result["notes"]:
+        print("  " + ", ".join(f"{k}={v}" for k, v in result["notes"].items()))
+    print(f"  {'operation':18} {'count':>8} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    base_ops = (baseline or {}).get("operations", {})
+    for name, op in {**result["operations"], "TOTAL": result["total"]}.items():
+        print(f"  {name:18} {op['count']:>8} {op['throughput_rps']:>8.1f} {op['p50_ms']:>9.1f} "
+              f"{op['p95_ms']:>9.1f} {op['p99_ms']:>9.1f} {op['error_rate']:>8.2%}")
+        base = base_ops.get(name) if name != "TOTAL" else (baseline or {}).get("total")
+        if base:
+            deltas = [
+                f"{key}{(op[key] - base[key]) / base[key]:+.0%}"
+                for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms") if base[key]
+            ]
+            print(f"  {'':18} vs {baseline['git_commit']}: {'  '.join(deltas)}")
+
+
+def main():
+    args = parse_args()
+    baselines = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            data = json.load(f)
+        baselines = {r["scenario"]: r for r in data.get("results", [data])}
+
+    server = spawn_server(args.base_url, args.workers) if args.spawn else None
+    try:
+        async def run_all():
+            tokens = []
+            names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+            if any(SCENARIOS[n].needs_users for n in names):
+                async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+                    tokens = await prepare_users(client, args.users)
+            results = []
+            for name in names:
+                try:
+                    results.append(await run_scenario(name, args, tokens))
+                except (httpx.HTTPError, SystemExit) as e:
+                    # Keep the other scenarios' results
+                    print(f"❌ {name} failed during setup: {type(e).__name__}: {e}")
+                    results.append({"scenario": name, "error": f"{type(e).__name__}: {e}"})
+            return results
+
+        results = asyncio.run(run_all())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    for result in results:
+        print_report(result, baselines.get(result["scenario"]))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{args.scenario}-{git_revision()[0]}-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(results[0] if len(results) == 1 else {"results": results}, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+import httpx
+import websockets
+
+API = "/api/v1"
+TEST_CARD = {"card_number": "4242424242424242", "card_expiry": "12/35", "card_cvv": "123"}
+BOOKING_STATUSES = (200, 409, 503)  # 409: seat taken or fare changed, 503: shed by the admission queue
+
+
+class Context:
+    """Shared state of one run: HTTP client, user tokens, fixtures and the recorder"""
+
+    def __init__(self, client: httpx.AsyncClient, ws_url: str, tokens: List[str], recorder, args):
+        self.client = client
+        self.ws_url = ws_url
+        self.tokens = tokens
+        self.recorder = recorder
+        self.args = args
+        self.deadline = time.perf_counter() + args.duration
+        self.remaining = args.requests  # None: run until the deadline
+        self.fixtures: Dict[str, Any] = {}
+        self.notes: Dict[str, Any] = {}
+
+    def running(self) -> bool:
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+        return time.perf_counter() < self.deadline
+
+    def auth(self, worker_id: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[worker_id % len(self.tokens)]}"}
+
+    async def request(self, name: str, method: str, url: str, expected=(200,), **kwargs) -> httpx.Response | None:
+        """Send one request and record its latency and status (transport errors included)"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, API + url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(name, time.perf_counter() - started, f"error:{type(e).__name__}", expected)
+            return None
+        self.recorder.record(name, time.perf_counter() - started, response.status_code, expected)
+        return response
+
+
+# ── Fixtures (discovered through the public API, so any seeded database works) ──
+
+async def load_routes(ctx: Context):
+    """(origin, destination) IATA pairs of every route, plus the search horizon"""
+    airports = (await ctx.client.get(f"{API}/airports/")).json()
+    routes = (await ctx.client.get(f"{API}/routes/")).json()
+    iata = {a["id"]: a["iata_code"] for a in airports}
+    ctx.fixtures["pairs"] = [(iata[r["source_airport_id"]], iata[r["destination_airport_id"]]) for r in routes]
+    ctx.fixtures["airports"] = airports
+    today = date.today()
+    ctx.fixtures["dates"] = [(today + timedelta(days=d)).isoformat() for d in range(ctx.args.days)]
+
+
+async def load_flights(ctx: Context, wanted: int = 200):
+    """Flight search results for random routes over the horizon, until `wanted` are found"""
+    await load_routes(ctx)
+    flights: Dict[int, Dict[str, Any]] = {}
+    rng = random.Random(ctx.args.seed)
+    for _ in range(wanted * 5):
+        origin, destination = rng.choice(ctx.fixtures["pairs"])
+        response = await ctx.client.get(f"{API}/flights/search", params={
+            "origin_iata": origin, "destination_iata": destination, "date": rng.choice(ctx.fixtures["dates"]),
+        })
+        if response.status_code == 200:
+            flights.update((f["id"], f) for f in response.json() if f["available_seats"] > 0)
+        if len(flights) >= wanted:
+            break
+    if not flights:
+        raise SystemExit("No bookable flights found; seed the database first (seed_data.py / benchmarks.load_dataset)")
+    ctx.fixtures["flights"] = list(flights.values())
+
+
+def seat_numbers(seat_map_response: Dict[str, Any]) -> List[str]:
+    """Available economy seats in a GET /flights/{id}/seats response (booked at fare_economy)"""
+    return [
+        seat["number"]
+        for row in seat_map_response["seat_map"].get("rows", [])
+        if row.get("class", "economy") == "economy"
+        for seat in row.get("seats", [])
+        if seat.get("available")
+    ]
+
+
+async def available_seats(ctx: Context, flight_id: int) -> List[str]:
+    response = await ctx.client.get(f"{API}/flights/{flight_id}/seats")
+    response.raise_for_status()
+    return seat_numbers(response.json())
+
+
+def booking_body(flight: Dict[str, Any], seat: str, worker_id: int) -> Dict[str, Any]:
+    return {
+        "flight_id": flight["id"],
+        "seat_number": seat,
+        "passenger_name": f"Load Test {worker_id}",
+        "passenger_email": f"loadtest{worker_id}@example.com",
+        "passenger_phone": "+15550000000",
+        "total_amount": flight["fare_economy"],
+        "fare_quote": flight["fare_quote"],
+    }
+
+
+async def fare_changed(ctx: Context, flight: Dict[str, Any], response) -> bool:
+    """True if a booking got 409 because the fare moved or its quote expired; both are refreshed"""
+    if response is None or response.status_code != 409 or "Fare" not in response.text:
+        return False
+    seat_map = await ctx.client.get(f"{API}/flights/{flight['id']}/seats")
+    if seat_map.status_code == 200:
+        flight["fare_economy"] = seat_map.json()["fares"]["economy"]
+        flight["fare_quote"] = seat_map.json()["fare_quote"]
+    return True
+
+
+# ── Scenarios ──
+
+class Scenario(ABC):
+    """Base class: `setup` once, then `worker` runs concurrently `--concurrency` times"""
+
+    name = ""
+    description = ""
+    needs_users = False
+
+    async def setup(self, ctx: Context):
+        pass
+
+    async def worker(self, ctx: Context, worker_id: int):
+        while ctx.running():
+            await self.step(ctx, worker_id)
+
+    @abstractmethod
+    async def step(self, ctx: Context, worker_id: int):
+        """One iteration of a worker's loop"""
+        pass
+
+
+class SearchStorm(Scenario):
+    name = "search_storm"
+    description = "Flight searches on random routes and dates, with airport typeahead in front"
+
+    async def setup(self, ctx):
+        await load_routes(ctx)
+
+    async def step(self, ctx, worker_id):
+        origin, destination = random.choice(ctx.fixtures["pairs"])
+        if random.random() < ctx.args.suggest_ratio:
+            city = random.choice(ctx.fixtures["airports"])["city"]
+            await ctx.request("airport_suggest", "GET", "/airports/suggest", params={"q": city[:random.randint(1, 4)]})
+        await ctx.request("flight_search", "GET", "/flights/search", params={
+            "origin_iata": origin, "destination_iata": destination, "date": random.choice(ctx.fixtures["dates"]),
+        })
+
+
+class SeatMapBrowse(Scenario):
+    name = "seat_map_browse"
+    description = "Seat maps of known flights, skewed towards a few popular ones"
+
+    async def setup(self, ctx):
+        await load_flights(ctx)
+        # Zipf-like popularity: the k-th flight is viewed ~1/k as often as the first
+        ctx.fixtures["weights"] = [1 / (k + 1) for k in range(len(ctx.fixtures["flights"]))]
+
+    async def step(self, ctx, worker_id):
+        flight = random.choices(ctx.fixtures["flights"], ctx.fixtures["weights"])[0]
+        await ctx.request("seat_map", "GET", f"/flights/{flight['id']}/seats")
+
+
+class FlashSale(Scenario):
+    name = "flash_sale"
+    description = "Every worker books seats on one flight until it sells out (409/503 are expected)"
+    needs_users = True
+
+    async def setup(self, ctx):
+        await load_flights(ctx, wanted=20)
+        flight = max(ctx.fixtures["flights"], key=lambda f: f["available_seats"])
+        ctx.fixtures["flight"] = flight
+        ctx.fixtures["seats"] = await available_seats(ctx, flight["id"])
+        ctx.notes.update(flight_id=flight["id"], seats_on_sale=len(ctx.fixtures["seats"]))
+
+    async def step(self, ctx, worker_id):
+        seats = ctx.fixtures["seats"]
+        if not seats:
+            ctx.notes.setdefault("sold_out_after_s", round(ctx.recorder.elapsed, 3))
+            ctx.deadline = 0  # nothing left to sell
+            return
+        seat = random.choice(seats)
+        response = await ctx.request(
+            "book_seat", "POST", "/bookings/", expected=BOOKING_STATUSES,
+            json=booking_body(ctx.fixtures["flight"], seat, worker_id), headers=ctx.auth(worker_id),
+        )
+        if await fare_changed(ctx, ctx.fixtures["flight"], response):
+            return
+        if response is not None and response.status_code in (200, 409) and seat in seats:
+            seats.remove(seat)
+        elif response is not None and response.status_code == 503:
+            # Back off as the admission queue asks
+            await asyncio.sleep(min(float(response.headers.get("Retry-After", 1)), ctx.args.max_backoff))
+
+
+class PaymentRefund(Scenario):
+    name = "payment_refund"
+    description = "Book a seat, pay for it, then refund the payment"
+    needs_users = True
+
+    async def setup(self, ctx):
+        await load_flights(ctx)
+        ctx.fixtures["seats"] = {}
+
+    async def step(self, ctx, worker_id):
+        flight = random.choice(ctx.fixtures["flights"])
+        seats = ctx.fixtures["seats"].get(flight["id"])
+        if seats is None:
+            response = await ctx.request("seat_map", "GET", f"/flights/{flight['id']}/seats")
+            if response is None or response.status_code != 200:
+                return
+            seats = ctx.fixtures["seats"][flight["id"]] = seat_numbers(response.json())
+        if not seats:
+            return
+        seat = seats.pop(random.randrange(len(seats)))
+        headers = ctx.auth(worker_id)
+
+        booking = await ctx.request("book", "POST", "/bookings/", expected=BOOKING_STATUSES,
+                                    json=booking_body(flight, seat, worker_id), headers=headers)
+        if await fare_changed(ctx, flight, booking):
+            seats.append(seat)
+            return
+        if booking is None or booking.status_code != 200:
+            return
+        payment = await ctx.request("pay", "POST", "/payments/", expected=(200, 202, 402), headers=headers, json={
+            "booking_id": booking.json()["id"], "amount": booking.json()["total_amount"], **TEST_CARD,
+        })
+        # 202: the charge timed out and is settled later, nothing to refund yet
+        if payment is None or payment.status_code != 200:
+            return
+        await ctx.request("refund", "POST", f"/payments/{payment.json()['id']}/refund", headers=headers)
+
+
+class WebSocketViewers(Scenario):
+    name = "ws_viewers"
+    description = ("Viewers hold a WebSocket on one flight while worker 0 books a seat every "
+                   "--ws-book-interval seconds; records connect time and broadcast delivery lag")
+    needs_users = True
+
+    async def setup(self, ctx):
+        await load_flights(ctx, wanted=20)
+        flight = max(ctx.fixtures["flights"], key=lambda f: f["available_seats"])
+        ctx.fixtures["flight"] = flight
+        ctx.fixtures["seats"] = await available_seats(ctx, flight["id"])
+        ctx.notes.update(flight_id=flight["id"], viewers=ctx.args.concurrency - 1)
+
+    async def worker(self, ctx, worker_id):
+        if worker_id != 0:
+            await self._view(ctx)
+            return
+        # Give the viewers a moment to connect
+        await asyncio.sleep(min(1.0, ctx.args.duration / 10))
+        while ctx.fixtures["seats"] and ctx.running():
+            await self.step(ctx, worker_id)
+
+    async def step(self, ctx, worker_id):
+        """Book one seat, then wait --ws-book-interval"""
+        flight, seats = ctx.fixtures["flight"], ctx.fixtures["seats"]
+        seat = seats.pop(random.randrange(len(seats)))
+        response = await ctx.request("book_seat", "POST", "/bookings/", expected=BOOKING_STATUSES,
+                                     json=booking_body(flight, seat, worker_id), headers=ctx.auth(worker_id))
+        if await fare_changed(ctx, flight, response):
+            seats.append(seat)
+        await asyncio.sleep(ctx.args.ws_book_interval)
+
+    async def _view(self, ctx):
+        url = f"{ctx.ws_url}/ws/flights/{ctx.fixtures['flight']['id']}"
+        started = time.perf_counter()
+        try:
+            connection = await websockets.connect(url, open_timeout=ctx.args.timeout)
+        except (OSError, websockets.WebSocketException, asyncio.TimeoutError) as e:
+            ctx.recorder.record("ws_connect", time.perf_counter() - started, f"error:{type(e).__name__}")
+            return
+        ctx.recorder.record("ws_connect", time.perf_counter() - started, 200)
+
+        async with connection:
+            while True:
+                timeout = ctx.deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    raw = await asyncio.wait_for(connection.recv(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                except websockets.ConnectionClosed:
+                    ctx.recorder.record("ws_message", 0.0, "error:ConnectionClosed")
+                    break
+                message = json.loads(raw)
+                sent_at = message.get("timestamp")
+                # Server timestamps are naive UTC; the app runs on this machine
+                lag = (datetime.utcnow() - datetime.fromisoformat(sent_at)).total_seconds() if sent_at else 0.0
+                ctx.recorder.record(f"ws_{message.get('type', 'message')}", max(lag, 0.0), 200)
+
+
+SCENARIOS = {cls.name: cls for cls in (SearchStorm, SeatMapBrowse, FlashSale, PaymentRefund, WebSocketViewers)}
@@ -0,0 +1,82 @@
+import math
+import time
+from typing import Any, Dict, Iterable, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Operation:
+    """Latencies and outcomes of one named request type"""
+
+    __slots__ = ("latencies", "statuses", "errors")
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "count": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if count else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+class Recorder:
+    """
+    Collects per-operation samples from all workers of a run
+
+    Workers run on one event loop, so plain dicts and lists are enough.
+    `expected` lists the statuses that count as success for an operation
+    (a 409 on a contended seat is the point of a flash sale, not an error).
+    """
+
+    def __init__(self):
+        self.operations: Dict[str, Operation] = {}
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+
+    def record(self, name: str, seconds: float, status: int | str, expected: Iterable[int] = (200,)):
+        op = self.operations.get(name)
+        if op is None:
+            op = self.operations[name] = Operation()
+        op.latencies.append(seconds)
+        op.statuses[str(status)] = op.statuses.get(str(status), 0) + 1
+        if status not in expected:
+            op.errors += 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        operations = {name: op.summary(elapsed) for name, op in sorted(self.operations.items())}
+        total = Operation()
+        for op in self.operations.values():
+            total.latencies.extend(op.latencies)
+            total.errors += op.errors
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "total": {k: v for k, v in total.summary(elapsed).items() if k != "statuses"},
+            "operations": operations,
+        }
@@ -4,13 +4,22 @@ Seed database with realistic global data:
 - 180 airports across 6 continents
 - 3 aircraft types with proper seat maps
 - 300+ routes (realistic hub-and-spoke + point-to-point)
-- Flights for next 14 days on every route
+- Flights for the next 14 days (or --days N) on every route
 
-Run: python seed_data.py
+Flights are generated from per-route plans computed once and written in
+bulk: PostgreSQL COPY, or batched executemany inserts elsewhere.
+
+Run: python seed_data.py [--days 14] [--batch-size 50000] [--seed 42]
 """
 
+import argparse
+import csv
+import io
+import time
 from datetime import datetime, timedelta
+from enum import Enum
 import random
+from sqlalchemy import insert
 from app.db.session import SessionLocal
 from app.models.user import User
 from app.models.airline import Airline
@@ -637,18 +646,161 @@ def dedupe_routes(routes):
 ROUTES_DATA = dedupe_routes(ROUTES_DATA)
 
 
-def seed_database():
+# ── Flight generation ───────────────────────────────────────────────────────
+# Carrier pools by region; an airport in a hub set pulls in that pool
+US_CARRIERS   = ["AA", "DL", "UA", "B6", "AS", "WN", "NK"]
+EU_CARRIERS   = ["BA", "LH", "AF", "KL", "LX", "IB", "FR", "U2", "EI", "TK"]
+ME_CARRIERS   = ["EK", "QR", "EY", "FZ", "G9"]
+ASIA_CARRIERS = ["SQ", "CX", "JL", "NH", "KE", "TG", "MH", "AK", "6E", "AI"]
+LONG_HAUL_CARRIERS = ["EK", "QR", "EY", "SQ", "CX", "BA", "LH", "AF", "NH", "JL",
+                      "AA", "DL", "UA", "QF", "KE", "TK"]
+
+US_HUBS   = frozenset(a[3] for a in AIRPORTS_DATA if a[4] and a[2] == "USA")
+EU_HUBS   = frozenset(["LHR", "CDG", "FRA", "AMS", "MAD", "FCO", "ZRH", "MUC", "VIE"])
+ME_HUBS   = frozenset(["DXB", "DOH", "AUH", "RUH", "JED"])
+ASIA_HUBS = frozenset(["SIN", "BKK", "KUL", "HKG", "NRT", "ICN", "PEK", "PVG"])
+
+FLIGHT_COLUMNS = (
+    "flight_number", "route_id", "airline_id", "aircraft_id", "departure_time",
+    "arrival_time", "base_price_economy", "base_price_business", "base_price_first",
+)
+
+
+def carrier_pool(origin_iata, dest_iata, dist):
+    if dist >= 6000:
+        return LONG_HAUL_CARRIERS
+    ends = {origin_iata, dest_iata}
+    if ends & US_HUBS:
+        return US_CARRIERS + EU_CARRIERS[:4]
+    if ends & EU_HUBS:
+        return EU_CARRIERS
+    if ends & ME_HUBS:
+        return ME_CARRIERS + ["BA", "LH", "AF", "SQ", "AI", "EK"]
+    if ends & ASIA_HUBS:
+        return ASIA_CARRIERS + ["BA", "LH", "EK", "QR"]
+    return [a[1] for a in AIRLINES_DATA]
+
+
+def plan_routes(route_objs, airline_ids, aircraft_ids):
+    """
+    Everything about a route's schedule that doesn't change day to day:
+    aircraft, fares, block time, carriers and departure hours
+    """
+    plans = []
+    for (origin_iata, dest_iata), (route, dist) in route_objs.items():
+        # Choose aircraft and fares by distance
+        # Long haul (>6000km) → wide body 777; shorter → 737 or A320
+        if dist >= 6000:
+            aircraft_id = aircraft_ids["777"]
+            base_price_eco = round(random.uniform(550, 1400), 2)
+            base_price_bus = round(base_price_eco * random.uniform(2.8, 4.5), 2)
+            base_price_fst = round(base_price_eco * random.uniform(5.0, 8.0), 2)
+            flight_hours   = dist / 870
+        elif dist >= 2000:
+            aircraft_id = aircraft_ids["737"] if random.random() < 0.5 else aircraft_ids["a320"]
+            base_price_eco = round(random.uniform(180, 550), 2)
+            base_price_bus = round(base_price_eco * random.uniform(2.2, 3.5), 2)
+            base_price_fst = None
+            flight_hours   = dist / 820
+        else:
+            aircraft_id = aircraft_ids["737"] if random.random() < 0.6 else aircraft_ids["a320"]
+            base_price_eco = round(random.uniform(60, 280), 2)
+            base_price_bus = round(base_price_eco * random.uniform(1.8, 2.8), 2)
+            base_price_fst = None
+            flight_hours   = dist / 800
+
+        # Pick 2-3 airlines that exist in our db
+        pool = [c for c in carrier_pool(origin_iata, dest_iata, dist) if c in airline_ids]
+        if not pool:
+            pool = [a[1] for a in AIRLINES_DATA][:5]
+        num_airlines = min(random.randint(2, 3), len(pool))
+        chosen = random.sample(pool, num_airlines)
+
+        # Departure times — 1-3 flights per day per airline
+        dep_hours = sorted(random.sample(range(5, 23), min(num_airlines + 1, 4)))
+
+        plans.append({
+            "route_id": route.id,
+            "aircraft_id": aircraft_id,
+            "prices": (base_price_eco, base_price_bus, base_price_fst),
+            "block_time": timedelta(hours=flight_hours),
+            "carriers": [
+                (code, airline_ids[code], dep_hours[i % len(dep_hours)])
+                for i, code in enumerate(chosen)
+            ],
+        })
+    return plans
+
+
+def generate_flights(plans, base_date, days):
+    """Yield flight rows (FLIGHT_COLUMNS order) day by day, without building them all"""
+    minutes = [0, 15, 30, 45]
+    for day in range(days):
+        date = base_date + timedelta(days=day)
+        for plan in plans:
+            eco, bus, fst = plan["prices"]
+            for code, airline_id, hour in plan["carriers"]:
+                dep_time = date.replace(hour=hour, minute=random.choice(minutes))
+                arr_time = dep_time + plan["block_time"] + timedelta(minutes=random.randint(0, 30))
+                yield (
+                    f"{code}{random.randint(100, 9999)}", plan["route_id"], airline_id,
+                    plan["aircraft_id"], dep_time, arr_time, eco, bus, fst,
+                )
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_rows(db, table, columns, rows, batch_size=50000):
+    """Stream row tuples into a table; COPY on PostgreSQL, executemany elsewhere"""
+    count = 0
+    if db.get_bind().dialect.name == "postgresql":
+        cursor = db.connection().connection.cursor()
+        copy_sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        for batch in _batches(rows, batch_size):
+            buffer = io.StringIO()
+            # None is written as an empty unquoted field, which CSV COPY reads as NULL;
+            # enum columns store member names, as SQLAlchemy's Enum type does
+            csv.writer(buffer).writerows(
+                [v.name if isinstance(v, Enum) else v for v in row] for row in batch
+            )
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+            count += len(batch)
+    else:
+        statement = insert(table)
+        for batch in _batches(rows, batch_size):
+            db.execute(statement, [dict(zip(columns, row)) for row in batch])
+            count += len(batch)
+    return count
+
+
+def write_flights(db, rows, batch_size=50000):
+    return write_rows(db, Flight.__table__, FLIGHT_COLUMNS, rows, batch_size)
+
+
+def seed_database(days: int = 14, batch_size: int = 50000):
     db = SessionLocal()
     try:
         print("🌱 Starting database seed...")
         print("  Clearing existing data...")
 
-        # Delete in FK-safe order (payments → bookings → flights → routes → aircraft → airports → airlines → users)
+        # Delete in FK-safe order (payments → bookings → flights → schedules → routes → aircraft → airports → airlines → users)
         from app.models.payment import Payment
         from app.models.booking import Booking as BookingModel
+        from app.models.flight_schedule import FlightSchedule
         db.query(Payment).delete()
         db.query(BookingModel).delete()
         db.query(Flight).delete()
+        db.query(FlightSchedule).delete()
         db.query(Route).delete()
         db.query(Aircraft).delete()
         db.query(Airport).delete()
@@ -721,107 +873,23 @@ def seed_database():
                 distance_km=dist
             )
             db.add(r)
-            route_objs[(origin_iata, dest_iata)] = r
+            route_objs[(origin_iata, dest_iata)] = (r, dist)
         db.flush()
         print(f"  ✓ Created {len(route_objs)} routes (skipped {skipped_routes} with missing airports)")
 
         # ── Flights ──
-        print("  Creating flights (14 days)...")
-
-        # Assign airlines to routes based on region/realism
-        # Long haul (>5000km) → wide body 777, medium airline selection
-        # Medium haul (1500-5000km) → mix of 737/A320
-        # Short haul (<1500km) → 737 or A320
-
-        # Major airline lists by region
-        us_carriers     = ["AA", "DL", "UA", "B6", "AS", "WN", "NK"]
-        eu_carriers     = ["BA", "LH", "AF", "KL", "LX", "IB", "FR", "U2", "EI", "TK"]
-        me_carriers     = ["EK", "QR", "EY", "FZ", "G9"]
-        asia_carriers   = ["SQ", "CX", "JL", "NH", "KE", "TG", "MH", "AK", "6E", "AI"]
-        long_haul_set   = ["EK", "QR", "EY", "SQ", "CX", "BA", "LH", "AF", "NH", "JL",
-                           "AA", "DL", "UA", "QF", "KE", "TK"]
-
-        all_airline_codes = [a[1] for a in AIRLINES_DATA]
-
+        print(f"  Creating flights ({days} days)...")
+        started = time.perf_counter()
+        plans = plan_routes(
+            route_objs,
+            airline_ids={code: a.id for code, a in airline_objs.items()},
+            aircraft_ids={"777": ac_777.id, "737": ac_737.id, "a320": ac_a320.id},
+        )
         base_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        flight_count = 0
-
-        for (origin_iata, dest_iata), route in route_objs.items():
-            dist = next((r[2] for r in ROUTES_DATA if r[0] == origin_iata and r[1] == dest_iata), 3000)
-
-            # Choose aircraft by distance
-            if dist >= 6000:
-                aircraft = ac_777
-                base_price_eco = round(random.uniform(550, 1400), 2)
-                base_price_bus = round(base_price_eco * random.uniform(2.8, 4.5), 2)
-                base_price_fst = round(base_price_eco * random.uniform(5.0, 8.0), 2)
-                flight_hours   = dist / 870
-            elif dist >= 2000:
-                aircraft = ac_737 if random.random() < 0.5 else ac_a320
-                base_price_eco = round(random.uniform(180, 550), 2)
-                base_price_bus = round(base_price_eco * random.uniform(2.2, 3.5), 2)
-                base_price_fst = None
-                flight_hours   = dist / 820
-            else:
-                aircraft = ac_737 if random.random() < 0.6 else ac_a320
-                base_price_eco = round(random.uniform(60, 280), 2)
-                base_price_bus = round(base_price_eco * random.uniform(1.8, 2.8), 2)
-                base_price_fst = None
-                flight_hours   = dist / 800
-
-            # Pick 2-3 airlines for this route
-            if dist >= 6000:
-                pool = long_haul_set
-            elif origin_iata in [a[3] for a in AIRPORTS_DATA if a[4] and a[2] == "USA"] or \
-                 dest_iata   in [a[3] for a in AIRPORTS_DATA if a[4] and a[2] == "USA"]:
-                pool = us_carriers + eu_carriers[:4]
-            elif origin_iata in ["LHR","CDG","FRA","AMS","MAD","FCO","ZRH","MUC","VIE"] or \
-                 dest_iata   in ["LHR","CDG","FRA","AMS","MAD","FCO","ZRH","MUC","VIE"]:
-                pool = eu_carriers
-            elif origin_iata in ["DXB","DOH","AUH","RUH","JED"] or \
-                 dest_iata   in ["DXB","DOH","AUH","RUH","JED"]:
-                pool = me_carriers + ["BA","LH","AF","SQ","AI","EK"]
-            elif origin_iata in ["SIN","BKK","KUL","HKG","NRT","ICN","PEK","PVG"] or \
-                 dest_iata   in ["SIN","BKK","KUL","HKG","NRT","ICN","PEK","PVG"]:
-                pool = asia_carriers + ["BA","LH","EK","QR"]
-            else:
-                pool = all_airline_codes
-
-            # Ensure pool airlines exist in our db
-            pool = [c for c in pool if c in airline_objs]
-            if not pool:
-                pool = all_airline_codes[:5]
-
-            num_airlines = min(random.randint(2, 3), len(pool))
-            chosen_airlines = random.sample(pool, num_airlines)
-
-            # Departure times — 1-3 flights per day per airline
-            dep_hours = sorted(random.sample(range(5, 23), min(num_airlines + 1, 4)))
-
-            for day in range(14):
-                date = base_date + timedelta(days=day)
-                for ai, airline_code in enumerate(chosen_airlines):
-                    hour = dep_hours[ai % len(dep_hours)]
-                    dep_time = date.replace(hour=hour, minute=random.choice([0, 15, 30, 45]))
-                    arr_time = dep_time + timedelta(hours=flight_hours, minutes=random.randint(0, 30))
-
-                    fn = f"{airline_code}{random.randint(100, 9999)}"
-                    flight = Flight(
-                        flight_number=fn,
-                        route_id=route.id,
-                        airline_id=airline_objs[airline_code].id,
-                        aircraft_id=aircraft.id,
-                        departure_time=dep_time,
-                        arrival_time=arr_time,
-                        base_price_economy=base_price_eco,
-                        base_price_business=base_price_bus,
-                        base_price_first=base_price_fst,
-                    )
-                    db.add(flight)
-                    flight_count += 1
+        flight_count = write_flights(db, generate_flights(plans, base_date, days), batch_size)
 
         db.commit()
-        print(f"  ✓ Created {flight_count:,} flights across 14 days")
+        print(f"  ✓ Created {flight_count:,} flights across {days} days in {time.perf_counter() - started:.1f}s")
         print()
         print("✅ Database seeded successfully!")
         print(f"   Airlines : {len(AIRLINES_DATA)}")
@@ -845,4 +913,11 @@ def seed_database():
 
 
 if __name__ == "__main__":
-    seed_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the database with demo data")
+    parser.add_argument("--days", type=int, default=14, help="Days of flights to generate")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Flight rows per COPY / insert batch")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for a reproducible dataset")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    seed_database(days=args.days, batch_size=args.batch_size)
\ No newline at end of file
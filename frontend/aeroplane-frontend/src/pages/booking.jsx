@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react"
-import { useParams, useNavigate, useLocation } from "react-router-dom"
+import { useParams, useNavigate } from "react-router-dom"
 import bg from "../assets/frontpage.png"
 import { flightAPI, bookingAPI } from "../services/api"
 import { useWebSocket } from "../hooks/useWebSocket"
@@ -7,8 +7,6 @@ import { useWebSocket } from "../hooks/useWebSocket"
 function Booking() {
   const { flightId } = useParams()
   const navigate = useNavigate()
-  const location = useLocation()
-  const pricePerSeat = location.state?.price ?? 250
 
   const [flightData, setFlightData] = useState(null)
   const [loading, setLoading] = useState(true)
@@ -69,7 +67,13 @@ function Booking() {
     )
   }
 
-  const totalAmount = (pricePerSeat * selectedSeats.length).toFixed(2)
+  // Fares are set by the server per cabin; the seat map carries the current ones
+  const seatFare = (seatNumber) => {
+    const row = flightData?.seat_map?.rows?.find(r => r.seats.some(s => s.number === seatNumber))
+    return flightData?.fares?.[row?.class ?? "economy"] ?? 0
+  }
+
+  const totalAmount = selectedSeats.reduce((sum, seat) => sum + seatFare(seat), 0).toFixed(2)
 
   const handleBook = async () => {
     if (selectedSeats.length === 0) { setError("Please select at least one seat."); return }
@@ -98,7 +102,8 @@ function Booking() {
         const { data } = await bookingAPI.create({
           flight_id: parseInt(flightId),
           seat_number: seat,
-          total_amount: parseFloat(pricePerSeat),
+          total_amount: seatFare(seat),
+          fare_quote: flightData?.fare_quote,
           currency: "USD",
           payment_method: "credit_card",
           passenger_name: form.passenger_name,
@@ -110,7 +115,7 @@ function Booking() {
           card_expiry: form.card_expiry,
           card_cvv: form.card_cvv,
         })
-        results.push({ seat, ...data })
+        results.push({ seat, amount: seatFare(seat), ...data })
       } catch (e) {
         failed.push({ seat, reason: e.response?.data?.detail || e.message || "Failed" })
       }
@@ -150,7 +155,7 @@ function Booking() {
                 </div>
                 <p className="text-sm"><span className="text-white/50">Reference:</span> <span className="font-bold">{s.booking?.booking_reference}</span></p>
                 <p className="text-sm"><span className="text-white/50">Ticket:</span> <span className="font-bold">{s.booking?.ticket_number}</span></p>
-                <p className="text-sm"><span className="text-white/50">Amount:</span> <span className="font-bold">${pricePerSeat}</span></p>
+                <p className="text-sm"><span className="text-white/50">Amount:</span> <span className="font-bold">${s.amount.toFixed(2)}</span></p>
               </div>
             ))}
           </div>
@@ -158,8 +163,8 @@ function Booking() {
           {/* Total */}
           <div className="bg-blue-600/20 border border-blue-400/30 rounded-2xl p-4 mb-6">
             <p className="text-white/60 text-sm">Total Charged</p>
-            <p className="text-3xl font-black text-white">${(pricePerSeat * successList.length).toFixed(2)}</p>
-            <p className="text-white/40 text-xs">{successList.length} seat{successList.length > 1 ? "s" : ""} × ${pricePerSeat}</p>
+            <p className="text-3xl font-black text-white">${successList.reduce((sum, s) => sum + s.amount, 0).toFixed(2)}</p>
+            <p className="text-white/40 text-xs">{successList.length} seat{successList.length > 1 ? "s" : ""}</p>
           </div>
 
           {error && (
@@ -300,7 +305,7 @@ function Booking() {
                     </div>
                     <div className="text-right">
                       <p className="text-white font-black text-xl">${totalAmount}</p>
-                      <p className="text-white/40 text-xs">${pricePerSeat} × {selectedSeats.length}</p>
+                      <p className="text-white/40 text-xs">{selectedSeats.map(seat => `$${seatFare(seat).toFixed(2)}`).join(" + ")}</p>
                     </div>
                   </div>
                 ) : (
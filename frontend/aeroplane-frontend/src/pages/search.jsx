@@ -297,7 +297,7 @@ function Search() {
 
                 {/* Price + seats */}
                 <div className="text-center">
-                  <p className="text-2xl font-black">${f.base_price_economy}</p>
+                  <p className="text-2xl font-black">${f.fare_economy}</p>
                   <p className={`text-xs font-bold mt-1 ${f.available_seats < 10 ? "text-red-400" : "text-green-400"}`}>
                     {f.available_seats} seats left
                   </p>